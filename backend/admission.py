@@ -0,0 +1,307 @@
+"""
+Admission control for the upstream APIs (OpenAI and Nomic).
+
+Every call goes through its upstream's Limiter. The limiter:
+- caps calls in flight at a fixed concurrency;
+- paces call starts with a token bucket at the provider's request rate;
+- makes callers wait for a free slot in a bounded queue;
+- retries rate-limit and transient errors with jittered exponential backoff.
+
+When the queue is full, or a call cannot finish before the request's deadline, it raises
+Overloaded. The endpoints turn that into 503 with a Retry-After header instead of piling more
+work onto a provider that is already pushing back.
+
+The deadline is a context variable set once per request (`deadline()`). It follows the
+request into graph nodes, tasks and threads, so queue waits, calls and retries never outlive the
+request that needs them.
+"""
+import asyncio
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds a chat request may spend on upstream calls, queueing and retries included
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "3"))
+# Full-jitter backoff: a retry waits a random time up to min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2^attempt)
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+# HTTP statuses worth retrying: timeouts, rate limits and server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+_deadline: ContextVar[Optional[float]] = ContextVar("upstream_deadline", default=None)
+
+
+class Overloaded(Exception):
+    """An upstream cannot take the call now; retry after `retry_after` seconds."""
+
+    def __init__(self, upstream: str, reason: str, retry_after: float):
+        super().__init__(f"{upstream} is overloaded: {reason}")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+@contextmanager
+def deadline(seconds: float = REQUEST_DEADLINE_SECONDS):
+    """Give the upstream calls made inside the block `seconds` to finish; an enclosing deadline that is sooner wins."""
+    current = _deadline.get()
+    token = _deadline.set(min(filter(None, (current, time.monotonic() + seconds))))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def retryable(error: Exception) -> bool:
+    """Whether `error` is a rate limit, timeout or transient server/connection error."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUSES
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or any(
+        word in type(error).__name__ for word in ("RateLimit", "Timeout", "Connection")
+    )
+
+
+def _retry_after_header(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Limiter:
+    """
+    Bounded concurrency, token-bucket pacing and a bounded wait queue for one upstream.
+
+    One limiter serves every event loop: sync embedding calls run it on loops of their own in
+    worker threads. Its counters, queue and token bucket are guarded by a threading lock, and a
+    freed slot is handed to its waiter on the waiter's own loop. `requests_per_second` of 0 turns
+    pacing off.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, requests_per_second: float, max_queue: int,
+                 retries: int = UPSTREAM_RETRIES):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.max_queue = max_queue
+        self.retries = retries
+        self.active = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[asyncio.Future] = deque()
+        # The bucket holds up to max_concurrency starts, so an idle upstream takes a full burst at once
+        self._tokens = float(max_concurrency)
+        self._refilled = time.monotonic()
+        self.counters = {"admitted": 0, "shed": 0, "deadline_exceeded": 0, "retries": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "in_flight": self.active, "queue_depth": self.queue_depth}
+
+    def retry_after(self) -> float:
+        """Rough time for the current queue to drain."""
+        per_second = self.requests_per_second or self.max_concurrency
+        return (self.queue_depth + 1) / per_second
+
+    async def run(self, operation: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `operation()` (a coroutine factory) under this limiter, retrying transient errors."""
+        for attempt in range(self.retries + 1):
+            await self._acquire()
+            try:
+                await self._take_token()
+                try:
+                    return await asyncio.wait_for(operation(), remaining())
+                except asyncio.TimeoutError:
+                    left = remaining()
+                    if left is None or left > 0:
+                        # The operation's own timeout, not the deadline's: retry it like any other
+                        raise
+                    self._count("deadline_exceeded")
+                    raise Overloaded(self.name, "request deadline passed during the call", self.retry_after()) from None
+            except Exception as e:
+                if isinstance(e, Overloaded) or not retryable(e):
+                    raise
+                delay = max(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)), _retry_after_header(e) or 0)
+                left = remaining()
+                if attempt == self.retries or (left is not None and delay >= left):
+                    # Still rate limited or failing: tell the client to come back instead of failing the request
+                    raise Overloaded(self.name, f"{type(e).__name__} after {attempt + 1} attempts", delay) from e
+                self._count("retries")
+                logger.warning(f"{self.name}: {e!r}; retrying in {delay:.1f}s ({attempt + 1}/{self.retries})")
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+
+    def _count(self, event: str):
+        with self._lock:
+            self.counters[event] += 1
+
+    async def _acquire(self):
+        left = remaining()
+        with self._lock:
+            if self.active < self.max_concurrency and not self._waiters:
+                self.active += 1
+                self.counters["admitted"] += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                self.counters["shed"] += 1
+                raise Overloaded(self.name, f"{len(self._waiters)} calls already waiting", self.retry_after())
+            if left is not None and left <= 0:
+                self.counters["deadline_exceeded"] += 1
+                raise Overloaded(self.name, "request deadline passed", self.retry_after())
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            # _release hands its slot straight to the first waiter, so `active` is already counted
+            await asyncio.wait_for(waiter, timeout=left)
+        except BaseException as e:
+            with self._lock:
+                handed_over = waiter.done() and not waiter.cancelled()
+                if not handed_over and waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if handed_over:
+                # The slot arrived just as we gave up; pass it on
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                self._count("deadline_exceeded")
+                raise Overloaded(self.name, "request deadline passed while queued", self.retry_after()) from None
+            raise
+        self._count("admitted")
+
+    def _release(self):
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    break
+            else:
+                self.active -= 1
+                return
+        # The waiter may belong to another thread's event loop (sync embedding calls run their own)
+        waiter.get_loop().call_soon_threadsafe(self._hand_over, waiter)
+
+    def _hand_over(self, waiter: asyncio.Future):
+        if waiter.done():
+            # It gave up before the slot reached it; pass the slot on
+            self._release()
+        else:
+            waiter.set_result(None)
+
+    async def _take_token(self):
+        if not self.requests_per_second:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(float(self.max_concurrency), self._tokens + (now - self._refilled) * self.requests_per_second)
+                self._refilled = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.requests_per_second
+            left = remaining()
+            if left is not None and wait >= left:
+                self._count("deadline_exceeded")
+                raise Overloaded(self.name, "rate limit would outlast the request deadline", wait)
+            await asyncio.sleep(wait)
+
+
+def _limiter(name: str, max_concurrency: str, requests_per_second: str, max_queue: str) -> Limiter:
+    prefix = name.upper()
+    return Limiter(
+        name,
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", max_concurrency)),
+        requests_per_second=float(os.getenv(f"{prefix}_REQUESTS_PER_SECOND", requests_per_second)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+    )
+
+
+# One limiter per upstream, shared by every call site
+OPENAI = _limiter("openai", "16", "8", "64")
+NOMIC = _limiter("nomic", "8", "10", "64")
+LIMITERS = (OPENAI, NOMIC)
+
+
+class AdmittedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that sends every call through a Limiter. Sync calls run the limiter on an
+    event loop of their own, so they must not be made from a coroutine.
+    """
+
+    def __init__(self, underlying: Embeddings, limiter: Limiter):
+        self.underlying = underlying
+        self.limiter = limiter
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._run_sync(self.underlying.embed_documents, texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._run_sync(self.underlying.embed_query, text)
+
+    def _run_sync(self, function: Callable, *args) -> Any:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.limiter.run(lambda: asyncio.to_thread(function, *args)))
+        raise RuntimeError("sync embedding call inside a coroutine; await the async method instead")
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.limiter.run(lambda: self.underlying.aembed_documents(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.limiter.run(lambda: self.underlying.aembed_query(text))
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Many query embeddings as one admitted call; NomicEmbeddings takes the task type for a whole batch."""
+        if hasattr(self.underlying, "embed"):
+            return await self.limiter.run(lambda: asyncio.to_thread(self.underlying.embed, texts, task_type="search_query"))
+        return await self.limiter.run(lambda: asyncio.gather(*(self.underlying.aembed_query(text) for text in texts)))
+
+
+def _gauge_samples(name: str, attribute: str):
+    def collect():
+        for limiter in LIMITERS:
+            yield name, {"upstream": limiter.name}, getattr(limiter, attribute)
+    return collect
+
+
+def _event_samples():
+    for limiter in LIMITERS:
+        for event, value in limiter.counters.items():
+            yield "buzzlink_upstream_calls_total", {"upstream": limiter.name, "event": event}, value
+
+
+metrics.REGISTRY.register_collector("buzzlink_upstream_queue_depth", "gauge", "Upstream calls waiting for a concurrency slot.",
+                                    _gauge_samples("buzzlink_upstream_queue_depth", "queue_depth"))
+metrics.REGISTRY.register_collector("buzzlink_upstream_in_flight", "gauge", "Upstream calls in flight.",
+                                    _gauge_samples("buzzlink_upstream_in_flight", "active"))
+metrics.REGISTRY.register_collector("buzzlink_upstream_calls_total", "counter", "Upstream admissions, shed calls, deadline expiries and retries.",
+                                    _event_samples)
@@ -0,0 +1,61 @@
+"""
+Run a list of chat queries through /chat/batch, e.g. one per company on a career-fair roster.
+
+Reads one message per line (blank lines skipped), sends them in batches of at most
+--batch-size, and writes the NDJSON results, one line per message, in input order.
+
+Usage (from backend/):
+    python batch_chat.py queries.txt --url http://localhost:8000 --out results.ndjson
+    python batch_chat.py queries.txt --template "Who works at {}?"   # lines are company names
+"""
+import argparse
+import json
+import sys
+import time
+
+import httpx
+
+
+def run_batches(messages, url: str, batch_size: int, timeout: float):
+    """Yield the result items of every message, batch by batch, each batch in input order."""
+    with httpx.Client(base_url=url, timeout=timeout) as client:
+        for start in range(0, len(messages), batch_size):
+            batch = messages[start:start + batch_size]
+            items = []
+            with client.stream("POST", "/chat/batch", json={"messages": batch}) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        item = json.loads(line)
+                        item["index"] += start
+                        items.append(item)
+                        print(f"{start + len(items)}/{len(messages)} done", file=sys.stderr, end="\r")
+            yield from sorted(items, key=lambda item: item["index"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send many chat messages to /chat/batch")
+    parser.add_argument("input", help="text file with one message (or --template value) per line")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--out", help="NDJSON output file (stdout by default)")
+    parser.add_argument("--template", help='format each line into a message, e.g. "Who works at {}?"')
+    parser.add_argument("--batch-size", type=int, default=200, help="messages per request (the server allows BATCH_MAX_MESSAGES)")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds per batch request")
+    args = parser.parse_args()
+
+    with open(args.input, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    messages = [args.template.format(line) for line in lines] if args.template else lines
+
+    start = time.perf_counter()
+    errors = 0
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for item in run_batches(messages, args.url, args.batch_size, args.timeout):
+            errors += "error" in item
+            out.write(json.dumps(item) + "\n")
+    finally:
+        if args.out:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{len(messages)} messages ({errors} failed) in {elapsed:.1f}s ({len(messages) / elapsed:.2f} messages/sec)", file=sys.stderr)
@@ -0,0 +1,64 @@
+"""
+Throughput of /chat/batch against calling /chat once per message, the way bulk lookups were run.
+
+Uses the offline setup of benchmarks/harness.py: the stub LLM and hashed embeddings, each with a
+fixed per-call latency, and the profiles ingested into an in-memory Qdrant. The messages are
+"Who works at <company>?" for the most common companies in the data, and the response cache is
+off, so both runs do all the work.
+
+Usage (from backend/):
+    python -m benchmarks.batch --messages 100 --llm-latency 0.3 --embed-latency 0.1
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.harness import PROFILE_DIR, setup
+
+
+def company_messages(data_path: str, count: int):
+    with open(data_path, encoding="utf-8") as f:
+        profiles = json.load(f)
+    companies = Counter(
+        experience.get("company") for profile in profiles for experience in profile.get("experiences") or []
+        if experience.get("company")
+    )
+    return [f"Who works at {company}?" for company, _ in companies.most_common(count)]
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        app = await setup(args.profiles, args.llm_latency, args.embed_latency, args.search, workdir)
+        messages = company_messages(f"{workdir}/profile_data.json", args.messages)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://bench", timeout=None)
+
+        start = time.perf_counter()
+        for message in messages:
+            (await client.post("/chat", json={"message": message})).raise_for_status()
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = await client.post("/chat/batch", json={"messages": messages})
+        items = [json.loads(line) for line in response.text.splitlines() if line]
+        batch = time.perf_counter() - start
+        await client.aclose()
+
+    failed = sum("error" in item for item in items)
+    print(f"\n{len(messages)} messages, LLM {args.llm_latency * 1000:.0f}ms/call, embeddings {args.embed_latency * 1000:.0f}ms/call")
+    print(f"  sequential /chat: {sequential:7.1f}s  {len(messages) / sequential:6.2f} messages/sec")
+    print(f"  /chat/batch:      {batch:7.1f}s  {len(items) / batch:6.2f} messages/sec  ({failed} failed, {sequential / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", default=PROFILE_DIR, help="directory with the scraped profile CSV/JSON files")
+    parser.add_argument("--search", choices=["local", "qdrant"], default="local")
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per stub LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="seconds per embedding request")
+    asyncio.run(main(parser.parse_args()))
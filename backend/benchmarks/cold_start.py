@@ -0,0 +1,88 @@
+"""
+Import-time and cold-start benchmark for the backend.
+
+Measures, in fresh interpreter processes:
+  * how long `import main` takes (median of several runs), plus the slowest modules
+    reported by `python -X importtime`;
+  * with --serve, how long a uvicorn process takes to accept requests (first 200 or 503
+    from /ready) and to become ready (first 200 from /ready).
+
+Usage (from backend/):
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --serve --port 8123
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def time_import(runs: int):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import main"], check=True, capture_output=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def slowest_imports(top: int):
+    """Parse `-X importtime` output and return the `top` modules by cumulative import time."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], check=True, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(.+)$", line)
+        if match:
+            rows.append((int(match.group(1)), match.group(2).strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def time_serve(port: int, timeout: float):
+    """Start uvicorn and poll /ready; return (seconds until it answers, seconds until ready or None)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    answering = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1)
+                answering = answering or time.perf_counter() - start
+                if response.status_code == 200:
+                    ready = time.perf_counter() - start
+                    break
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+    finally:
+        process.terminate()
+        process.wait()
+    return answering, ready
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument("--serve", action="store_true", help="also measure uvicorn time-to-ready")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    durations = time_import(args.runs)
+    print(f"import main: median {statistics.median(durations) * 1000:.0f}ms, "
+          f"min {min(durations) * 1000:.0f}ms, max {max(durations) * 1000:.0f}ms over {args.runs} runs")
+    print("slowest imports (cumulative):")
+    for micros, module in slowest_imports(args.top):
+        print(f"  {micros / 1000:8.1f}ms  {module}")
+
+    if args.serve:
+        answering, ready = time_serve(args.port, args.timeout)
+        print(f"accepting requests after: {answering:.2f}s" if answering else "server never answered")
+        print(f"ready after: {ready:.2f}s" if ready else f"not ready within {args.timeout:.0f}s")
@@ -0,0 +1,63 @@
+"""
+Concurrency benchmark for the /chat endpoint.
+
+Fires a fixed number of requests at a running backend for each concurrency level and
+reports throughput and latency, so we can check that one uvicorn worker serves more
+chats per second as the number of in-flight requests grows.
+
+Usage (from backend/, with the server running on one worker):
+    python -m benchmarks.concurrency --url http://localhost:8000 --levels 1 2 4 8 16 --requests 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+QUERIES = [
+    "Who works at Amazon?",
+    "Who is currently a full-time Software Engineer at Capital One and located in Atlanta?",
+    "Who worked at Google during May 2024 with skills in Google Ads?",
+    "Who worked at Apple with experience in RANSAC algorithm?",
+]
+
+
+async def run_level(client: httpx.AsyncClient, url: str, concurrency: int, total: int):
+    """Send `total` requests with at most `concurrency` in flight and return (elapsed, latencies, errors)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/chat", json={"message": QUERIES[i % len(QUERIES)]})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start, latencies, errors
+
+
+async def main(url: str, levels, total: int):
+    async with httpx.AsyncClient(timeout=120) as client:
+        print(f"{'in-flight':>9} {'req/s':>8} {'p50 (s)':>8} {'max (s)':>8} {'errors':>6}")
+        for concurrency in levels:
+            elapsed, latencies, errors = await run_level(client, url, concurrency, total)
+            p50 = statistics.median(latencies) if latencies else float("nan")
+            worst = max(latencies) if latencies else float("nan")
+            print(f"{concurrency:>9} {len(latencies) / elapsed:>8.2f} {p50:>8.2f} {worst:>8.2f} {errors:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=32, help="requests sent per concurrency level")
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.levels, args.requests))
@@ -0,0 +1,132 @@
+"""
+Offline stand-ins for the paid and remote dependencies of the chat graph.
+
+StubChatModel answers the three kinds of LLM calls the graph makes (search parameter
+extraction, the query_or_respond tool call, generate) deterministically after a configurable
+delay. HashEmbeddings is a hashed bag-of-words embedder, so texts sharing words land close
+together and retrieval stays meaningful. `load_profile_data` assembles the scraped profiles in
+data/profile-data into one JSON file for ingest.py, which loads them into Qdrant's local mode.
+"""
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+import uuid
+import zlib
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import sparse
+
+COMPANY_PATTERN = re.compile(r"\bat ([A-Z][\w&.'-]*(?: [A-Z][\w&.'-]*)*)")
+DOCUMENT_ENTRY_PATTERN = re.compile(r"^\[(\d+)\] (.+)$", re.MULTILINE)
+
+
+class StubChatModel(BaseChatModel):
+    """Deterministic ChatOpenAI stand-in; every call takes `latency` seconds."""
+
+    latency: float = 0.2
+    # Alumni listed in a generated answer
+    answer_size: int = 5
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._with_usage(messages, self._respond(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._with_usage(messages, self._respond(messages)))])
+
+    @staticmethod
+    def _with_usage(messages: List[BaseMessage], response: AIMessage) -> AIMessage:
+        # Rough token counts (4 characters per token) so the token metrics have something to show
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        completion_tokens = len(str(response.content)) // 4
+        response.usage_metadata = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        return response
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        text = str(messages[-1].content)
+        if "Extract search parameters" in text:
+            query = text.split(":", 1)[-1]
+            parameters = {"names": [], "companies": COMPANY_PATTERN.findall(query), "titles": [], "locations": [], "skills": []}
+            return AIMessage(content=json.dumps(parameters))
+        if "DOCUMENT:" in text:
+            alumni = [
+                {"ref": int(ref), "name": name, "summary": f"{name} matches the question."}
+                for ref, name in DOCUMENT_ENTRY_PATTERN.findall(text)[:self.answer_size]
+            ]
+            return AIMessage(content=json.dumps({"alumni": alumni}))
+        # query_or_respond: search for the user's message as is
+        question = next((str(message.content) for message in reversed(messages) if message.type == "human"), text)
+        return AIMessage(content="", tool_calls=[{"name": "retrieve", "args": {"query": question}, "id": f"stub_{uuid.uuid4().hex}"}])
+
+
+class HashEmbeddings(Embeddings):
+    """Hashed bag-of-words embeddings of `dim` dimensions; each call takes `latency` seconds."""
+
+    def __init__(self, dim: int = 768, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in sparse.tokenize(text):
+            digest = zlib.crc32(token.encode("utf-8"))
+            vector[digest % self.dim] += 1.0 if digest & 0x10000 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self._embed(text)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        # One batched request costs one round trip, like Nomic's
+        await asyncio.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+
+def load_profile_data(profile_dir: str, out_path: str) -> int:
+    """Combine the scraped CSVs and old JSON profiles in `profile_dir` into the JSON list ingest.py reads."""
+    profiles = []
+    for file in sorted(os.listdir(profile_dir)):
+        path = os.path.join(profile_dir, file)
+        if file.endswith(".csv"):
+            csv.field_size_limit(1 << 24)
+            with open(path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                next(reader)
+                profiles.extend(json.loads(row[1]) for row in reader)
+        elif file.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                profiles.extend(json.load(f))
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f)
+    return len(profiles)
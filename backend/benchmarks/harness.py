@@ -0,0 +1,219 @@
+"""
+Offline benchmark and regression harness for the chat graph.
+
+Everything paid or remote is replaced by the fakes in benchmarks/fakes.py: a stub chat model
+with a fixed latency, hash-based embeddings (behind the same embedding cache and admission
+limiter as Nomic's in production), and Qdrant's in-memory local mode loaded with
+data/profile-data through the regular ingestion pipeline. Qdrant's local mode scores every point
+in Python, so by default searches go to a LocalIndex exported from that collection instead
+(`--search qdrant` keeps them on the in-memory Qdrant). The harness then drives the compiled
+graph and the /chat endpoint (in-process, through httpx's ASGI transport, with the response
+cache disabled) at each concurrency level with the workload from benchmarks/workload.py, and
+reports:
+  * throughput and p50/p95/p99 latency per target and concurrency level;
+  * how many queries took the fast-path router and how many answers came from the summaries;
+  * the average time spent in each graph node;
+  * tracemalloc peak and retained memory per request, plus the top allocation sites.
+
+`--save` writes the results as JSON; `--baseline` compares p50 latencies with a saved run and
+exits with status 1 if any got slower by more than `--tolerance`.
+
+Usage (from backend/):
+    python -m benchmarks.harness --levels 1 4 16 --requests 48 --llm-latency 0.2
+    python -m benchmarks.harness --save before.json
+    python -m benchmarks.harness --baseline before.json --tolerance 0.1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.fakes import HashEmbeddings, StubChatModel, load_profile_data
+from benchmarks.workload import WORKLOAD
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "profile-data")
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def setup(profile_dir: str, llm_latency: float, embed_latency: float, search: str, workdir: str):
+    """Point the backend at the fakes and ingest the profiles; returns the imported main module."""
+    os.environ.update(
+        QDRANT_PATH=":memory:",
+        SUMMARY_STORE_PATH=os.path.join(workdir, "summaries.sqlite3"),
+        RETRIEVAL_BACKEND="qdrant",
+        RESPONSE_CACHE_MAX_ENTRIES="0",
+        LANGSMITH_TRACING="false",
+        # The stubs have no provider rate limits to respect
+        OPENAI_REQUESTS_PER_SECOND="0",
+        NOMIC_REQUESTS_PER_SECOND="0",
+    )
+    os.environ.pop("RERANK_MODEL", None)
+    import ingest
+    import main
+    import resources
+    from local_index import export_from_qdrant
+
+    # Per-request INFO logs would drown the report
+    for name in ("main", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    embeddings = resources.wrap_embeddings(HashEmbeddings(dim=resources.EMBEDDING_DIM, latency=embed_latency), namespace="hash-embeddings")
+    resources.override(llm=StubChatModel(latency=llm_latency), embeddings=embeddings)
+    data_path = os.path.join(workdir, "profile_data.json")
+    profiles = load_profile_data(profile_dir, data_path)
+    report = await ingest.ingest(data_path, batch_size=256)
+    if search == "local":
+        os.environ.update(RETRIEVAL_BACKEND="local", LOCAL_INDEX_PATH=os.path.join(workdir, "local_index"))
+        await export_from_qdrant(os.environ["LOCAL_INDEX_PATH"])
+    await main.warm_up_search()
+    print(f"Loaded {profiles} profiles as {report['chunks']} chunks in {report['seconds']:.1f}s")
+    return main
+
+
+async def run_level(request: Callable[[str], Awaitable[None]], concurrency: int, total: int):
+    """Send `total` workload queries with at most `concurrency` in flight; returns (elapsed, latencies)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await request(WORKLOAD[i % len(WORKLOAD)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start, latencies
+
+
+async def measure_allocations(request: Callable[[str], Awaitable[None]], count: int, top: int):
+    """Run `count` requests one at a time under tracemalloc and summarize what they allocate."""
+    tracemalloc.start(10)
+    before = tracemalloc.take_snapshot()
+    peaks, retained = [], []
+    for i in range(count):
+        tracemalloc.reset_peak()
+        current_before = tracemalloc.get_traced_memory()[0]
+        await request(WORKLOAD[i % len(WORKLOAD)])
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - current_before)
+        retained.append(current - current_before)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    sites = [
+        {"site": str(stat.traceback[0]), "kib_per_request": stat.size_diff / 1024 / count, "blocks_per_request": stat.count_diff / count}
+        for stat in after.compare_to(before, "traceback")[:top]
+    ]
+    return {"peak_kib": statistics.mean(peaks) / 1024, "retained_kib": statistics.mean(retained) / 1024, "top_sites": sites}
+
+
+async def main(args) -> int:
+    with tempfile.TemporaryDirectory() as workdir:
+        app = await setup(args.profiles, args.llm_latency, args.embed_latency, args.search, workdir)
+        graph = app.get_graph()
+        node_seconds: Dict[str, List[float]] = defaultdict(list)
+
+        async def graph_request(query: str):
+            # Nodes run one after another, so the time between updates is the time spent in each node
+            last = time.perf_counter()
+            async for update in graph.astream(app.build_graph_input(query), stream_mode="updates"):
+                now = time.perf_counter()
+                for node in update:
+                    node_seconds[node].append(now - last)
+                last = now
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://harness", timeout=300)
+
+        async def chat_request(query: str):
+            response = await client.post("/chat", json={"message": query})
+            response.raise_for_status()
+
+        results = {"config": {"llm_latency": args.llm_latency, "embed_latency": args.embed_latency, "search": args.search}, "levels": {}}
+        print(f"\n{'target':>6} {'in-flight':>9} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+        for target, request in (("graph", graph_request), ("chat", chat_request)):
+            # One untimed pass builds the clients and compiles regexes outside the measurements
+            await run_level(request, 1, len(WORKLOAD))
+            node_seconds.clear()
+            for concurrency in args.levels:
+                elapsed, latencies = await run_level(request, concurrency, args.requests)
+                row = {
+                    "throughput": len(latencies) / elapsed,
+                    "p50_ms": percentile(latencies, 0.50) * 1000,
+                    "p95_ms": percentile(latencies, 0.95) * 1000,
+                    "p99_ms": percentile(latencies, 0.99) * 1000,
+                }
+                results["levels"][f"{target}@{concurrency}"] = row
+                print(f"{target:>6} {concurrency:>9} {row['throughput']:>8.2f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+            if target == "graph":
+                results["nodes_ms"] = {node: statistics.mean(seconds) * 1000 for node, seconds in node_seconds.items()}
+
+        print("\nper-node average (graph runs):")
+        for node, ms in results["nodes_ms"].items():
+            print(f"  {node:<18} {ms:8.1f}ms")
+        router = app.query_router.stats()
+        results["router"] = {"fast_path": router["routed"], "llm": router["fallback"]}
+        results["answers"] = dict(app.answer_stats)
+        print(f"\nrouting: {router['routed']} fast path, {router['fallback']} LLM; "
+              f"answers: {app.answer_stats['assembled']} from summaries, {app.answer_stats['generated']} generated")
+
+        results["allocations"] = await measure_allocations(chat_request, args.alloc_requests, args.top)
+        allocations = results["allocations"]
+        print(f"\nallocations per /chat request: peak {allocations['peak_kib']:.0f} KiB, retained {allocations['retained_kib']:.1f} KiB")
+        for site in allocations["top_sites"]:
+            print(f"  {site['kib_per_request']:8.1f} KiB {site['blocks_per_request']:8.1f} blocks  {site['site']}")
+        await client.aclose()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        return compare(results, args.baseline, args.tolerance)
+    return 0
+
+
+def compare(results, baseline_path: str, tolerance: float) -> int:
+    """Print p50 changes against a saved run; return 1 if any level regressed beyond `tolerance`."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressed = False
+    print(f"\np50 vs. {baseline_path}:")
+    for level, row in results["levels"].items():
+        before = baseline.get("levels", {}).get(level)
+        if before is None:
+            continue
+        change = row["p50_ms"] / before["p50_ms"] - 1
+        flag = "REGRESSION" if change > tolerance else ""
+        regressed = regressed or bool(flag)
+        print(f"  {level:<10} {before['p50_ms']:9.1f} -> {row['p50_ms']:9.1f}ms ({change:+.0%}) {flag}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", default=PROFILE_DIR, help="directory with the scraped profile CSV/JSON files")
+    parser.add_argument("--search", choices=["local", "qdrant"], default="local",
+                        help="serve searches from a LocalIndex export (default) or the in-memory Qdrant itself")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=48, help="requests per target and concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per stub LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per fake embedding call")
+    parser.add_argument("--alloc-requests", type=int, default=10, help="sequential /chat requests traced for allocations")
+    parser.add_argument("--top", type=int, default=5, help="allocation sites to list")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare p50 latencies with this saved JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed p50 slowdown before flagging a regression")
+    sys.exit(asyncio.run(main(parser.parse_args())))
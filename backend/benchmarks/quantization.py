@@ -0,0 +1,220 @@
+"""
+Recall, memory and latency of the collection options in resources.CollectionOptions.
+
+Every configuration in CONFIGS runs on the same vectors. Its recall@k is the share of the
+exact top k, by float32 cosine at the full 768 dimensions, that it returns. Queries are
+`--queries` vectors held out of the indexed set, so each has close but not identical
+neighbours, as real questions do.
+
+Vectors come from one of two sources:
+  * A local index exported from the real collection (`--index`, Nomic embeddings).
+  * By default, hashed embeddings of data/profile-data. These have no semantic structure,
+    so every lossy configuration looks worse on them than it will on real data.
+Matryoshka dimensions are made the way Nomic's `dimensionality` does it: keep the first
+dimensions and re-normalize.
+
+With `--qdrant`, each configuration becomes a temporary collection on the Qdrant server at
+QDRANT_URL and is queried there, so latency includes HNSW and the server's quantized scan.
+Without it, the quantized scan and rescoring are simulated in NumPy, as Qdrant does them:
+  * scalar: int8 with a zero-preserving scale per dimension, over the 0.99 quantile of its
+    non-zero magnitudes;
+  * binary: sign bits compared by Hamming distance.
+The simulation scans exactly instead of walking HNSW, so its latency is only a relative
+indication.
+
+RAM and disk are estimated from the configuration:
+  * the original vectors, in RAM unless stored on disk;
+  * the quantized copy, always in RAM;
+  * the HNSW base layer, 2 x m neighbour ids per point.
+
+Usage (from backend/):
+    python -m benchmarks.quantization [--index local_index] [--k 10] [--queries 200]
+    QDRANT_URL=http://localhost:6333 python -m benchmarks.quantization --index local_index --qdrant
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import warnings
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from resources import FULL_EMBEDDING_DIM, CollectionOptions
+
+CONFIGS: Dict[str, CollectionOptions] = {
+    "float32": CollectionOptions(),
+    "scalar": CollectionOptions(quantization="scalar"),
+    "scalar-norescore": CollectionOptions(quantization="scalar", rescore=False),
+    "scalar-ondisk": CollectionOptions(quantization="scalar", on_disk_vectors=True, on_disk_payload=True),
+    "binary": CollectionOptions(quantization="binary", oversampling=3.0),
+    "binary-norescore": CollectionOptions(quantization="binary", rescore=False),
+    "float32-512": CollectionOptions(dim=512),
+    "scalar-256": CollectionOptions(dim=256, quantization="scalar"),
+    # Only differs from float32 against a server, where HNSW is actually walked
+    "hnsw-m32": CollectionOptions(hnsw_m=32, hnsw_ef_construct=200, hnsw_ef=128),
+}
+
+
+def truncate(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """The first `dim` dimensions, re-normalized to unit length."""
+    cut = np.asarray(vectors[..., :dim], dtype=np.float32)
+    norms = np.linalg.norm(cut, axis=-1, keepdims=True)
+    return cut / np.where(norms == 0, 1, norms)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+def estimated_bytes(options: CollectionOptions, count: int) -> Dict[str, int]:
+    original = count * options.dim * 4
+    quantized = {"none": 0, "scalar": count * options.dim, "binary": count * ((options.dim + 7) // 8)}[options.quantization]
+    graph = count * options.hnsw_m * 2 * 4
+    return {
+        "ram": quantized + graph + (0 if options.on_disk_vectors else original),
+        "disk": original if options.on_disk_vectors else 0,
+    }
+
+
+class SimulatedSearch:
+    """The configuration's search over `vectors`, scanned exactly in NumPy."""
+
+    def __init__(self, vectors: np.ndarray, options: CollectionOptions):
+        self.options = options
+        self.vectors = truncate(vectors, options.dim)
+        if options.quantization == "scalar":
+            # A symmetric scale per dimension, so zero stays exactly zero. It covers the 0.99 quantile of
+            # the dimension's non-zero magnitudes: mostly-zero vectors (hashed embeddings) would otherwise
+            # put the quantile at zero and clip every value that matters
+            magnitudes = np.where(self.vectors != 0, np.abs(self.vectors), np.nan)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # all-zero dimensions
+                scale = np.nanquantile(magnitudes, 0.99, axis=0) / 127
+            scale = np.where(scale > 0, scale, 1).astype(np.float32)
+            codes = np.clip(np.round(self.vectors / scale), -127, 127).astype(np.int8)
+            # Scores of the int8 codes, i.e. of the vectors as the quantized copy represents them
+            self.quantized = codes.astype(np.float32) * scale
+        elif options.quantization == "binary":
+            self.bits = np.packbits(self.vectors > 0, axis=1)
+
+    def __call__(self, query: np.ndarray, k: int) -> List[int]:
+        query = truncate(query, self.options.dim)
+        if self.options.quantization == "none":
+            return top_k(self.vectors @ query, k).tolist()
+        if self.options.quantization == "scalar":
+            approximate = self.quantized @ query
+        else:
+            approximate = -np.bitwise_count(self.bits ^ np.packbits(query > 0)).sum(axis=1).astype(np.float32)
+        if not self.options.rescore:
+            return top_k(approximate, k).tolist()
+        candidates = top_k(approximate, int(k * self.options.oversampling))
+        return candidates[np.argsort(-(self.vectors[candidates] @ query))[:k]].tolist()
+
+
+async def qdrant_search(client, name: str, vectors: np.ndarray, options: CollectionOptions):
+    """Build a temporary collection for the configuration; returns its (async) search function."""
+    from qdrant_client.models import CollectionStatus, PointStruct
+
+    collection = f"quantization_benchmark_{name}"
+    if await client.collection_exists(collection):
+        await client.delete_collection(collection)
+    await client.create_collection(collection_name=collection, **options.create_arguments())
+    points = truncate(vectors, options.dim)
+    for start in range(0, len(points), 512):
+        await client.upsert(collection_name=collection, wait=True, points=[
+            PointStruct(id=start + i, vector=vector.tolist()) for i, vector in enumerate(points[start:start + 512])
+        ])
+    # Searches before the HNSW graph and quantized copy are built would measure a plain scan
+    while (await client.get_collection(collection)).status != CollectionStatus.GREEN:
+        await asyncio.sleep(0.5)
+    params = options.search_params()
+
+    async def search(query: np.ndarray, k: int) -> List[int]:
+        response = await client.query_points(collection_name=collection, query=truncate(query, options.dim).tolist(),
+                                             limit=k, search_params=params, with_payload=False)
+        return [point.id for point in response.points]
+    return collection, search
+
+
+def hashed_profile_vectors() -> np.ndarray:
+    """Hashed embeddings of the chunks of data/profile-data, as the offline harness ingests them."""
+    from benchmarks.fakes import HashEmbeddings, load_profile_data
+    from benchmarks.harness import PROFILE_DIR
+    from ingest import preprocess_alumni_profile_with_manual_split
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "profile_data.json")
+        load_profile_data(PROFILE_DIR, data_path)
+        texts = [document.page_content for document in preprocess_alumni_profile_with_manual_split(data_path)]
+    return np.asarray(HashEmbeddings(dim=FULL_EMBEDDING_DIM).embed_documents(texts), dtype=np.float32)
+
+
+async def measure(search: Callable, base: np.ndarray, queries: np.ndarray, k: int):
+    """Mean recall@k and median latency. A hit tied with the exact k-th score counts, so duplicate chunks do not cost recall."""
+    recalls, latencies = [], []
+    for query in queries:
+        exact = base @ query
+        threshold = exact[top_k(exact, k)[-1]] - 1e-6
+        start = time.perf_counter()
+        found = search(query, k)
+        if asyncio.iscoroutine(found):
+            found = await found
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(min(k, int((exact[found] >= threshold).sum())) / k)
+    return statistics.mean(recalls), statistics.median(latencies)
+
+
+async def main(args):
+    if args.index:
+        from local_index import LocalIndex
+
+        vectors = np.asarray(LocalIndex.load(args.index).vectors, dtype=np.float32)
+        source = f"local index {args.index}"
+    else:
+        vectors = hashed_profile_vectors()
+        source = "hashed embeddings of data/profile-data"
+    vectors = truncate(vectors, vectors.shape[1])
+    order = np.random.default_rng(args.seed).permutation(len(vectors))
+    queries, base = vectors[order[:args.queries]], vectors[order[args.queries:]]
+
+    client = None
+    if args.qdrant:
+        from dotenv import load_dotenv
+
+        import resources
+
+        load_dotenv()
+        client = resources.get_async_qdrant_client()
+    print(f"{len(base)} vectors ({vectors.shape[1]}-d, {source}), {len(queries)} held-out queries, "
+          f"{'Qdrant at ' + str(os.getenv('QDRANT_URL')) if client else 'simulated in NumPy'}\n")
+    print(f"{'config':<18}{'dim':>5}{'recall@' + str(args.k):>11}{'p50 (ms)':>10}{'RAM (MB)':>10}{'disk (MB)':>11}")
+    for name in args.configs:
+        options = CONFIGS[name]
+        collection = None
+        if client:
+            collection, search = await qdrant_search(client, name, base, options)
+        else:
+            search = SimulatedSearch(base, options)
+        try:
+            recall, latency = await measure(search, base, queries, args.k)
+        finally:
+            if collection:
+                await client.delete_collection(collection)
+        size = estimated_bytes(options, len(base))
+        print(f"{name:<18}{options.dim:>5}{recall:>11.3f}{latency:>10.2f}{size['ram'] / 1e6:>10.1f}{size['disk'] / 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", help="local index directory exported from the collection (default: hashed profile embeddings)")
+    parser.add_argument("--qdrant", action="store_true", help="build and query each configuration on the Qdrant server at QDRANT_URL")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="vectors held out of the index and used as queries")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
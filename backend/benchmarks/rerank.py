@@ -0,0 +1,67 @@
+"""
+Latency/quality benchmark for cross-encoder reranking.
+
+For every workload query, over-fetches RERANK_CANDIDATES alumni the way retrieve does, then
+reports where the expected alumnus ranks in plain retrieval order and after reranking, whether
+it survives into the top RERANK_TOP_N (and into the top RETRIEVAL_MAX_PROFILES without
+reranking), and how long search and reranking take.
+
+Usage (from backend/, with RERANK_MODEL set, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2):
+    python -m benchmarks.rerank --runs 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+from benchmarks.workload import EXPECTED_IDS, QUERIES
+
+
+def rank_of(docs, expected_id: str):
+    ids = [doc.metadata.get("id") for doc in docs]
+    return ids.index(expected_id) + 1 if expected_id in ids else None
+
+
+async def main(runs: int):
+    import main as app
+    import resources
+    import temporal
+
+    reranker = resources.get_reranker()
+    if reranker is None:
+        raise SystemExit("Set RERANK_MODEL and install sentence-transformers to benchmark reranking")
+    await app.warm_up_search()
+
+    search_ms, rerank_ms = [], []
+    hits = {"retrieval": 0, "reranked": 0}
+    print(f"{'query':<48} {'rank':>5} {'reranked':>8}")
+    for query, expected_id in zip(QUERIES, EXPECTED_IDS):
+        window = temporal.time_window(query)
+        query_filter = temporal.build_time_filter(window) if window else None
+        for run in range(runs):
+            start = time.perf_counter()
+            candidates = await app.search_documents(query, limit=app.RERANK_CANDIDATES, query_filter=query_filter)
+            search_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            reranked = await reranker.rerank(query, list(candidates), len(candidates))
+            rerank_ms.append((time.perf_counter() - start) * 1000)
+
+        before, after = rank_of(candidates, expected_id), rank_of(reranked, expected_id)
+        hits["retrieval"] += before is not None and before <= app.RETRIEVAL_MAX_PROFILES
+        hits["reranked"] += after is not None and after <= app.RERANK_TOP_N
+        print(f"{query[:48]:<48} {before or '-':>5} {after or '-':>8}")
+
+    print(f"\nexpected alumnus in the top {app.RETRIEVAL_MAX_PROFILES} without reranking: {hits['retrieval']}/{len(QUERIES)}")
+    print(f"expected alumnus in the top {app.RERANK_TOP_N} after reranking {app.RERANK_CANDIDATES} candidates: {hits['reranked']}/{len(QUERIES)}")
+    print(f"search p50 {statistics.median(search_ms):.0f}ms, rerank p50 {statistics.median(rerank_ms):.0f}ms "
+          f"(max {max(rerank_ms):.0f}ms)")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="timed repetitions per query")
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
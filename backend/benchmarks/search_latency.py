@@ -0,0 +1,80 @@
+"""
+Search latency benchmark: in-process LocalIndex vs. the Qdrant collection.
+
+Embeds each query once, then times the grouped retrieval call that search_documents makes
+(dense or hybrid, with the query's time filter) against both backends and reports p50/p99
+latency in milliseconds. The Qdrant side uses QDRANT_URL, or QDRANT_PATH for local mode.
+
+Usage (from backend/, after `python local_index.py --out local_index`):
+    python -m benchmarks.search_latency --index local_index --runs 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+QUERIES = [
+    "Who works at Amazon?",
+    "Who is currently a full-time Software Engineer at Capital One and located in Atlanta?",
+    "Who worked at Google during May 2024 with skills in Google Ads?",
+    "Who worked at Apple with experience in RANSAC algorithm?",
+    "Yihao Mai's experience at IBM",
+]
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def time_backend(client, requests, runs: int):
+    latencies = []
+    for i in range(runs):
+        arguments = requests[i % len(requests)]
+        start = time.perf_counter()
+        await client.query_points_groups(**arguments)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def main(index_path: str, runs: int, hnsw: bool, skip_remote: bool):
+    import main as app
+    import resources
+    import temporal
+    from local_index import LocalIndex
+
+    local = LocalIndex.load(index_path, hnsw=hnsw)
+    embeddings = resources.get_embeddings()
+    backends = {"local": local}
+    if not skip_remote:
+        backends["qdrant"] = resources.get_async_qdrant_client()
+    hybrid = local.has_sparse_vectors and (skip_remote or await resources.collection_has_sparse_vectors())
+
+    requests = []
+    for query in QUERIES:
+        window = temporal.time_window(query)
+        requests.append(app.search_arguments(
+            query, await embeddings.aembed_query(query), app.RETRIEVAL_MAX_PROFILES, app.RETRIEVAL_CHUNKS_PER_PROFILE,
+            temporal.build_time_filter(window) if window else None, hybrid,
+        ))
+
+    print(f"{len(local.ids)} points, {'hybrid' if hybrid else 'dense'} search, {runs} runs per backend")
+    print(f"{'backend':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'mean (ms)':>10}")
+    for name, client in backends.items():
+        # One untimed pass warms connections and materializes the local payload columns
+        await time_backend(client, requests, len(requests))
+        latencies = await time_backend(client, requests, runs)
+        print(f"{name:>8} {statistics.median(latencies):9.2f} {percentile(latencies, 0.99):9.2f} {statistics.mean(latencies):10.2f}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default="local_index", help="local index directory")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--hnsw", action="store_true", help="use the HNSW path of the local index")
+    parser.add_argument("--skip-remote", action="store_true", help="only time the local index")
+    args = parser.parse_args()
+    asyncio.run(main(args.index, args.runs, args.hnsw, args.skip_remote))
@@ -0,0 +1,33 @@
+"""
+Standard benchmark workload: the evaluation queries from langchain/buzzlink_chatbot.ipynb
+and the alumnus each one is expected to find, plus plain lookups that the fast-path router
+rewrites without the LLM and that are answered from the precomputed summaries.
+"""
+
+QUERIES = [
+    "Who worked at Google during May 2024 with skills in Google Ads?",
+    "May 2022 Google STEP intern at Seattle and had skills in C++",
+    "Who is currently a full-time Software Engineer at Capital One and located in Atlanta?",
+    "Who is an incoming Software Developer intern at Amazon and will be working in Austin, Texas?",
+    "Who worked at Apple with experience in RANSAC algorithm?",
+]
+
+EXPECTED_IDS = [
+    "https://www.linkedin.com/in/jongin-jun/",
+    "https://www.linkedin.com/in/riyap1126/",
+    "https://www.linkedin.com/in/faiz-bhimji/",
+    "https://www.linkedin.com/in/yusif-kazimzade-078206220/",
+    "https://www.linkedin.com/in/yoon-ji-cho/",
+]
+
+# Plain lookups FastPathRouter canonicalizes; generate answers them from the summary store
+FAST_PATH_QUERIES = [
+    "Who works at Google?",
+    "GT alumni at Amazon",
+    "Who worked at Microsoft?",
+    "Find alumni at Capital One in Atlanta",
+    "Who will work at Meta?",
+]
+
+# What the harness sends: the evaluation queries take the LLM path, the lookups the fast path
+WORKLOAD = QUERIES + FAST_PATH_QUERIES
@@ -0,0 +1,138 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a chat message for exact cache lookups: case, whitespace and trailing punctuation are ignored."""
+    return re.sub(r"\s+", " ", message).strip().rstrip("?.!").strip().lower()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for full chat responses.
+
+    The exact tier is keyed on the normalized message. The semantic tier is keyed on the
+    message embedding and returns the most similar cached response whose cosine similarity
+    reaches `similarity_threshold` among the entries with the same `scope`, the parts of the
+    question that wording similarity does not capture (tense, time period, search slots). Both tiers are LRU-bounded to `max_entries` and entries
+    expire after `ttl_seconds`.
+
+    `invalidate()` drops everything (e.g. after the Qdrant collection is re-ingested) and bumps
+    `generation`; a `put()` carrying an older generation is ignored, so a response computed
+    against the old collection is never stored after the invalidation.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, similarity_threshold: float = 0.97):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._exact: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # key -> (expires_at, unit vector, value, scope); the stacked matrix is rebuilt lazily after changes
+        self._semantic: "OrderedDict[str, Tuple[float, np.ndarray, Any, Hashable]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: list = []
+        self._matrix_scopes: list = []
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Exact-tier lookup. Does not count a miss, since the semantic tier is usually tried next."""
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._exact[key]
+                self.counters["expirations"] += 1
+                return None
+            self._exact.move_to_end(key)
+            self.counters["exact_hits"] += 1
+            return value
+
+    def get_similar(self, vector: Optional[Sequence[float]], scope: Hashable = None) -> Optional[Any]:
+        """
+        Semantic-tier lookup: the closest cached response with the same scope above the similarity
+        threshold, else a miss. Without a vector (no embedding to compare) it only counts the miss.
+        """
+        query = None if vector is None else _unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            self._drop_expired(now)
+            if self._semantic and query is not None:
+                if self._matrix is None:
+                    self._matrix_keys = list(self._semantic)
+                    self._matrix = np.stack([self._semantic[key][1] for key in self._matrix_keys])
+                    self._matrix_scopes = [self._semantic[key][3] for key in self._matrix_keys]
+                scores = self._matrix @ query
+                scores[[entry_scope != scope for entry_scope in self._matrix_scopes]] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    key = self._matrix_keys[best]
+                    self._semantic.move_to_end(key)
+                    self.counters["semantic_hits"] += 1
+                    return self._semantic[key][2]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key: str, vector: Optional[Sequence[float]], value: Any, generation: int, scope: Hashable = None):
+        """Store `value` in the exact tier, and in the semantic tier if a vector is given."""
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._exact[key] = (expires_at, value)
+            self._exact.move_to_end(key)
+            self._evict(self._exact)
+            if vector is not None:
+                self._semantic[key] = (expires_at, _unit(vector), value, scope)
+                self._semantic.move_to_end(key)
+                self._evict(self._semantic)
+                self._matrix = None
+
+    def invalidate(self):
+        """Drop every entry, e.g. because the underlying collection was re-ingested."""
+        with self._lock:
+            self._exact.clear()
+            self._semantic.clear()
+            self._matrix = None
+            self.generation += 1
+            self.counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+            lookups = hits + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "exact_entries": len(self._exact),
+                "semantic_entries": len(self._semantic),
+                "max_entries": self.max_entries,
+                "generation": self.generation,
+            }
+
+    def _evict(self, tier: OrderedDict):
+        while len(tier) > self.max_entries:
+            tier.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _drop_expired(self, now: float):
+        expired = [key for key, entry in self._semantic.items() if entry[0] < now]
+        for key in expired:
+            del self._semantic[key]
+            self.counters["expirations"] += 1
+        if expired:
+            self._matrix = None
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
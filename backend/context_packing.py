@@ -0,0 +1,111 @@
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r"https?://\S+")
+# Chunk lines that carry no information for the answer ("Work Type: Unknown", "Description: None")
+EMPTY_FIELD_PATTERN = re.compile(r"^[A-Za-z ]+: (?:Unknown|None|)\s*$")
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the gpt-4o tokenizer, or estimate ~4 characters per token if it is unavailable."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    # tiktoken downloads its tables on first use; stay usable offline
+                    logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+                    _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return len(text) // 4
+
+
+class PackedContext(NamedTuple):
+    text: str
+    tokens: int
+    # alumni that made it into the prompt, in prompt order; `ref` in the answer indexes into this (1-based)
+    docs: List[Document]
+
+
+def compact_chunk_text(text: str, description_chars: int) -> str:
+    """Strip URLs and empty fields from chunk text and truncate long descriptions."""
+    lines = []
+    for line in URL_PATTERN.sub("", text).splitlines():
+        line = line.rstrip()
+        if EMPTY_FIELD_PATTERN.match(line):
+            continue
+        if line.startswith("Description: ") and len(line) > description_chars:
+            line = line[:description_chars].rsplit(" ", 1)[0] + "..."
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def pack_context(docs: List[Document], token_budget: int, description_chars: int = 300) -> PackedContext:
+    """
+    Build the DOCUMENT block for the generate prompt from retrieved alumni.
+
+    Alumni are ordered by relevance (search parameter matches, then rerank and vector score) and added until
+    `token_budget` is spent; the best match is always included. Each entry is addressed by a short
+    numeric ref instead of its LinkedIn URL, and profile pictures and other URLs are left out, since
+    `reattach_profile_fields` restores them from metadata after generation.
+    """
+    ordered = sorted(
+        docs,
+        key=lambda doc: (doc.metadata.get("parameter_matches", 0), doc.metadata.get("rerank_score", 0.0), doc.metadata.get("score", 0.0)),
+        reverse=True,
+    )
+    entries, kept, used = [], [], 0
+    for doc in ordered:
+        entry = f"[{len(kept) + 1}] {doc.metadata.get('name')}\n{compact_chunk_text(doc.page_content, description_chars)}\n\n"
+        tokens = count_tokens(entry)
+        if kept and used + tokens > token_budget:
+            break
+        entries.append(entry)
+        kept.append(doc)
+        used += tokens
+    return PackedContext(text="".join(entries).strip(), tokens=used, docs=kept)
+
+
+def reattach_profile_fields(answer: str, docs: List[Document]) -> str:
+    """
+    Replace the `ref` of each alumnus in the generate answer with their id, name and profile
+    picture from metadata. Answers that cannot be parsed are returned unchanged.
+    """
+    try:
+        parsed = json.loads(answer)
+    except json.JSONDecodeError:
+        return answer
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("alumni"), list):
+        return answer
+
+    by_id = {doc.metadata.get("id"): doc for doc in docs}
+    alumni: List[Dict[str, Any]] = []
+    for item in parsed["alumni"]:
+        if not isinstance(item, dict):
+            continue
+        doc = None
+        ref = item.pop("ref", None)
+        if isinstance(ref, (int, str)) and str(ref).isdigit() and 1 <= int(ref) <= len(docs):
+            doc = docs[int(ref) - 1]
+        elif item.get("id") in by_id:
+            doc = by_id[item["id"]]
+        if doc is not None:
+            item.update(id=doc.metadata.get("id"), name=doc.metadata.get("name") or item.get("name"), pic=doc.metadata.get("profile_pic"))
+        alumni.append(item)
+    parsed["alumni"] = alumni
+    return json.dumps(parsed)
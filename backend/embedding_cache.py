@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+async def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Query embeddings of `texts`, in one request when `embeddings` has a batched `aembed_queries`
+    (LangChain's interface only embeds documents in batches), else one concurrent call per text.
+    """
+    if hasattr(embeddings, "aembed_queries"):
+        return await embeddings.aembed_queries(texts)
+    return list(await asyncio.gather(*(embeddings.aembed_query(text) for text in texts)))
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that remembers vectors it has already computed.
+
+    Lookups go through an in-process LRU first and then, if `path` is given, a SQLite store
+    of float32 blobs, so repeated queries and unchanged chunks never reach the embedding API
+    again, even across restarts. Queries and documents are cached separately because Nomic
+    embeds them with different task types.
+    """
+
+    def __init__(self, underlying: Embeddings, namespace: str, max_entries: int = 4096, path: Optional[str] = None):
+        self.underlying = underlying
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("document", text) for text in texts]
+        vectors = self._lookup(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.underlying.embed_documents([texts[i] for i in missing])
+            self._store({keys[i]: vector for i, vector in zip(missing, computed)})
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        vector = self._lookup([key])[0]
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self._store({key: vector})
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("document", text) for text in texts]
+        vectors = self._lookup(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = await self.underlying.aembed_documents([texts[i] for i in missing])
+            self._store({keys[i]: vector for i, vector in zip(missing, computed)})
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        vector = self._lookup([key])[0]
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            self._store({key: vector})
+        return vector
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries; the uncached ones go to the underlying embeddings as one batch if it supports that."""
+        keys = [self._key("query", text) for text in texts]
+        vectors = self._lookup(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = await embed_queries(self.underlying, [texts[i] for i in missing])
+            self._store({keys[i]: vector for i, vector in zip(missing, computed)})
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return vectors
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "memory_entries": len(self._memory)}
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> List[Optional[List[float]]]:
+        vectors: List[Optional[List[float]]] = []
+        with self._lock:
+            disk_keys = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                elif self._db is not None:
+                    disk_keys.append(key)
+                vectors.append(vector)
+
+            if disk_keys:
+                found = {}
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(disk_keys), 500):
+                    batch = disk_keys[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                    ).fetchall()
+                    found.update((key, np.frombuffer(blob, dtype=np.float32).tolist()) for key, blob in rows)
+                for i, key in enumerate(keys):
+                    if vectors[i] is None and key in found:
+                        vectors[i] = found[key]
+                        self.counters["disk_hits"] += 1
+                        self._remember(key, found[key])
+
+            self.counters["misses"] += sum(vector is None for vector in vectors)
+        return vectors
+
+    def _store(self, computed: Dict[str, List[float]]):
+        with self._lock:
+            for key, vector in computed.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in computed.items()],
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,392 @@
+"""
+Incremental ingestion of alumni profiles into the Qdrant collection.
+
+Every chunk gets a deterministic point ID derived from its profile URL and chunk index, and
+a content hash stored in its payload. A run compares the hashes with what is already in the
+collection, re-embeds and upserts only new or changed chunks in bounded-concurrency batches,
+and deletes points that no longer belong to any chunk (removed profiles, shrunk profiles and
+legacy random-ID points). Running it twice on the same data is a no-op. The precomputed
+per-alumnus summaries in summaries.py are refreshed the same way, by profile content hash.
+A run that changes anything stamps the collection with a new data generation, which backend
+workers watch to drop their cached answers.
+
+Profiles are parsed, chunked and fed to the embedding/upsert batches as a stream
+(profile_stream.py), so peak memory depends on the batch size, not on the number of profiles.
+
+With --delta, the input is instead a delta feed from data/profile_store.py: only the profiles
+it lists as added, changed or removed are touched, and only their points are read back. The
+feed collects every sync since it was last applied, and is deleted once it has been.
+
+Usage (from backend/):
+    python ingest.py --data ../data/raw-profile-data/profile_data.ndjson [--batch-size 64] [--concurrency 4]
+                     [--invalidate-url http://localhost:8000] [--dry-run]
+    python ingest.py --delta ../data/profile_delta.ndjson [--invalidate-url http://localhost:8000]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+
+# Before the local imports, which read their settings (EMBEDDING_DIM, the admission limits) at import
+load_dotenv()
+
+import resources
+import sparse
+from linkedin_urls import normalize_profile_url
+from profile_stream import iter_latest_profiles, iter_profiles
+from resources import COLLECTION_NAME, CONTENT_KEY, METADATA_KEY
+from temporal import duration_bounds
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = "../data/raw-profile-data/profile_data.ndjson"
+
+def _get_with_condition(dictionary, key, condition_values=[None, ""], default="Unknown"):
+    value = dictionary.get(key, default)
+    return default if value in condition_values else value
+
+def profile_id(raw_id):
+    """The id points and summaries are keyed on: the normalized LinkedIn URL, or the raw id if it is not one."""
+    return normalize_profile_url(raw_id) or raw_id
+
+
+def with_profile_ids(profiles):
+    """Yield `profiles` with normalized ids, so a full ingest and a delta from data/profile_store.py key them alike."""
+    for profile in profiles:
+        yield {**profile, "id": profile_id(profile.get("id"))}
+
+
+def latest_profiles(data_path):
+    """
+    The profiles in `data_path` with normalized ids, each id once: a profile listed twice keeps its
+    last copy, so its chunks are numbered once and no stray point IDs are left behind.
+    """
+    return with_profile_ids(iter_latest_profiles(data_path, lambda profile: profile_id(profile.get("id"))))
+
+
+def preprocess_alumni_profile_with_manual_split(data_path):
+    """Split every profile in `data_path` with `split_alumni_profiles`, yielding documents as the profiles are read."""
+    return split_alumni_profiles(latest_profiles(data_path))
+
+def split_alumni_profiles(alumni_profiles):
+    """
+    Create one or more documents for each alumnus JSON profile based on the split, yielding them as the profiles come in.
+    These documents are then stored in a vector store for later retrieval.
+    These documents contain a summary of the alumnus's work experiences and education history with their names, LinkedIn URLs and profile pictures as metadata.
+    Each profile should have the following splits:
+    
+    summary: {page_content: <headline+location+bio>, metadata:{id, pic, name, location, role, company, work_type, work_duration, school, degree, major, school_duration}}
+    each work exp: {page_content: <title+company+work_type+start_date+end_date+location+description>, metadata:{id, pic, name, location, role, company, work_type, work_duration, school, degree, major, school_duration}}
+    each edu hist: {page_content: <school+degree+major+start_date+end_date+description>, metadata:{id, pic, name, role, location, company, work_type, work_duration, school, degree, major, school_duration}}
+    """
+    for alumnus in with_profile_ids(alumni_profiles):
+        # summary
+        id, name, about, headline, location, profile_pic, experiences, educations = _get_with_condition(alumnus, 'id'), _get_with_condition(alumnus, "name"), _get_with_condition(alumnus, "about"), _get_with_condition(alumnus,"headline"), _get_with_condition(alumnus,"location"), _get_with_condition(alumnus,"profile_pic"), _get_with_condition(alumnus,"experiences"), _get_with_condition(alumnus,"educations")
+        summary_line = f"{name} is a {headline} at {location}. {name} self-describes as {about}"
+        summary_doc = Document(page_content=summary_line, metadata={"id":id, "name":name, "profile_pic":profile_pic, "location":location, "role":None, "company":None, "work_type":None, "work_duration":None, "school":None, "degree":None, "major":None, "school_duration":None})
+
+        # work exps
+        work_docs = []
+        for exp in experiences:
+            title, company, work_type, work_location, start, end, description = _get_with_condition(exp, "title"), _get_with_condition(exp, "company"), _get_with_condition(exp, "work_type"), _get_with_condition(exp, "location"), _get_with_condition(exp, "start_date"), _get_with_condition(exp, "end_date"), _get_with_condition(exp, "description")
+            exp_line = f"Name: {name}\nRole: {title}\nCompany: {company}\nWork Type: {work_type}\nLocation: {work_location}\nDuration: {start} to {end}\nDescription: {description}"
+            work_docs.append(Document(page_content=exp_line, metadata={"id":id, "name":name, "profile_pic":profile_pic, "location":work_location, "role":title, "company":company, "work_type":work_type, "work_duration":f"{start} to {end}", "school":None, "degree":None, "major":None, "school_duration":None}))
+
+        # edu hist
+        edu_docs = []                
+        for edu in educations:
+            school, degree, major, start, end, description = _get_with_condition(edu, "school"), _get_with_condition(edu, "degree"), _get_with_condition(edu, "major"), _get_with_condition(edu, "start_date"), _get_with_condition(edu, "end_date"), _get_with_condition(edu, "description")
+            edu_line = f"School: {school}\nDegree: {degree}\nMajor: {major}\nDuration: {start} to {end}\nDescription: {description}"
+            edu_docs.append(Document(page_content=edu_line, metadata={"id":id, "name":name, "profile_pic":profile_pic, "location":None, "role":None, "company":None, "work_type":None, "work_duration":None, "school":school, "degree":degree, "major":major, "school_duration":f"{start} to {end}"}))
+
+        yield summary_doc
+        yield from work_docs
+        yield from edu_docs
+
+
+class Chunk(NamedTuple):
+    point_id: str
+    content_hash: str
+    document: Document
+
+
+def chunk_point_id(profile_url: str, chunk_index: int) -> str:
+    """Deterministic Qdrant point ID for the `chunk_index`-th chunk of a profile."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{profile_url}#{chunk_index}"))
+
+
+def content_hash(document: Document) -> str:
+    payload = json.dumps({"content": document.page_content, "metadata": document.metadata}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def add_time_bounds(document: Document):
+    """Store the chunk's work or school duration as integer month ordinals for range filtering."""
+    bounds = duration_bounds(document.metadata.get("work_duration") or document.metadata.get("school_duration"))
+    if bounds is not None:
+        document.metadata["start_month"], document.metadata["end_month"] = bounds
+
+
+def build_chunks(documents: Iterable[Document]) -> Iterator[Chunk]:
+    """Assign point IDs and content hashes as documents stream in; chunks are numbered per profile in document order."""
+    next_index = {}
+    for document in documents:
+        add_time_bounds(document)
+        profile_url = document.metadata["id"]
+        index = next_index.get(profile_url, 0)
+        next_index[profile_url] = index + 1
+        digest = content_hash(document)
+        document.metadata["content_hash"] = digest
+        yield Chunk(chunk_point_id(profile_url, index), digest, document)
+
+
+async def fetch_existing_hashes(client, profile_ids: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Map every point ID in the collection, or only those of the chunks of `profile_ids`, to its
+    stored content hash (None for legacy points).
+    """
+    from qdrant_client.models import FieldCondition, Filter, MatchAny
+
+    if profile_ids is None:
+        filters = [None]
+    else:
+        filters = [
+            Filter(must=[FieldCondition(key=f"{METADATA_KEY}.id", match=MatchAny(any=profile_ids[i:i + 256]))])
+            for i in range(0, len(profile_ids), 256)
+        ]
+    existing = {}
+    for scroll_filter in filters:
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=scroll_filter,
+                limit=1000,
+                offset=offset,
+                with_payload=[f"{METADATA_KEY}.content_hash"],
+                with_vectors=False,
+            )
+            for point in points:
+                existing[str(point.id)] = ((point.payload or {}).get(METADATA_KEY) or {}).get("content_hash")
+            if offset is None:
+                break
+    return existing
+
+
+async def with_retries(operation, attempts: int = 4, base_delay: float = 1.0):
+    """
+    Run `operation()` (a coroutine factory), retrying with exponential backoff. For Qdrant calls;
+    embedding calls are already retried by the Nomic admission limiter.
+    """
+    for attempt in range(attempts):
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = base_delay * 2 ** attempt
+            logger.warning(f"{e!r}; retrying in {delay:.0f}s ({attempt + 1}/{attempts - 1})")
+            await asyncio.sleep(delay)
+
+
+async def upsert_chunks(client, embeddings, chunks: Iterable[Chunk], batch_size: int, concurrency: int, with_sparse: bool = True):
+    """
+    Embed and upsert `chunks` in batches, with at most `concurrency` batches in flight. Batches
+    are cut from `chunks` only as earlier ones finish, so a chunk generator is read no faster
+    than it is upserted. With `with_sparse`, each point also gets its BM25 keyword vector next
+    to the dense embedding.
+    """
+    from qdrant_client.models import PointStruct
+
+    def point_vector(chunk: Chunk, dense: List[float]):
+        if not with_sparse:
+            return dense
+        return {"": dense, sparse.SPARSE_VECTOR_NAME: sparse.document_vector(chunk.document.page_content)}
+
+    async def process(batch: List[Chunk]):
+        vectors = await embeddings.aembed_documents([chunk.document.page_content for chunk in batch])
+        points = [
+            PointStruct(
+                id=chunk.point_id,
+                vector=point_vector(chunk, vector),
+                payload={CONTENT_KEY: chunk.document.page_content, METADATA_KEY: chunk.document.metadata},
+            )
+            for chunk, vector in zip(batch, vectors)
+        ]
+        await with_retries(lambda: client.upsert(collection_name=COLLECTION_NAME, points=points, wait=True))
+        logger.info(f"Upserted {len(points)} chunks")
+
+    chunks, in_flight = iter(chunks), set()
+    try:
+        while True:
+            while len(in_flight) < concurrency and (batch := list(islice(chunks, batch_size))):
+                in_flight.add(asyncio.ensure_future(process(batch)))
+            if not in_flight:
+                return
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def delete_points(client, point_ids: List[str], batch_size: int):
+    from qdrant_client.models import PointIdsList
+
+    for i in range(0, len(point_ids), batch_size):
+        batch = point_ids[i:i + batch_size]
+        await with_retries(lambda: client.delete(collection_name=COLLECTION_NAME, points_selector=PointIdsList(points=batch), wait=True))
+
+
+async def sync_chunks(client, documents: Iterable[Document], existing: Dict[str, str], batch_size: int, concurrency: int,
+                      dry_run: bool) -> Dict[str, float]:
+    """
+    Upsert the chunks of `documents` whose hashes differ from `existing` (point ID -> stored
+    hash) and delete the points in `existing` that no chunk claims. Returns the counts.
+    """
+    counts = {"chunks": 0, "changed": 0}
+
+    def changed_chunks() -> Iterator[Chunk]:
+        for chunk in build_chunks(documents):
+            counts["chunks"] += 1
+            # Whatever is left in `existing` afterwards belongs to no current chunk
+            if existing.pop(chunk.point_id, None) != chunk.content_hash:
+                counts["changed"] += 1
+                yield chunk
+
+    upsert_seconds = 0.0
+    if dry_run:
+        for _ in changed_chunks():
+            pass
+    else:
+        upsert_start = time.perf_counter()
+        with_sparse = await resources.collection_has_sparse_vectors()
+        await upsert_chunks(client, resources.get_embeddings(), changed_chunks(), batch_size, concurrency, with_sparse)
+        upsert_seconds = time.perf_counter() - upsert_start
+    stale = list(existing)
+    logger.info(f"{counts['chunks']} chunks: {counts['changed']} new or changed, "
+                f"{counts['chunks'] - counts['changed']} unchanged, {len(stale)} to delete")
+    if stale and not dry_run:
+        await delete_points(client, stale, batch_size * 4)
+
+    return {
+        "chunks": counts["chunks"],
+        "upserted": 0 if dry_run else counts["changed"],
+        "unchanged": counts["chunks"] - counts["changed"],
+        "deleted": 0 if dry_run else len(stale),
+        "chunks_per_second": counts["changed"] / upsert_seconds if upsert_seconds else 0.0,
+    }
+
+
+async def ingest(data_path: str, batch_size: int = 64, concurrency: int = 4, dry_run: bool = False) -> Dict[str, float]:
+    """Bring the collection in line with `data_path` and return counts and throughput."""
+    start = time.perf_counter()
+    await resources.ensure_collection()
+    client = resources.get_async_qdrant_client()
+
+    # Only point IDs and hashes are held in memory; profiles and chunks stream from the file
+    existing = await fetch_existing_hashes(client)
+    report = await sync_chunks(client, preprocess_alumni_profile_with_manual_split(data_path), existing, batch_size, concurrency, dry_run)
+
+    summary_report = {"updated": 0, "removed": 0}
+    if not dry_run:
+        summary_report = await asyncio.to_thread(resources.get_summary_store().refresh, latest_profiles(data_path))
+        logger.info(f"Profile summaries: {summary_report['updated']} rebuilt, {summary_report['removed']} removed")
+        await publish_generation(report, summary_report)
+    return {**report, "summaries_updated": summary_report["updated"], "seconds": time.perf_counter() - start}
+
+
+async def ingest_delta(delta_path: str, batch_size: int = 64, concurrency: int = 4, dry_run: bool = False) -> Dict[str, float]:
+    """
+    Apply a delta feed written by data/profile_store.py: re-chunk the added and changed
+    profiles, and delete the chunks and summaries of removed ones. Only the points of the
+    profiles in the feed are read from the collection. Once applied, the feed is deleted
+    unless a sync appended to it in the meantime; applying that again is harmless.
+    """
+    start = time.perf_counter()
+    feed = os.stat(delta_path)
+    await resources.ensure_collection()
+    client = resources.get_async_qdrant_client()
+
+    # Only ids and ops are held in memory; a profile listed twice takes its last entry
+    last_entry = {profile_id(entry["id"]): (position, entry["op"]) for position, entry in enumerate(iter_profiles(delta_path))}
+
+    def current_profiles():
+        for position, entry in enumerate(iter_profiles(delta_path)):
+            if last_entry[profile_id(entry["id"])][0] == position and entry["op"] != "removed":
+                yield from with_profile_ids([entry["profile"]])
+
+    existing = await fetch_existing_hashes(client, list(last_entry))
+    report = await sync_chunks(client, split_alumni_profiles(current_profiles()), existing, batch_size, concurrency, dry_run)
+
+    summary_report = {"updated": 0, "removed": 0}
+    if not dry_run:
+        removed_ids = [profile_id for profile_id, (_, op) in last_entry.items() if op == "removed"]
+        summary_report = await asyncio.to_thread(resources.get_summary_store().update, current_profiles(), removed_ids)
+        logger.info(f"Profile summaries: {summary_report['updated']} rebuilt, {summary_report['removed']} removed")
+        await publish_generation(report, summary_report)
+        remove_applied_feed(delta_path, feed)
+    return {**report, "profiles": len(last_entry), "summaries_updated": summary_report["updated"],
+            "seconds": time.perf_counter() - start}
+
+
+def remove_applied_feed(delta_path: str, applied: os.stat_result):
+    """Delete an applied delta feed, so the next sync starts a new one; keep it if a sync replaced it since."""
+    current = os.stat(delta_path)
+    if (current.st_ino, current.st_size, current.st_mtime_ns) == (applied.st_ino, applied.st_size, applied.st_mtime_ns):
+        os.remove(delta_path)
+    else:
+        logger.info(f"{delta_path} changed while it was applied; kept for the next run")
+
+
+async def publish_generation(report: Dict[str, float], summary_report: Dict[str, int]):
+    """
+    After a sync that changed anything, stamp the collection with a new data generation. Every
+    backend worker polls it and drops its cached answers when it changes.
+    """
+    if report["upserted"] or report["deleted"] or summary_report["updated"] or summary_report["removed"]:
+        generation = await resources.bump_collection_generation()
+        logger.info(f"Collection data generation is now {generation}; backends drop their cached answers")
+
+
+def invalidate_response_cache(base_url: str):
+    """Tell a running backend to drop its cached answers now rather than at its next generation check."""
+    token = os.getenv("CACHE_INVALIDATE_TOKEN")
+    try:
+        httpx.post(f"{base_url}/cache/invalidate", headers={"Authorization": f"Bearer {token}"} if token else None,
+                   timeout=10).raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not invalidate the response cache at {base_url}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=DATA_PATH, help="profile NDJSON (or JSON array) file")
+    parser.add_argument("--delta", help="delta feed from data/profile_store.py to apply instead of --data")
+    parser.add_argument("--batch-size", type=int, default=64, help="chunks per embedding/upsert batch")
+    parser.add_argument("--concurrency", type=int, default=4, help="batches in flight at once")
+    parser.add_argument("--invalidate-url", help="base URL of a backend worker that should drop its response cache at once "
+                                                 "(workers also notice the new data generation on their own)")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.delta:
+        report = asyncio.run(ingest_delta(args.delta, args.batch_size, args.concurrency, args.dry_run))
+    else:
+        report = asyncio.run(ingest(args.data, args.batch_size, args.concurrency, args.dry_run))
+    print(f"{report['chunks']} chunks: {report['upserted']} upserted, {report['unchanged']} unchanged, "
+          f"{report['deleted']} deleted in {report['seconds']:.1f}s ({report['chunks_per_second']:.1f} chunks/sec)")
+    if args.invalidate_url and (report["upserted"] or report["deleted"]):
+        invalidate_response_cache(args.invalidate_url)
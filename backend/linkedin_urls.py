@@ -0,0 +1,36 @@
+'''
+Canonical form of LinkedIn profile URLs, so one profile has one key everywhere.
+
+Profile URLs reach us with or without a trailing slash, query string or fragment, from locale
+and mobile subdomains (de.linkedin.com, m.linkedin.com), in mixed case, and sometimes pointing
+at a sub-page such as /details/experience/. All of them map to
+https://www.linkedin.com/in/<slug>/, with the slug lowercased and percent-encoded the way the
+scraped profile ids already are. Ingestion keys points and summaries on this form, and the
+scripts in data/ use it for their seen-set and profile store.
+
+backend/ and data/ each keep an identical copy of this module, so the data scripts run without
+the backend on their import path; backend/tests/test_shared_modules.py checks the copies match.
+'''
+import re
+from urllib.parse import quote, unquote, urlsplit
+
+CANONICAL_PREFIX = "https://www.linkedin.com/in/"
+
+_HOST = re.compile(r"^(?:[a-z]{2,3}\.|www\.|m\.)?linkedin\.com$")
+
+
+def normalize_profile_url(url):
+    """Canonical form of a LinkedIn profile URL, or None if `url` is not one"""
+    url = (url or "").strip()
+    if not url:
+        return None
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    if not _HOST.match((parts.hostname or "").lower()):
+        return None
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if len(segments) < 2 or segments[0].lower() != "in":
+        return None
+    slug = quote(unquote(segments[1]).lower(), safe="-_.~").lower()
+    return f"{CANONICAL_PREFIX}{slug}/"
@@ -0,0 +1,351 @@
+"""
+In-process vector index that stands in for the Qdrant collection on the retrieval path.
+
+An index directory holds:
+  * vectors.f32    - row-major float32 matrix of L2-normalized dense embeddings, memory-mapped on load;
+  * sparse.npz     - the BM25 keyword vectors as CSR arrays (optional);
+  * payloads.jsonl - the point id and payload of every row;
+  * manifest.json  - row count and dimension.
+Payload fields used by filters and grouping are materialized into NumPy columns on first use.
+
+`LocalIndex.query_points_groups` accepts the subset of `AsyncQdrantClient.query_points_groups`
+that retrieval uses (a dense query, or RRF fusion of dense and sparse prefetches, payload filters
+and group_by) and returns Qdrant's own result models, so `search_documents` does not care which
+backend answers; `query_batch_points` does the same for the batch chat API. Search is exact: a matrix-vector product and argpartition. With `hnsw=True`
+and hnswlib installed, dense candidates come from an HNSW graph instead, for corpora too large
+for a full scan.
+
+Build an index from the Qdrant collection, or straight from the profile data (from backend/):
+    python local_index.py --out local_index
+    python local_index.py --out local_index --data ../data/raw-profile-data/profile_data.ndjson
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from qdrant_client import models
+# qdrant_client.models.QueryResponse is fastembed's; the query API returns the HTTP model
+from qdrant_client.http.models import QueryResponse
+
+# resources reads EMBEDDING_DIM at import, so backend/.env has to be loaded first
+load_dotenv()
+
+import sparse
+from resources import COLLECTION_NAME, CONTENT_KEY, METADATA_KEY
+
+logger = logging.getLogger(__name__)
+
+# Qdrant's default RRF ranking constant, so both backends fuse rankings the same way
+RRF_K = 2
+# Candidates the HNSW path fetches per requested hit, so filters and grouping still fill every group
+HNSW_OVERFETCH = 10
+
+
+def _as_list(conditions) -> list:
+    if conditions is None:
+        return []
+    return conditions if isinstance(conditions, list) else [conditions]
+
+
+def _field_value(payload: Dict[str, Any], key: str) -> Any:
+    value: Any = payload
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class LocalIndex:
+    def __init__(self, ids: List[Any], vectors: np.ndarray, payloads: List[Dict[str, Any]],
+                 sparse_csr: Optional[Dict[str, np.ndarray]] = None, hnsw=None):
+        self.ids = ids
+        self.vectors = vectors
+        self.payloads = payloads
+        self.hnsw = hnsw
+        self._columns: Dict[Tuple[str, str], np.ndarray] = {}
+
+        self.has_sparse_vectors = sparse_csr is not None
+        if sparse_csr is not None:
+            indptr = sparse_csr["indptr"]
+            self._sparse_indices = sparse_csr["indices"]
+            self._sparse_values = sparse_csr["values"]
+            self._sparse_rows = np.repeat(np.arange(len(ids)), np.diff(indptr))
+            # IDF as Qdrant's IDF modifier computes it, from each token's document frequency
+            vocabulary, document_frequency = np.unique(self._sparse_indices, return_counts=True)
+            idf = np.log((len(ids) - document_frequency + 0.5) / (document_frequency + 0.5) + 1)
+            self._sparse_weights = (self._sparse_values * idf[np.searchsorted(vocabulary, self._sparse_indices)]).astype(np.float32)
+
+    @classmethod
+    def load(cls, path: str, hnsw: bool = False) -> "LocalIndex":
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r",
+                            shape=(manifest["count"], manifest["dim"]))
+        ids, payloads = [], []
+        with open(os.path.join(path, "payloads.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                ids.append(record["id"])
+                payloads.append(record["payload"])
+        sparse_path = os.path.join(path, "sparse.npz")
+        sparse_csr = dict(np.load(sparse_path)) if os.path.exists(sparse_path) else None
+        index = cls(ids, vectors, payloads, sparse_csr, _load_hnsw(path, vectors) if hnsw else None)
+        logger.info(f"Loaded local index '{path}': {len(ids)} points, dim {manifest['dim']}, "
+                    f"sparse {'yes' if sparse_csr else 'no'}, hnsw {'yes' if index.hnsw else 'no'}")
+        return index
+
+    @staticmethod
+    def write(path: str, ids: Sequence[Any], vectors: Sequence[Sequence[float]], payloads: Sequence[Dict[str, Any]],
+              sparse_vectors: Optional[Sequence[models.SparseVector]] = None):
+        """Write an index directory; dense vectors are normalized so inner product is cosine similarity."""
+        os.makedirs(path, exist_ok=True)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        matrix.tofile(os.path.join(path, "vectors.f32"))
+        with open(os.path.join(path, "payloads.jsonl"), "w", encoding="utf-8") as f:
+            for point_id, payload in zip(ids, payloads):
+                f.write(json.dumps({"id": point_id, "payload": payload}) + "\n")
+        sparse_path = os.path.join(path, "sparse.npz")
+        if sparse_vectors is not None:
+            np.savez(
+                sparse_path,
+                indptr=np.cumsum([0] + [len(vector.indices) for vector in sparse_vectors]),
+                indices=np.concatenate([np.asarray(vector.indices, dtype=np.uint32) for vector in sparse_vectors]),
+                values=np.concatenate([np.asarray(vector.values, dtype=np.float32) for vector in sparse_vectors]),
+            )
+        elif os.path.exists(sparse_path):
+            os.remove(sparse_path)
+        # A graph built for the previous vectors no longer matches
+        if os.path.exists(os.path.join(path, "hnsw.bin")):
+            os.remove(os.path.join(path, "hnsw.bin"))
+        with open(os.path.join(path, "manifest.json"), "w") as f:
+            json.dump({"count": len(matrix), "dim": int(matrix.shape[1])}, f)
+
+    async def query_points_groups(self, collection_name: str, group_by: str, query=None, prefetch=None,
+                                  query_filter: Optional[models.Filter] = None, limit: int = 10, group_size: int = 3,
+                                  with_payload: bool = True, **kwargs) -> models.GroupsResult:
+        # The scan is NumPy-bound and short; keep it off the event loop all the same
+        return await asyncio.to_thread(self.search_groups, group_by, query, prefetch, query_filter, limit, group_size)
+
+    async def query_batch_points(self, collection_name: str, requests: Sequence[models.QueryRequest], **kwargs) -> List[QueryResponse]:
+        return await asyncio.to_thread(lambda: [self.search_points(request) for request in requests])
+
+    def search_points(self, request: models.QueryRequest) -> QueryResponse:
+        rows, scores = self._search(request.query, request.prefetch, request.filter)
+        return QueryResponse(points=[
+            models.ScoredPoint(id=self.ids[row], version=0, score=score, payload=self.payloads[row])
+            for row, score in zip(rows[:request.limit].tolist(), scores[:request.limit].tolist())
+        ])
+
+    def search_groups(self, group_by: str, query, prefetch, query_filter: Optional[models.Filter],
+                      limit: int, group_size: int) -> models.GroupsResult:
+        rows, scores = self._search(query, prefetch, query_filter)
+        groups: Dict[Any, List[models.ScoredPoint]] = {}
+        group_values = self._keyword_column(group_by)
+        full = 0
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            value = group_values[row]
+            if value is None:
+                continue
+            hits = groups.get(value)
+            if hits is None:
+                if len(groups) >= limit:
+                    continue
+                hits = groups[value] = []
+            if len(hits) < group_size:
+                hits.append(models.ScoredPoint(id=self.ids[row], version=0, score=score, payload=self.payloads[row]))
+                full += len(hits) == group_size
+                if full == limit:
+                    break
+        return models.GroupsResult(groups=[models.PointGroup(id=value, hits=hits) for value, hits in groups.items()])
+
+    def _search(self, query, prefetch, query_filter: Optional[models.Filter]) -> Tuple[np.ndarray, np.ndarray]:
+        """Every row allowed by `query_filter`, best first: by the dense query, or by RRF over the prefetches."""
+        mask = self._filter_mask(query_filter)
+        if isinstance(query, models.FusionQuery):
+            rankings = [
+                self._ranking(candidate.query, candidate.using, mask & self._filter_mask(candidate.filter), candidate.limit)
+                for candidate in _as_list(prefetch)
+            ]
+            return _reciprocal_rank_fusion(rankings)
+        return self._ranking(query, None, mask, None)
+
+    def _ranking(self, query, using: Optional[str], mask: np.ndarray, limit: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows allowed by `mask`, best first, with their scores; all of them when `limit` is None."""
+        if using == sparse.SPARSE_VECTOR_NAME or isinstance(query, models.SparseVector):
+            scores = self._sparse_scores(query)
+            mask = mask & (scores > 0)
+        elif self.hnsw is not None:
+            query = np.asarray(query, dtype=np.float32)
+            k = min(len(self.ids), (limit or 100) * HNSW_OVERFETCH, int(mask.sum()))
+            if k == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            labels, distances = self.hnsw.knn_query(query / np.linalg.norm(query), k=k, filter=lambda label: bool(mask[label]))
+            return labels[0].astype(np.int64), 1 - distances[0]
+        else:
+            query = np.asarray(query, dtype=np.float32)
+            scores = self.vectors @ (query / np.linalg.norm(query))
+
+        rows = np.flatnonzero(mask)
+        if limit is not None and limit < len(rows):
+            rows = rows[np.argpartition(-scores[rows], limit)[:limit]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return rows, scores[rows]
+
+    def _sparse_scores(self, query: models.SparseVector) -> np.ndarray:
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        if not self.has_sparse_vectors or not query.indices:
+            return scores
+        order = np.argsort(query.indices)
+        query_indices = np.asarray(query.indices, dtype=np.uint32)[order]
+        query_values = np.asarray(query.values, dtype=np.float32)[order]
+        hit = np.isin(self._sparse_indices, query_indices)
+        weights = self._sparse_weights[hit] * query_values[np.searchsorted(query_indices, self._sparse_indices[hit])]
+        scores += np.bincount(self._sparse_rows[hit], weights=weights, minlength=len(self.ids)).astype(np.float32)
+        return scores
+
+    def _filter_mask(self, condition) -> np.ndarray:
+        """Evaluate a Qdrant filter (must/should/must_not over match and range conditions) to a row mask."""
+        if condition is None:
+            return np.ones(len(self.ids), dtype=bool)
+        if isinstance(condition, models.Filter):
+            mask = np.ones(len(self.ids), dtype=bool)
+            for child in _as_list(condition.must):
+                mask &= self._filter_mask(child)
+            if condition.should:
+                mask &= np.logical_or.reduce([self._filter_mask(child) for child in _as_list(condition.should)])
+            for child in _as_list(condition.must_not):
+                mask &= ~self._filter_mask(child)
+            return mask
+        if isinstance(condition, models.FieldCondition):
+            if condition.range is not None:
+                column, bounds = self._numeric_column(condition.key), condition.range
+                mask = ~np.isnan(column)
+                for bound, compare in ((bounds.gt, np.greater), (bounds.gte, np.greater_equal),
+                                       (bounds.lt, np.less), (bounds.lte, np.less_equal)):
+                    if bound is not None:
+                        mask &= compare(np.nan_to_num(column), bound)
+                return mask
+            if isinstance(condition.match, models.MatchValue):
+                return self._keyword_column(condition.key) == condition.match.value
+            if isinstance(condition.match, models.MatchAny):
+                return np.isin(self._keyword_column(condition.key), condition.match.any)
+            if isinstance(condition.match, models.MatchExcept):
+                column = self._keyword_column(condition.key)
+                return ~np.isin(column, condition.match.except_) & (column != None)  # noqa: E711
+        raise NotImplementedError(f"LocalIndex does not support the filter condition {condition!r}")
+
+    def _keyword_column(self, key: str) -> np.ndarray:
+        column = self._columns.get(("keyword", key))
+        if column is None:
+            column = np.empty(len(self.payloads), dtype=object)
+            column[:] = [_field_value(payload, key) for payload in self.payloads]
+            self._columns[("keyword", key)] = column
+        return column
+
+    def _numeric_column(self, key: str) -> np.ndarray:
+        column = self._columns.get(("numeric", key))
+        if column is None:
+            values = (_field_value(payload, key) for payload in self.payloads)
+            column = np.array([value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+                               for value in values], dtype=np.float64)
+            self._columns[("numeric", key)] = column
+        return column
+
+
+def _reciprocal_rank_fusion(rankings: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    fused: Dict[int, float] = {}
+    for rows, _ in rankings:
+        for rank, row in enumerate(rows.tolist()):
+            fused[row] = fused.get(row, 0.0) + 1 / (RRF_K + rank)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return np.array([row for row, _ in ordered], dtype=np.int64), np.array([score for _, score in ordered], dtype=np.float32)
+
+
+def _load_hnsw(path: str, vectors: np.ndarray):
+    """Load the HNSW graph saved next to the vectors, building it on first use; None without hnswlib."""
+    try:
+        import hnswlib
+    except ImportError:
+        logger.warning("hnswlib is not installed; the local index uses exact search")
+        return None
+    graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+    graph_path = os.path.join(path, "hnsw.bin")
+    if os.path.exists(graph_path):
+        graph.load_index(graph_path, max_elements=len(vectors))
+    else:
+        graph.init_index(max_elements=len(vectors), ef_construction=200, M=16)
+        graph.add_items(np.asarray(vectors), np.arange(len(vectors)))
+        graph.save_index(graph_path)
+    graph.set_ef(128)
+    return graph
+
+
+async def export_from_qdrant(path: str, batch_size: int = 1024):
+    """Copy every point of the Qdrant collection (vectors and payloads) into a local index at `path`."""
+    import resources
+
+    client = resources.get_async_qdrant_client()
+    ids, vectors, payloads, sparse_vectors = [], [], [], []
+    offset = None
+    while True:
+        points, offset = await client.scroll(COLLECTION_NAME, limit=batch_size, offset=offset, with_payload=True, with_vectors=True)
+        for point in points:
+            vector = point.vector
+            ids.append(str(point.id))
+            payloads.append(point.payload)
+            if isinstance(vector, dict):
+                vectors.append(vector[""])
+                sparse_vectors.append(vector.get(sparse.SPARSE_VECTOR_NAME))
+            else:
+                vectors.append(vector)
+                sparse_vectors.append(None)
+        if offset is None:
+            break
+    # Only keep keyword vectors if every point has one
+    has_sparse = bool(sparse_vectors) and all(vector is not None for vector in sparse_vectors)
+    LocalIndex.write(path, ids, vectors, payloads, sparse_vectors if has_sparse else None)
+    return len(ids)
+
+
+async def build_from_data(data_path: str, path: str, batch_size: int = 256):
+    """Chunk and embed the profile data the way ingest.py does, and write a local index at `path`."""
+    import resources
+    from ingest import build_chunks, preprocess_alumni_profile_with_manual_split
+
+    chunks = list(build_chunks(preprocess_alumni_profile_with_manual_split(data_path)))
+    embeddings = resources.get_embeddings()
+    vectors = []
+    for i in range(0, len(chunks), batch_size):
+        batch = chunks[i:i + batch_size]
+        vectors.extend(await embeddings.aembed_documents([chunk.document.page_content for chunk in batch]))
+    LocalIndex.write(
+        path,
+        [chunk.point_id for chunk in chunks],
+        vectors,
+        [{CONTENT_KEY: chunk.document.page_content, METADATA_KEY: chunk.document.metadata} for chunk in chunks],
+        [sparse.document_vector(chunk.document.page_content) for chunk in chunks],
+    )
+    return len(chunks)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="local_index", help="index directory to write")
+    parser.add_argument("--data", help="build from this profile JSON file instead of exporting the Qdrant collection")
+    args = parser.parse_args()
+
+    if args.data:
+        count = asyncio.run(build_from_data(args.data, args.out))
+    else:
+        count = asyncio.run(export_from_qdrant(args.out))
+    print(f"Wrote {count} points to {args.out}")
@@ -1,41 +1,122 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import aclosing, asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import Annotated, AsyncIterator, List, Optional, Dict, Any
+import asyncio
 import json
 import os
-import getpass
-from IPython.display import Image, display
+import re
+import secrets
+import time
+import uuid
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
 
+# Load environment variables first: admission, metrics and resources read their settings at import
+load_dotenv()
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# LangChain imports
-from langchain.text_splitter import CharacterTextSplitter, RecursiveCharacterTextSplitter
-from langchain.docstore.document import Document
-from langchain_ollama import ChatOllama, OllamaEmbeddings
-from langchain_nomic import NomicEmbeddings
-from langchain_qdrant import QdrantVectorStore
+# LangChain imports. The OpenAI, Nomic and Qdrant clients are imported lazily in resources.py
+from langchain_core.documents import Document
 from langchain_core.tools import tool
-from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
-from langchain.chains import LLMChain
-from langchain_openai import ChatOpenAI
-
-# Qdrant imports
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, models
+from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, ToolMessage, convert_to_messages
+from langchain_core.prompts import ChatPromptTemplate
 
 # LangGraph imports
 from langgraph.graph import MessagesState, StateGraph, END
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import InjectedState, ToolNode, tools_condition
+
+import admission
+import context_packing
+import metrics
+import resources
+import sparse
+import summaries
+import temporal
+from cache import ResponseCache, normalize_message
+from embedding_cache import embed_queries
+from resources import COLLECTION_NAME, CONTENT_KEY, METADATA_KEY
+from router import FastPathRouter, canonical_slots, tense
+from singleflight import SingleFlight
+
+# LangChain API Key
+os.environ.setdefault("LANGSMITH_TRACING", "true")
+for key in ("LANGSMITH_API_KEY", "OPENAI_API_KEY", "NOMIC_API_KEY"):
+    if os.getenv(key) is None:
+        logger.warning(f"{key} is not set")
+
+# Readiness is reported by /ready; the lifespan warm-up flips it once Qdrant answers
+readiness: Dict[str, Any] = {"ready": False, "detail": "starting"}
+
+
+def warm_up_clients():
+    """Build every client, load the search backend and compile the graph. Blocking; run in a worker thread."""
+    resources.get_llm()
+    resources.get_embeddings()
+    resources.get_search_client()
+    resources.get_reranker()
+    get_graph()
+
+
+async def warm_up_search():
+    """Make sure the collection exists (Qdrant backend) and check which vectors searches can use."""
+    if os.getenv("RETRIEVAL_BACKEND", "qdrant") != "local":
+        await resources.ensure_collection()
+    await resources.has_sparse_vectors()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async def warm_up():
+        delay = 1.0
+        while True:
+            try:
+                await asyncio.to_thread(warm_up_clients)
+                await warm_up_search()
+                readiness.update(ready=True, detail="ok")
+                logger.info("Startup warm-up finished")
+                return
+            except Exception as e:
+                # Keep serving (and retrying) instead of crashing when Qdrant is unreachable
+                readiness.update(ready=False, detail=f"warm-up failed: {e}")
+                logger.warning(f"Startup warm-up failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def watch_generation():
+        # Ingestion stamps the collection with a new data generation whenever it changes it
+        seen, checked = None, False
+        while True:
+            await asyncio.sleep(RESPONSE_CACHE_GENERATION_POLL_SECONDS)
+            try:
+                generation = await resources.collection_generation()
+            except Exception as e:
+                logger.warning(f"Could not read the collection's data generation: {e}")
+                continue
+            if checked and generation != seen:
+                response_cache.invalidate()
+                logger.info(f"Collection data generation changed to {generation}; dropped cached responses")
+            seen, checked = generation, True
+
+    tasks = [asyncio.create_task(warm_up())]
+    if os.getenv("RETRIEVAL_BACKEND", "qdrant") != "local" and RESPONSE_CACHE_GENERATION_POLL_SECONDS > 0:
+        tasks.append(asyncio.create_task(watch_generation()))
+    yield
+    for task in tasks:
+        task.cancel()
+    client = resources.peek("async_qdrant_client")
+    if client is not None:
+        await client.close()
+
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -68,202 +149,300 @@ class ChatResponse(BaseModel):
     response: str
     profiles: List[Profile]
 
-# Load environment variables
-load_dotenv()
-
-# LangChain API Key
-os.environ["LANGSMITH_TRACING"] = "true"
-os.environ["LANGSMITH_API_KEY"] = os.getenv("LANGSMITH_API_KEY")
-
-if "OPENAI_API_KEY" not in os.environ:
-    os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
-
-# Nomic Embeddings API Key
-os.environ["NOMIC_API_KEY"] = os.getenv("NOMIC_API_KEY")
-
-# OpenAI model, requires API key
-llm = ChatOpenAI(model="gpt-4o-mini-2024-07-18", temperature=0)
-# Ensure the response is in JSON format
-llm = llm.bind(response_format={"type": "json_object"}) 
-
-embeddings = NomicEmbeddings(model="nomic-embed-text-v1.5")
-
-REUSE_COLLECTION = True
-
-# Initialize Qdrant client with environment variables
-qdrant_client = QdrantClient(
-    url=os.getenv("QDRANT_URL"),
-    api_key=os.getenv("QDRANT_API_KEY")
-)
-
-collection_name = "user_profile_collection_with_ollama"
-
-collections = qdrant_client.get_collections()
-if collection_name not in [collection.name for collection in collections.collections]:
-    qdrant_client.create_collection(
-        collection_name=collection_name,
-        vectors_config=VectorParams(
-            size=768, 
-            distance=Distance.COSINE 
-        )
-    )
-    print(f"Collection '{collection_name}' created successfully!")
-
-vector_store = QdrantVectorStore(
-    client=qdrant_client,
-    collection_name=collection_name,
-    embedding=embeddings
+# Full-response cache in front of the graph; see ResponseCache for the two tiers. Each worker
+# drops it when the collection's data generation changes, checked this often
+RESPONSE_CACHE_GENERATION_POLL_SECONDS = float(os.getenv("RESPONSE_CACHE_GENERATION_POLL_SECONDS", "30"))
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+    similarity_threshold=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.97")),
 )
+# Concurrent identical messages (same normalized text) share one in-flight answer, per endpoint
+chat_flights = SingleFlight()
+stream_flights = SingleFlight()
 
-DATA_PATH = "../data/raw-profile-data/profile_data.json"
-
-def _get_with_condition(dictionary, key, condition_values=[None, ""], default="Unknown"):
-    value = dictionary.get(key, default)
-    return default if value in condition_values else value
-
-def preprocess_alumni_profile(data_path):
-    """
-    Create one document for each alumnus JSON profile, and return a list of documents.
-    These documents are then stored in a vector store for later retrieval.
-    These documents contain a summary of the alumnus's work experiences and education history with their names, LinkedIn URLs and profile pictures as metadata.
-    """
-    with open(data_path, 'r') as f:
-        alumni_profiles = json.load(f)
-        documents = []
-        for alumnus in alumni_profiles:
-            companies = set()
-            id, name, about, headline, location, profile_pic, experiences, educations = _get_with_condition(alumnus, 'id'), _get_with_condition(alumnus, "name"), _get_with_condition(alumnus, "about"), _get_with_condition(alumnus,"headline"), _get_with_condition(alumnus,"location"), _get_with_condition(alumnus,"profile_pic"), _get_with_condition(alumnus,"experiences"), _get_with_condition(alumnus,"educations")
-            intro_line = f"{name} is a {headline} at {location}. {name} self-describes as {about}."
-            exp_lines, edu_lines = [f"{name}'s work experiences are as follows:"], [f"{name}'s education history is as follows:"]
-            for idx, exp in enumerate(experiences):
-                title, company, work_type, location, start, end, description = _get_with_condition(exp, "title"), _get_with_condition(exp, "company"), _get_with_condition(exp, "work_type"), _get_with_condition(exp, "location"), _get_with_condition(exp, "start_date"), _get_with_condition(exp, "end_date"), _get_with_condition(exp, "description")
-                exp_lines.append(f"{idx+1}. Role: {title}\nCompany: {company}\nWork Type: {work_type}\nLocation: {location}\nDuration: {start} to {end}\nDescription: {description}")
-                companies.add(company)
-            for idx, edu in enumerate(educations):
-                school, degree, major, start, end, description = _get_with_condition(edu, "school"), _get_with_condition(edu, "degree"), _get_with_condition(edu, "major"), _get_with_condition(edu, "start_date"), _get_with_condition(edu, "end_date"), _get_with_condition(edu, "description")
-                edu_lines.append(f"{idx+1}. School: {school}\nDegree: {degree}\nMajor: {major}\nDuration: {start} to {end}\nDescription: {description}")
-
-            alumnus_profile_summary = f"{intro_line}\n\n" + "\n".join(exp_lines) + "\n\n" + "\n".join(edu_lines)
-            doc = Document(page_content=alumnus_profile_summary, metadata={"id": id, "name": name, "profile_pic": profile_pic, "companies": list(companies)})
-            documents.append(doc)
-        return documents
-    
-def preprocess_alumni_profile_with_manual_split(data_path):
-    """
-    Create one or more documents for each alumnus JSON profile based on the split, and return a list of documents.
-    These documents are then stored in a vector store for later retrieval.
-    These documents contain a summary of the alumnus's work experiences and education history with their names, LinkedIn URLs and profile pictures as metadata.
-    Each profile should have the following splits:
-    
-    summary: {page_content: <headline+location+bio>, metadata:{id, pic, name, location, role, company, work_type, work_duration, school, degree, major, school_duration}}
-    each work exp: {page_content: <title+company+work_type+start_date+end_date+location+description>, metadata:{id, pic, name, location, role, company, work_type, work_duration, school, degree, major, school_duration}}
-    each edu hist: {page_content: <school+degree+major+start_date+end_date+description>, metadata:{id, pic, name, role, location, company, work_type, work_duration, school, degree, major, school_duration}}
-    """
-    with open(data_path, 'r') as f:
-        alumni_profiles = json.load(f)
-        documents = []
-        for alumnus in alumni_profiles:
-            # summary
-            id, name, about, headline, location, profile_pic, experiences, educations = _get_with_condition(alumnus, 'id'), _get_with_condition(alumnus, "name"), _get_with_condition(alumnus, "about"), _get_with_condition(alumnus,"headline"), _get_with_condition(alumnus,"location"), _get_with_condition(alumnus,"profile_pic"), _get_with_condition(alumnus,"experiences"), _get_with_condition(alumnus,"educations")
-            summary_line = f"{name} is a {headline} at {location}. {name} self-describes as {about}"
-            summary_doc = Document(page_content=summary_line, metadata={"id":id, "name":name, "profile_pic":profile_pic, "location":location, "role":None, "company":None, "work_type":None, "work_duration":None, "school":None, "degree":None, "major":None, "school_duration":None})
-
-            # work exps
-            work_docs = []
-            for exp in experiences:
-                title, company, work_type, work_location, start, end, description = _get_with_condition(exp, "title"), _get_with_condition(exp, "company"), _get_with_condition(exp, "work_type"), _get_with_condition(exp, "location"), _get_with_condition(exp, "start_date"), _get_with_condition(exp, "end_date"), _get_with_condition(exp, "description")
-                exp_line = f"Name: {name}\nRole: {title}\nCompany: {company}\nWork Type: {work_type}\nLocation: {work_location}\nDuration: {start} to {end}\nDescription: {description}"
-                work_docs.append(Document(page_content=exp_line, metadata={"id":id, "name":name, "profile_pic":profile_pic, "location":work_location, "role":title, "company":company, "work_type":work_type, "work_duration":f"{start} to {end}", "school":None, "degree":None, "major":None, "school_duration":None}))
-
-            # edu hist
-            edu_docs = []                
-            for edu in educations:
-                school, degree, major, start, end, description = _get_with_condition(edu, "school"), _get_with_condition(edu, "degree"), _get_with_condition(edu, "major"), _get_with_condition(edu, "start_date"), _get_with_condition(edu, "end_date"), _get_with_condition(edu, "description")
-                edu_line = f"School: {school}\nDegree: {degree}\nMajor: {major}\nDuration: {start} to {end}\nDescription: {description}"
-                edu_docs.append(Document(page_content=edu_line, metadata={"id":id, "name":name, "profile_pic":profile_pic, "location":None, "role":None, "company":None, "work_type":None, "work_duration":None, "school":school, "degree":degree, "major":major, "school_duration":f"{start} to {end}"}))
-
-            documents.extend([summary_doc] + work_docs + edu_docs)
-        return documents
-
-if not REUSE_COLLECTION:
-    docs = preprocess_alumni_profile_with_manual_split(DATA_PATH)
-    print(docs[0])
-    print(docs[1])
-    vector_store.add_documents(documents=docs)
-
-
-
-graph_builder = StateGraph(MessagesState)
-
-
-def extract_search_parameters(query: str):
+async def extract_search_parameters(query: str):
     """Use LLM to extract search parameters from a user query."""
     
     system_message = """
     You are an intelligent assistant that extracts useful parameters from user queries into a JSON object.
-    Your task is to identify any people names, companies, titles, locations, and duration time mentioned in the user query, and return a JSON object with the extracted information.
+    Your task is to identify any people names, companies, titles, locations, and skills mentioned in the user query, and return a JSON object with the extracted information.
     You MUST return an empty array [] as values if you can not find any information for the parameters.
     
     Return your response in the following format:
-    {{names: [...], companies: [...], titles: [...], locations: [...], duration: [...], skills: [...]}}
-
-    For the duration parameter, if it is present tense, add 'Present' to the parameter.
-    <start_date to end_date> pair should ONLY take one entry in the duration parameter.
-    You MUST also expand any short forms of months into the full month name.
+    {{names: [...], companies: [...], titles: [...], locations: [...], skills: [...]}}
     
     Example:
     Query: "Who works at Google as a Data Analyst with AWS experience?"
     Response:
-    {{names: [], companies: ["Google"], titles: ["Data Analyst"], locations: [], duration: [], skills: ["AWS"]}}
+    {{names: [], companies: ["Google"], titles: ["Data Analyst"], locations: [], skills: ["AWS"]}}
     
     Query: "Yihao Mai's experience at IBM"
     Response:
-    {{names: ["Yihao Mai"], companies: ["IBM"], titles: [], locations: [], duration: [], skills: []}}
+    {{names: ["Yihao Mai"], companies: ["IBM"], titles: [], locations: [], skills: []}}
     
     Query: "Who worked at Amazon as a Software Engineer intern in May 2025"
     Response:
-    {{names: [], companies: ["Amazon"], titles: ["Software Engineer"], locations: [], duration: ["May 2025"]}}
+    {{names: [], companies: ["Amazon"], titles: ["Software Engineer"], locations: [], skills: []}}
     """
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_message),
         ("human", "Extract search parameters from the following query: {query}")
     ])
     
-    response = llm.invoke(prompt.format_messages(query=query))
+    with metrics.stage("extract_search_parameters"):
+        response = await admission.OPENAI.run(lambda: resources.get_llm().ainvoke(prompt.format_messages(query=query)))
+    metrics.record_llm_usage("extract_search_parameters", response)
     
-    content = json.loads(response.content)
-    print(f"Parsed search parameters: {content}")
+    try:
+        content = json.loads(response.content)
+    except json.JSONDecodeError:
+        logger.warning(f"Could not parse search parameters: {response.content}")
+        return {}
+    metrics.log_event(logger, logging.DEBUG, "search_parameters", query=query, parameters=content)
     return content
 
 
+# Which extracted search parameter is checked against which chunk metadata field. Skills have no
+# field of their own and are only looked for in the chunk text; the time period is not extracted
+# here, since retrieval already filters chunks by the message's time window (temporal.py)
+SEARCH_PARAMETER_FIELDS = {
+    "names": "name",
+    "companies": "company",
+    "titles": "role",
+    "locations": "location",
+    "skills": None,
+}
+
+# How many extra alumni a dense-only search fetches so the parameter merge has something to promote;
+# hybrid search already ranks exact name/company matches in, so it fetches just the k it needs
+SEARCH_OVERFETCH = 2
+# Chunks each ranking contributes to fusion, relative to the chunks the groups can hold
+HYBRID_PREFETCH_FACTOR = 2
+
+# Retrieval returns up to RETRIEVAL_MAX_PROFILES distinct alumni, each with their best
+# RETRIEVAL_CHUNKS_PER_PROFILE chunks merged
+RETRIEVAL_MAX_PROFILES = int(os.getenv("RETRIEVAL_MAX_PROFILES", "8"))
+RETRIEVAL_CHUNKS_PER_PROFILE = int(os.getenv("RETRIEVAL_CHUNKS_PER_PROFILE", "3"))
+# With a reranker (RERANK_MODEL), retrieval over-fetches RERANK_CANDIDATES alumni and the
+# cross-encoder keeps the best RERANK_TOP_N for generate
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "5"))
+
+
+async def timed(stage: str, timings: Dict[str, float], awaitable):
+    """Await `awaitable` and record its wall time in seconds under `stage`."""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def merge_profile_chunks(hits) -> Document:
+    """Merge one alumnus' retrieved chunks (best first) into a single Document."""
+    best = hits[0]
+    metadata = dict(best.payload.get(METADATA_KEY) or {})
+    metadata.update(score=best.score, chunk_count=len(hits))
+    return Document(
+        page_content="\n\n".join(hit.payload.get(CONTENT_KEY, "") for hit in hits),
+        metadata=metadata,
+    )
+
+
+async def search_documents(query: str, limit: int = RETRIEVAL_MAX_PROFILES, chunks_per_profile: int = RETRIEVAL_CHUNKS_PER_PROFILE,
+                           query_filter=None, timings: Optional[Dict[str, float]] = None) -> List[Document]:
+    """
+    Embed the query and search Qdrant without blocking the event loop, grouping hits by alumnus.
+    Returns up to `limit` Documents, one per distinct alumnus, ordered by their best chunk's score;
+    each merges that alumnus' top `chunks_per_profile` chunks and keeps the best chunk's metadata.
+    `query_filter` is an optional Qdrant payload filter applied to the chunks.
+
+    When the collection has sparse keyword vectors, the dense and BM25 rankings are fused with
+    reciprocal rank fusion in the same request, so exact names and companies surface even when
+    their cosine similarity is unremarkable; scores are then RRF scores rather than cosine.
+    """
+    timings = {} if timings is None else timings
+    hybrid = await resources.has_sparse_vectors()
+    query_vector = await timed("embed", timings, resources.get_embeddings().aembed_query(query))
+    result = await timed("search", timings, resources.get_search_client().query_points_groups(
+        **search_arguments(query, query_vector, limit, chunks_per_profile, query_filter, hybrid)
+    ))
+    return [merge_profile_chunks(group.hits) for group in result.groups if group.hits]
+
+
+def search_arguments(query: str, query_vector: List[float], limit: int, chunks_per_profile: int,
+                     query_filter, hybrid: bool) -> Dict[str, Any]:
+    """Keyword arguments of the grouped `query_points_groups` call that search_documents makes."""
+    from qdrant_client.models import Fusion, FusionQuery, Prefetch
+
+    # Quantization rescoring and HNSW beam width apply to the dense search
+    params = resources.get_collection_options().search_params()
+    search = dict(query=query_vector, search_params=params)
+    if hybrid:
+        # Each ranking contributes enough chunks to fill every group before fusion
+        prefetch_limit = limit * chunks_per_profile * HYBRID_PREFETCH_FACTOR
+        search = dict(
+            prefetch=[
+                Prefetch(query=query_vector, filter=query_filter, limit=prefetch_limit, params=params),
+                Prefetch(query=sparse.query_vector(query), using=sparse.SPARSE_VECTOR_NAME, filter=query_filter, limit=prefetch_limit),
+            ],
+            query=FusionQuery(fusion=Fusion.RRF),
+        )
+    return dict(
+        collection_name=COLLECTION_NAME,
+        group_by=f"{METADATA_KEY}.id",
+        limit=limit,
+        group_size=chunks_per_profile,
+        query_filter=query_filter,
+        with_payload=True,
+        **search,
+    )
+
+
+async def search_documents_batch(queries: List[str], limits: List[int], query_filters: List[Any],
+                                 chunks_per_profile: int = RETRIEVAL_CHUNKS_PER_PROFILE) -> List[List[Document]]:
+    """
+    search_documents for many queries at once: one batched query-embedding request and one
+    `query_batch_points` call. The batch API has no group_by, so each request fetches enough
+    chunks to fill its groups and they are grouped by alumnus here.
+    """
+    from qdrant_client.models import QueryRequest
+
+    hybrid = await resources.has_sparse_vectors()
+    with metrics.stage("batch_embed"):
+        vectors = await embed_queries(resources.get_embeddings(), queries)
+    requests = []
+    for query, vector, limit, query_filter in zip(queries, vectors, limits, query_filters):
+        arguments = search_arguments(query, vector, limit, chunks_per_profile, query_filter, hybrid)
+        requests.append(QueryRequest(
+            query=arguments["query"], prefetch=arguments.get("prefetch"), filter=query_filter, params=arguments.get("search_params"),
+            limit=limit * chunks_per_profile * HYBRID_PREFETCH_FACTOR, with_payload=True,
+        ))
+    with metrics.stage("batch_search"):
+        responses = await resources.get_search_client().query_batch_points(collection_name=COLLECTION_NAME, requests=requests)
+    return [group_documents(response.points, limit, chunks_per_profile) for response, limit in zip(responses, limits)]
+
+
+def group_documents(points, limit: int, chunks_per_profile: int) -> List[Document]:
+    """Group ranked chunks by alumnus like `group_by` does: the first `limit` alumni, each with their best chunks."""
+    groups: Dict[Any, list] = {}
+    for point in points:
+        profile_id = ((point.payload or {}).get(METADATA_KEY) or {}).get("id")
+        if profile_id is None:
+            continue
+        hits = groups.get(profile_id)
+        if hits is None:
+            if len(groups) >= limit:
+                continue
+            hits = groups[profile_id] = []
+        if len(hits) < chunks_per_profile:
+            hits.append(point)
+    return [merge_profile_chunks(hits) for hits in groups.values()]
+
+
+def merge_search_parameters(docs: List[Document], params: Dict[str, Any], k: int) -> List[Document]:
+    """
+    Promote alumni whose chunks match the extracted search parameters (case-insensitive substring match
+    against the best chunk's metadata and the merged chunk text) and keep the top k. Ties keep their
+    vector-similarity order, so with no parameters this is a plain cut.
+    """
+    wanted = {}
+    for param, field in SEARCH_PARAMETER_FIELDS.items():
+        values = params.get(param) if isinstance(params, dict) else None
+        if isinstance(values, str):
+            values = [values]
+        wanted[field] = [str(value).lower() for value in values or [] if value]
+
+    def matches(doc: Document) -> int:
+        text = doc.page_content.lower()
+        count = 0
+        for field, values in wanted.items():
+            value = str(doc.metadata.get(field) or "").lower() if field else ""
+            if any(v in value or v in text for v in values):
+                count += 1
+        return count
+
+    for doc in docs:
+        doc.metadata["parameter_matches"] = matches(doc)
+    return sorted(docs, key=lambda doc: doc.metadata["parameter_matches"], reverse=True)[:k]
+
+
+def user_message(messages) -> str:
+    """The text of the latest user message, which the time period is read from."""
+    for message in reversed(messages):
+        if message.type == "human":
+            return message.content
+    return ""
+
+
+def retrieval_plan(message: str):
+    """
+    (alumni to keep, alumni to search for, payload filter) for a retrieve call. With a reranker
+    the search over-fetches RERANK_CANDIDATES; only chunks active during the time period of the
+    user's `message` are searched. The period comes from the message rather than the rewritten
+    query, whose "presently works" may only be the rewrite's default tense.
+    """
+    reranker = resources.get_reranker()
+    k = RERANK_CANDIDATES if reranker else RETRIEVAL_MAX_PROFILES
+    limit = k if reranker or resources.peek("has_sparse_vectors") else k * SEARCH_OVERFETCH
+    window = temporal.time_window(message)
+    return k, limit, temporal.build_time_filter(window, METADATA_KEY) if window else None
+
 
 @tool(response_format="content_and_artifact")
-def retrieve(query: str):
+async def retrieve(query: str, state: Annotated[dict, InjectedState]):
     """Retrieve information related to a query."""
-    
-    # Extract parameters from the query
-    params = extract_search_parameters(query)
-    
-    retrieved_docs = vector_store.similarity_search(query, k=15)
+    with metrics.stage("retrieve"):
+        k, limit, query_filter = retrieval_plan(user_message(state["messages"]))
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        # Parameter extraction runs alongside the embedding and vector search instead of in front of them
+        params, candidates = await asyncio.gather(
+            timed("extract_parameters", timings, extract_search_parameters(query)),
+            search_documents(query, limit=limit, query_filter=query_filter, timings=timings),
+        )
+        retrieved_docs = merge_search_parameters(candidates, params, k)
 
+        for step in ("embed", "search"):
+            metrics.observe_stage(step, timings[step])
+        timings["total"] = time.perf_counter() - start
+        serial = timings["extract_parameters"] + timings["embed"] + timings["search"]
+        metrics.log_event(logger, logging.DEBUG, "retrieve_latency",
+                          **{f"{step}_ms": round(seconds * 1000) for step, seconds in timings.items()},
+                          serial_ms=round(serial * 1000), saved_ms=round((serial - timings["total"]) * 1000))
+
+        return serialize_documents(retrieved_docs), retrieved_docs
+
+
+def serialize_documents(docs: List[Document]) -> str:
+    """Text of a retrieve tool message."""
+    if not docs:
+        return "No matching alumni profiles found."
     serialized = []
-    for idx, doc in enumerate(retrieved_docs):
-        page_content, metadata = doc.page_content, doc.metadata
-        id, name, pic, location, role, company, work_type, work_duration, school, degree, major, school_duration = metadata['id'], metadata['name'], metadata['profile_pic'], metadata['location'], metadata['role'], metadata['company'], metadata['work_type'], metadata['work_duration'], metadata['school'], metadata['degree'], metadata['major'], metadata['school_duration']    
-        content = f"{idx+1}. Content: {page_content}\nId: {id}\nName: {name}\nProfile Pic: {pic}"
-        serialized.append(content)
-        serialized.append("\n\n")
-    
-    serialized = "".join(serialized)
-    
-    if not retrieved_docs:
-        return "No matching alumni profiles found.", []
-    
-    return serialized, retrieved_docs
+    for idx, doc in enumerate(docs):
+        metadata = doc.metadata
+        serialized.append(f"{idx+1}. Content: {doc.page_content}\nId: {metadata.get('id')}\nName: {metadata.get('name')}\nProfile Pic: {metadata.get('profile_pic')}\n\n")
+    return "".join(serialized)
+
+
+query_router = FastPathRouter()
+# Tool call ids of queries the router sent straight to retrieve
+FAST_PATH_PREFIX = "fast_path_"
+
+
+def route_query(state: MessagesState):
+    """Send plain search queries straight to the retrieve tool with a templated canonical query."""
+    canonical_query = query_router.route(state["messages"][-1].content)
+    if canonical_query is None:
+        return {"messages": []}
+    tool_call = {"name": retrieve.name, "args": {"query": canonical_query}, "id": f"{FAST_PATH_PREFIX}{uuid.uuid4().hex}"}
+    return {"messages": [AIMessage(content="", tool_calls=[tool_call])]}
 
 
 CURR_MONTH_YEAR = datetime.now().strftime("%B %Y")
-def query_or_respond(state: MessagesState):
+async def query_or_respond(state: MessagesState):
     """Generate tool call for retrieval or respond."""
 
     # Rewrite the user query into one of the following canonical forms based on its intended temporal context.
@@ -328,30 +507,112 @@ def query_or_respond(state: MessagesState):
 )
 
     messages = [system_message] + state["messages"]
-    llm_with_tools = llm.bind_tools([retrieve]) # Only tells the model there's an available tool to use. The model will decide whether to use it depending on the input message
-    response = llm_with_tools.invoke(messages)
+    # Only tells the model there's an available tool to use. The model will decide whether to use it depending on the input message
+    llm_with_tools = resources.lazy("llm_with_tools", lambda: resources.get_llm().bind_tools([retrieve]))
+    start = time.perf_counter()
+    with metrics.stage("query_or_respond"):
+        response = await admission.OPENAI.run(lambda: llm_with_tools.ainvoke(messages))
+    query_router.record_llm_latency(time.perf_counter() - start)
+    metrics.record_llm_usage("query_or_respond", response)
     return {"messages": [response]}
 
 
-# Step 2: Execute the retrieval.
-tools = ToolNode([retrieve])
+# The generate prompt only sees packed context: at most PROMPT_TOKEN_BUDGET tokens, with
+# descriptions cut to PROMPT_DESCRIPTION_CHARS characters
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+PROMPT_DESCRIPTION_CHARS = int(os.getenv("PROMPT_DESCRIPTION_CHARS", "300"))
 
+packing_stats = {"requests": 0, "raw_tokens": 0, "packed_tokens": 0, "tokens_saved": 0}
+# Answers assembled from precomputed summaries vs. generated by the LLM
+answer_stats = {"assembled": 0, "generated": 0}
 
-# Step 3: Generate a response using the retrieved content.
-def generate(state: MessagesState):
-    """Generate answer."""
-    # Get generated ToolMessages
-    recent_tool_messages = []
-    for message in reversed(state["messages"]):
+
+class ChatState(MessagesState):
+    # DOCUMENT block for generate, built by pack_context from the retrieved alumni
+    context: str
+    # alumni included in `context`, in prompt order
+    context_docs: List[Document]
+
+
+def recent_tool_messages(messages):
+    """Return the ToolMessages produced by the most recent tools step."""
+    recent = []
+    for message in reversed(messages):
         if message.type == "tool":
-            recent_tool_messages.append(message)
+            recent.append(message)
         else:
             break
-    tool_messages = recent_tool_messages[::-1]
+    return recent[::-1]
+
+
+def last_retrieve_call(messages) -> Optional[Dict[str, Any]]:
+    """Return the most recent retrieve tool call, whose query is the canonical rewrite."""
+    for message in reversed(messages):
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            if tool_call["name"] == retrieve.name:
+                return tool_call
+    return None
+
+
+async def rerank_candidates(state: ChatState):
+    """Keep the RERANK_TOP_N best over-fetched alumni of each retrieve call, scored by the cross-encoder."""
+    reranker = resources.get_reranker()
+    tool_messages = recent_tool_messages(state["messages"])
+    if reranker is None or not tool_messages:
+        return {"messages": []}
+
+    queries = {
+        tool_call["id"]: tool_call["args"].get("query", "")
+        for message in state["messages"] for tool_call in getattr(message, "tool_calls", None) or []
+    }
+    reranked = []
+    for message in tool_messages:
+        if not message.artifact:
+            continue
+        start = time.perf_counter()
+        with metrics.stage("rerank"):
+            docs = await reranker.rerank(queries.get(message.tool_call_id, ""), message.artifact, RERANK_TOP_N)
+        metrics.log_event(logger, logging.DEBUG, "rerank", candidates=len(message.artifact), kept=len(docs),
+                          ms=round((time.perf_counter() - start) * 1000))
+        # Same message id, so the state keeps the reranked message in place of the original
+        reranked.append(message.model_copy(update={"artifact": docs, "content": serialize_documents(docs)}))
+    return {"messages": reranked}
+
+
+def pack_context(state: ChatState):
+    """Fit the retrieved alumni into the generate prompt budget and report the tokens saved."""
+    tool_messages = recent_tool_messages(state["messages"])
+    docs = [doc for message in tool_messages for doc in message.artifact or []]
+    packed = context_packing.pack_context(docs, PROMPT_TOKEN_BUDGET, PROMPT_DESCRIPTION_CHARS)
+
+    # What the prompt used to contain: every tool message verbatim
+    raw_tokens = context_packing.count_tokens("\n\n".join(message.content for message in tool_messages))
+    saved = max(raw_tokens - packed.tokens, 0)
+    packing_stats["requests"] += 1
+    packing_stats["raw_tokens"] += raw_tokens
+    packing_stats["packed_tokens"] += packed.tokens
+    packing_stats["tokens_saved"] += saved
+    metrics.log_event(logger, logging.DEBUG, "context_packing", alumni=len(packed.docs), retrieved=len(docs),
+                      raw_tokens=raw_tokens, packed_tokens=packed.tokens, tokens_saved=saved)
+    return {"context": packed.text, "context_docs": packed.docs}
 
-    # Format into prompt
-    docs_content = "\n\n".join(doc.content for doc in tool_messages)
-    
+
+# Step 3: Generate a response using the retrieved content.
+async def generate(state: ChatState):
+    """Generate answer."""
+    # Plain lookups the router canonicalized are answered from the precomputed summaries;
+    # the LLM only sees questions that need it, or lookups the summaries cannot answer
+    retrieve_call = last_retrieve_call(state["messages"])
+    if retrieve_call and retrieve_call["id"].startswith(FAST_PATH_PREFIX) and state.get("context_docs"):
+        answer = await asyncio.to_thread(
+            summaries.assemble_answer, state["context_docs"], canonical_slots(retrieve_call["args"]["query"]), resources.get_summary_store(),
+        )
+        if answer is not None:
+            answer_stats["assembled"] += 1
+            return {"messages": [AIMessage(content=answer)]}
+    answer_stats["generated"] += 1
+
+    docs_content = state.get("context") or "\n\n".join(message.content for message in recent_tool_messages(state["messages"]))
 
     conversation_messages = [
         message
@@ -359,6 +620,17 @@ def generate(state: MessagesState):
         if message.type in ("human", "system")
         or (message.type == "ai" and not message.tool_calls)
     ]
+
+    # Retrieval already dropped experiences outside the query's time period, so the date rules are
+    # only spelled out when no window could be extracted
+    window = temporal.time_window(user_message(state["messages"]))
+    if window:
+        time_instructions = f"• Every experience in the DOCUMENT is already known to be active during {temporal.describe_window(window)}."
+    else:
+        time_instructions = """• Treat any duration whose end date is the literal word "Present"/"Unknown" as ongoing on TODAY.
+        • If a question asks about current / present / now, USE ONLY documents whose end date is "Present" or "Unknown".
+        • If a question asks "as of <year>" or "after <month year>", include only docs active on that date:
+            A document duration (<start> to <end>) is active on DATE if <start> ≤ DATE ≤ <end> (or <end> == "Present" or "Unknown")."""
     
     # Create a static system message for instructing behavior.
     system_message = SystemMessage(
@@ -375,19 +647,15 @@ def generate(state: MessagesState):
         • Do not include any information not present in the DOCUMENT.
         • You MUST scan through the entire DOCUMENT list and use all documents that can be helpful to answer the QUESTION.
         • If the DOCUMENT does not contain the facts needed to answer the question, return an empty list [].
-        • Treat any duration whose end date is the literal word "Present"/"Unknown" as ongoing on TODAY.
-        • If a question asks about current / present / now, USE ONLY documents whose end date is "Present" or "Unknown".
-        • If a question asks "as of <year>" or "after <month year>", include only docs active on that date:
-            A document duration (<start> to <end>) is active on DATE if <start> ≤ DATE ≤ <end> (or <end> == "Present" or "Unknown").
+        {time_instructions}
         • You MUST return your answer in a JSON object, containing a 'alumni' key, which is a list of JSON objects, and each object contains: 
-            1. name: the alumnus's name, 
-            2. id: the alumnus's id, 
-            3. pic: the alumnus's profile picture URL
-            4. summary: summary of alumnus experience using the information from the DOCUMENT.
+            1. ref: the number in square brackets before the alumnus's name in the DOCUMENT,
+            2. name: the alumnus's name,
+            3. summary: summary of alumnus experience using the information from the DOCUMENT.
             Example:
             {{
                 "alumni": [
-                    {{"name": "John Doe", "id": "1234567890", "pic": "https://example.com/pic.jpg", "summary": "John Doe is a software engineer at Google."}}
+                    {{"ref": 1, "name": "John Doe", "summary": "John Doe is a software engineer at Google."}}
                 ]
             }}
         
@@ -403,70 +671,592 @@ def generate(state: MessagesState):
     prompt = [system_message, human_message]
  
     # Run
-    response = llm.invoke(prompt)
-
+    with metrics.stage("generate"):
+        response = await admission.OPENAI.run(lambda: resources.get_llm().ainvoke(prompt))
+    metrics.record_llm_usage("generate", response)
 
+    # Ids and profile pictures were left out of the prompt; put them back from metadata
+    if state.get("context_docs"):
+        response = response.model_copy(update={"content": context_packing.reattach_profile_fields(response.content, state["context_docs"])})
     return {"messages": [response]}
 
 
-graph_builder.add_node(query_or_respond)
-graph_builder.add_node(tools)
-graph_builder.add_node(generate)
+def build_graph():
+    graph_builder = StateGraph(ChatState)
+    graph_builder.add_node(route_query)
+    graph_builder.add_node(query_or_respond)
+    # Step 2: Execute the retrieval.
+    graph_builder.add_node("tools", ToolNode([retrieve]))
+    graph_builder.add_node(rerank_candidates)
+    graph_builder.add_node(pack_context)
+    graph_builder.add_node(generate)
+
+    graph_builder.set_entry_point("route_query")
+    # The fast path emits a retrieve tool call itself; anything it does not recognize goes to the LLM
+    graph_builder.add_conditional_edges(
+        "route_query",
+        tools_condition,
+        {END: "query_or_respond", "tools": "tools"},
+    )
+    graph_builder.add_conditional_edges(
+        "query_or_respond",
+        tools_condition,
+        {END: END, "tools": "tools"},
+    )
+    graph_builder.add_edge("tools", "rerank_candidates")
+    graph_builder.add_edge("rerank_candidates", "pack_context")
+    graph_builder.add_edge("pack_context", "generate")
+    graph_builder.add_edge("generate", END)
+    return graph_builder.compile()
+
+
+def get_graph():
+    return resources.lazy("graph", build_graph)
+
+
+def build_answer_graph():
+    """The steps after retrieval, for callers that ran the retrieve calls themselves (/chat/batch)."""
+    graph_builder = StateGraph(ChatState)
+    graph_builder.add_node(rerank_candidates)
+    graph_builder.add_node(pack_context)
+    graph_builder.add_node(generate)
+    graph_builder.set_entry_point("rerank_candidates")
+    graph_builder.add_edge("rerank_candidates", "pack_context")
+    graph_builder.add_edge("pack_context", "generate")
+    graph_builder.add_edge("generate", END)
+    return graph_builder.compile()
+
+
+def get_answer_graph():
+    return resources.lazy("answer_graph", build_answer_graph)
+
+SYSTEM_PROMPT = "You are a helpful assistant that helps users find Georgia Tech alumni based on their query."
+
+
+def build_graph_input(message: str) -> Dict[str, Any]:
+    return {"messages": [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user",   "content": message}
+    ]}
+
+
+def profiles_from_messages(messages) -> List[Profile]:
+    """Build Profile objects from the documents attached to retrieve tool messages."""
+    profiles: List[Profile] = []
+    seen = set()
+    for msg in messages:
+        # The retrieved documents travel as the tool message artifact (content_and_artifact)
+        if msg.type == "tool" and msg.artifact:
+            for doc in msg.artifact:
+                md = doc.metadata
+                # One profile per alumnus, even across several retrieve calls
+                if md.get("id") in seen:
+                    continue
+                seen.add(md.get("id"))
+                profiles.append(Profile(
+                    id=md.get("id", ""),
+                    name=md.get("name", ""),
+                    profile_pic=md.get("profile_pic"),
+                    headline=md.get("role"),
+                    summary=doc.page_content,
+                    # assume linkedin_url is the id if it looks like a URL
+                    linkedin_url=md.get("id") if md.get("id", "").startswith("http") else None
+                ))
+    return profiles
+
+
+def cache_scope(message: str) -> tuple:
+    """
+    What a semantic cache hit must share with the message besides similar wording: "who works at
+    X" and "who worked at X" embed almost alike but search different time windows.
+    """
+    canonical = query_router.canonicalize(message)
+    slots = tuple(sorted(canonical_slots(canonical).items())) if canonical else None
+    return tense(message), temporal.time_window(message), slots
+
+
+def embed_message(cache_key: str) -> asyncio.Task:
+    """
+    Start embedding a message for the semantic cache tier. The graph embeds a rewritten query
+    rather than the message, so this runs alongside the graph instead of in front of it. The
+    tier is best-effort: a failed or shed embedding call resolves to None instead of failing the request.
+    """
+    async def embed() -> Optional[List[float]]:
+        try:
+            with metrics.stage("embed"):
+                return await resources.get_embeddings().aembed_query(cache_key)
+        except Exception as e:
+            logger.warning(f"Skipping the semantic cache tier: {e!r}")
+            return None
+    return asyncio.create_task(embed())
+
 
-graph_builder.set_entry_point("query_or_respond")
-graph_builder.add_conditional_edges(
-    "query_or_respond",
-    tools_condition,
-    {END: END, "tools": "tools"},
-)
-graph_builder.add_edge("tools", "generate")
-graph_builder.add_edge("generate", END)
+def ready_vector(message_embedding: asyncio.Task) -> Optional[List[float]]:
+    """The message embedding if it has already arrived, else None; nothing waits for it."""
+    if message_embedding.done() and not message_embedding.cancelled():
+        return message_embedding.result()
+    return None
+
+
+def cache_response(cache_key: str, message_embedding: asyncio.Task, response: "ChatResponse", generation: int, scope: tuple):
+    """Cache `response` in the exact tier now, and in the semantic tier once its message embedding arrives."""
+    response_cache.put(cache_key, ready_vector(message_embedding), response, generation, scope)
+    if not message_embedding.done():
+        def put_semantic(task: asyncio.Task):
+            vector = ready_vector(task)
+            if vector is not None:
+                response_cache.put(cache_key, vector, response, generation, scope)
+        message_embedding.add_done_callback(put_semantic)
+
+
+_END_OF_STREAM = object()
+
+
+async def with_embedding(stream, message_embedding: asyncio.Task):
+    """
+    Yield the items of `stream`, plus one None as soon as `message_embedding` arrives if that happens
+    between items. No item is held back waiting for the embedding.
+    """
+    next_item = None
+    waiting = not message_embedding.done()
+    try:
+        while True:
+            if waiting:
+                next_item = next_item or asyncio.ensure_future(anext(stream, _END_OF_STREAM))
+                await asyncio.wait({next_item, message_embedding}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_item.done():
+                    waiting = False
+                    yield None
+                    continue
+                item, next_item = next_item.result(), None
+            elif next_item is not None:
+                item, next_item = await next_item, None
+            else:
+                item = await anext(stream, _END_OF_STREAM)
+            if item is _END_OF_STREAM:
+                return
+            yield item
+    finally:
+        if next_item is not None and not next_item.done():
+            next_item.cancel()
+            await asyncio.gather(next_item, return_exceptions=True)
+
+
+def cancel_task(task: asyncio.Task):
+    """Cancel `task` if it is still running, and consume the exception of one that already failed."""
+    if task.done():
+        if not task.cancelled():
+            task.exception()
+    else:
+        task.cancel()
+
+
+async def answer_message(message: str, cache_key: str) -> ChatResponse:
+    """Answer one chat message from the response cache, or by invoking the graph and caching the result."""
+    # 0) Serve repeated questions from the exact cache tier:
+    generation = response_cache.generation
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # 1) Invoke the graph while the message is embedded. A semantic hit that arrives before the
+    #    graph's answer abandons the run; the graph's answer never waits for the embedding:
+    scope = cache_scope(message)
+    message_embedding = embed_message(cache_key)
+    graph_run = asyncio.create_task(get_graph().ainvoke(build_graph_input(message)))
+    try:
+        await asyncio.wait({message_embedding, graph_run}, return_when=asyncio.FIRST_COMPLETED)
+        cached = response_cache.get_similar(ready_vector(message_embedding), scope)
+        if cached is not None:
+            return cached
+        invocation = await graph_run
+    except BaseException:
+        cancel_task(message_embedding)
+        raise
+    finally:
+        cancel_task(graph_run)
+    final_messages = invocation["messages"]
+
+    # 2) Pull out the assistant's reply:
+    response_content = final_messages[-1].content
+
+    # 3) Build Profile objects from the retrieve calls, empty if none were made:
+    profiles = profiles_from_messages(final_messages)
+    metrics.log_event(logger, logging.DEBUG, "chat_response", message=message,
+                      response_chars=len(response_content), profile_ids=[profile.id for profile in profiles])
+
+    chat_response = ChatResponse(response=response_content, profiles=profiles)
+    cache_response(cache_key, message_embedding, chat_response, generation, scope)
+    return chat_response
 
-graph = graph_builder.compile()
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
+    with metrics.stage("chat"):
+        try:
+            # Identical messages that are already being answered wait for that answer instead of running the graph again
+            cache_key = normalize_message(request.message)
+            with admission.deadline():
+                return await chat_flights.do(cache_key, lambda: answer_message(request.message, cache_key))
+        except admission.Overloaded as e:
+            logger.warning(f"Shedding chat request: {e}")
+            raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
+        except Exception as e:
+            logger.error(f"Unexpected error in chat endpoint: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# A "name" or "summary" string in generate's JSON answer, possibly still cut off by the stream
+ANSWER_FIELD = re.compile(r'"(name|summary)"\s*:\s*"((?:[^"\\]|\\.)*)(")?')
+
+
+def visible_answer(partial_json: str) -> str:
+    """
+    The readable part of a partially generated JSON answer: one "name: summary" line per alumnus,
+    without the refs and JSON syntax. It only ever grows as more of the answer arrives.
+    """
+    lines: List[str] = []
+    for field, raw, closed in ANSWER_FIELD.findall(partial_json):
+        if not closed:
+            # Leave out an escape sequence the stream has not finished yet
+            raw = re.sub(r"\\(?:u[0-9a-fA-F]{0,3})?$", "", raw)
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            break
+        if field == "name":
+            lines.append(value)
+        elif lines:
+            lines[-1] += f": {value}"
+        if not closed:
+            break
+    return "\n".join(lines)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Server-sent events version of /chat. Emits a `profiles` event as soon as retrieval finishes
+    (and again if reranking drops alumni), `token` events with the next piece of readable answer
+    text (names and summaries) while generate streams its JSON, then `done` with the full
+    response text (or `error`). Concurrent streams of the same
+    message share one graph run: later ones replay its events from the start.
+    """
+    async def events():
+        with metrics.stage("chat_stream"), admission.deadline():
+            try:
+                cache_key = normalize_message(request.message)
+                generation = response_cache.generation
+                cached = response_cache.get(cache_key)
+                if cached is not None:
+                    yield sse_event("profiles", [profile.model_dump() for profile in cached.profiles])
+                    yield sse_event("done", {"response": cached.response})
+                    return
+
+                # The graph starts while the message is embedded. The semantic tier is checked once, before
+                # the first event goes out or as soon as the embedding arrives, and never holds an event back
+                scope = cache_scope(request.message)
+                message_embedding = embed_message(cache_key)
+                checked = False
+                profiles: List[Profile] = []
+                response_content = ""
+                generated, shown = "", ""
+                try:
+                    graph_stream = get_graph().astream(build_graph_input(request.message), stream_mode=["updates", "messages"])
+                    async with aclosing(graph_stream) as stream, aclosing(with_embedding(stream, message_embedding)) as items:
+                        async for item in items:
+                            outgoing = []
+                            # None only says the message embedding arrived
+                            mode, chunk = item or (None, None)
+                            if mode == "messages":
+                                message_chunk, metadata = chunk
+                                if metadata.get("langgraph_node") == "generate" and message_chunk.content:
+                                    generated += message_chunk.content
+                                    visible = visible_answer(generated)
+                                    if len(visible) > len(shown):
+                                        outgoing.append(sse_event("token", {"text": visible[len(shown):]}))
+                                        shown = visible
+                            elif mode == "updates":
+                                for node, update in chunk.items():
+                                    node_messages = (update or {}).get("messages", [])
+                                    if node == "tools" or (node == "rerank_candidates" and node_messages):
+                                        # Announce the alumni as soon as they are retrieved, and again if reranking dropped some
+                                        profiles = profiles_from_messages(node_messages)
+                                        outgoing.append(sse_event("profiles", [profile.model_dump() for profile in profiles]))
+                                    elif node_messages and node_messages[-1].type == "ai" and not node_messages[-1].tool_calls:
+                                        response_content = node_messages[-1].content
+                            if not checked and (outgoing or message_embedding.done()):
+                                checked = True
+                                cached = response_cache.get_similar(ready_vector(message_embedding), scope)
+                                if cached is not None:
+                                    cancel_task(message_embedding)
+                                    yield sse_event("profiles", [profile.model_dump() for profile in cached.profiles])
+                                    yield sse_event("done", {"response": cached.response})
+                                    return
+                            for event in outgoing:
+                                yield event
+                except BaseException:
+                    cancel_task(message_embedding)
+                    raise
+
+                if not checked:
+                    response_cache.get_similar(None, scope)
+                cache_response(cache_key, message_embedding, ChatResponse(response=response_content, profiles=profiles), generation, scope)
+                yield sse_event("done", {"response": response_content})
+            except admission.Overloaded as e:
+                # The 200 and its headers are already sent, so the retry hint travels in the event
+                logger.warning(f"Shedding chat stream: {e}")
+                metrics.STAGE_ERRORS.inc(stage="chat_stream")
+                yield sse_event("error", {"detail": str(e), "retry_after": int(e.headers["Retry-After"])})
+            except Exception as e:
+                logger.error(f"Unexpected error in chat stream: {e}", exc_info=True)
+                metrics.STAGE_ERRORS.inc(stage="chat_stream")
+                yield sse_event("error", {"detail": str(e)})
+
+    # X-Accel-Buffering stops reverse proxies from holding events back
+    return StreamingResponse(stream_flights.stream(normalize_message(request.message), events), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# Batch chat API. Messages are answered like /chat, but their retrieve calls share one embedding
+# request and one Qdrant batch search
+BATCH_MAX_MESSAGES = int(os.getenv("BATCH_MAX_MESSAGES", "500"))
+# Messages whose LLM steps (routing, parameter extraction, generate) run at once
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+
+class ChatBatchRequest(BaseModel):
+    messages: List[str]
+
+
+def batch_item(index: int, message: str, response: Optional[ChatResponse] = None, error: Optional[Exception] = None) -> Dict[str, Any]:
+    item: Dict[str, Any] = {"index": index, "message": message}
+    if error is None:
+        item.update(response=response.response, profiles=[profile.model_dump() for profile in response.profiles])
+    else:
+        item["error"] = str(error)
+        if isinstance(error, admission.Overloaded):
+            item["retry_after"] = int(error.headers["Retry-After"])
+    return item
+
+
+async def answer_batch(messages: List[str], concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Answer every message as /chat would and yield one batch_item per message as soon as it is done:
+    1. cached messages are answered right away; the rest go through route_query, or
+       query_or_respond when the fast path does not recognize them;
+    2. the retrieve calls of all messages are embedded in one request and searched in one
+       `query_batch_points` call, while their search parameters are extracted;
+    3. rerank, pack and generate run per message through the answer graph.
+    Each message gets its own upstream deadline, and at most `concurrency` run an LLM step at once.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    generation = response_cache.generation
+    keys = [normalize_message(message) for message in messages]
+    scopes = [cache_scope(message) for message in messages]
+    # The semantic tier gets all messages embedded in one request, alongside routing rather than in front of it
+    batch_embedding = asyncio.create_task(embed_batch(keys))
+    message_embeddings = [asyncio.create_task(batch_vector(batch_embedding, index)) for index in range(len(messages))]
+
+    async def route(index: int, message: str):
+        cached = response_cache.get(keys[index])
+        if cached is None:
+            cached = response_cache.get_similar(ready_vector(message_embeddings[index]), scopes[index])
+        if cached is not None:
+            return index, cached, None
+        state = {"messages": convert_to_messages(build_graph_input(message)["messages"])}
+        async with semaphore:
+            with admission.deadline():
+                routed = route_query(state)["messages"] or (await query_or_respond(state))["messages"]
+        if not routed[-1].tool_calls:
+            return index, ChatResponse(response=routed[-1].content, profiles=[]), None
+        return index, None, state["messages"] + routed
+
+    async def extract(query: str):
+        async with semaphore:
+            with admission.deadline():
+                return await extract_search_parameters(query)
+
+    async def answer(index: int, state_messages):
+        async with semaphore:
+            with admission.deadline():
+                final_messages = (await get_answer_graph().ainvoke({"messages": state_messages}))["messages"]
+        return index, ChatResponse(response=final_messages[-1].content, profiles=profiles_from_messages(final_messages))
+
+    def done(index: int, response: ChatResponse):
+        cache_response(keys[index], message_embeddings[index], response, generation, scopes[index])
+        return batch_item(index, messages[index], response)
+
+    # 1) Cached answers, routing and query rewriting
+    pending: Dict[int, list] = {}
+    for task in asyncio.as_completed([catch(i, route(i, message)) for i, message in enumerate(messages)]):
+        index, result = await task
+        if isinstance(result, Exception):
+            yield batch_item(index, messages[index], error=result)
+            continue
+        _, response, state_messages = result
+        if response is not None:
+            yield done(index, response)
+        else:
+            pending[index] = state_messages
+    if not pending:
+        return
+
+    # 2) One embedding request and one batch search for every retrieve call
+    calls = [(index, tool_call) for index, state_messages in pending.items() for tool_call in state_messages[-1].tool_calls]
+    queries = [tool_call["args"].get("query", "") for _, tool_call in calls]
+    plans = [retrieval_plan(messages[index]) for index, _ in calls]
+    try:
+        with admission.deadline():
+            candidates, params = await asyncio.gather(
+                search_documents_batch(queries, [limit for _, limit, _ in plans], [query_filter for _, _, query_filter in plans]),
+                asyncio.gather(*(extract(query) for query in queries), return_exceptions=True),
+            )
+    except Exception as e:
+        logger.error(f"Batch retrieval failed: {e}", exc_info=True)
+        for index in pending:
+            yield batch_item(index, messages[index], error=e)
+        return
+    failed: Dict[int, Exception] = {}
+    for (index, tool_call), docs, query_params, (k, _, _) in zip(calls, candidates, params, plans):
+        if isinstance(query_params, Exception):
+            failed.setdefault(index, query_params)
+            continue
+        docs = merge_search_parameters(docs, query_params, k)
+        pending[index].append(ToolMessage(content=serialize_documents(docs), artifact=docs, tool_call_id=tool_call["id"], name=retrieve.name))
+    for index, error in failed.items():
+        del pending[index]
+        yield batch_item(index, messages[index], error=error)
+
+    # 3) Rerank, pack and generate
+    for task in asyncio.as_completed([catch(index, answer(index, state_messages)) for index, state_messages in pending.items()]):
+        index, result = await task
+        if isinstance(result, Exception):
+            yield batch_item(index, messages[index], error=result)
+        else:
+            yield done(index, result[1])
+
+
+async def embed_batch(keys: List[str]) -> Optional[List[List[float]]]:
+    """Embed batch messages for the semantic cache tier in one request; None if that fails, like embed_message."""
     try:
-        # 1) Build the payload:
-        user_msgs = [
-            {"role": "system", "content": "You are a helpful assistant that helps users find Georgia Tech alumni based on their query."},
-            {"role": "user",   "content": request.message}
-        ]
-
-        # 2) Invoke the graph:
-        invocation = graph.invoke({"messages": user_msgs})
-        final_messages = invocation["messages"]
-
-        # 3) Pull out the assistant's reply:
-        response_content = final_messages[-1].content
-
-        # 4) Initialize profiles list (avoids UnboundLocalError):
-        profiles: List[Profile] = []
-
-        # 5) Extract any tool messages (your retrieve calls) to build Profile objects:        
-        for msg in final_messages:
-            if msg.type == "tool" and isinstance(msg.content, tuple):
-                # msg.content is (serialized_string, docs_list)
-                _, docs = msg.content
-                for doc in docs:
-                    md = doc.metadata
-                    profiles.append(Profile(
-                        id=md.get("id", ""),
-                        name=md.get("name", ""),
-                        profile_pic=md.get("profile_pic"),
-                        headline=md.get("role"),
-                        summary=doc.page_content,
-                        # assume linkedin_url is the id if it looks like a URL
-                        linkedin_url=md.get("id") if md.get("id", "").startswith("http") else None
-                    ))
-        print(f"response_content: {response_content}")
-        print(f"profiles: {profiles}")
-        # 6) Return safely even if no tool messages were found:
-        return ChatResponse(response=response_content, profiles=profiles)
+        with metrics.stage("embed"):
+            return await embed_queries(resources.get_embeddings(), keys)
+    except Exception as e:
+        logger.warning(f"Skipping the semantic cache tier for the batch: {e!r}")
+        return None
+
+
+async def batch_vector(batch_embedding: asyncio.Task, index: int) -> Optional[List[float]]:
+    """One message's vector out of embed_batch, shaped like an embed_message task."""
+    vectors = await batch_embedding
+    return vectors[index] if vectors else None
 
+
+async def catch(index: int, awaitable):
+    """(index, result), or (index, exception) if `awaitable` raised, so one failed message does not end the batch."""
+    try:
+        return index, await awaitable
     except Exception as e:
-        logger.error(f"Unexpected error in chat endpoint: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        if not isinstance(e, admission.Overloaded):
+            logger.error(f"Batch message {index} failed: {e}", exc_info=True)
+        return index, e
+
+
+@app.post("/chat/batch")
+async def chat_batch(request: ChatBatchRequest):
+    """
+    Answer many messages in one request. Results stream back as NDJSON, one line per message in
+    completion order: {"index", "message", "response", "profiles"}, or {"index", "message", "error"}
+    (plus "retry_after" when an upstream was overloaded).
+    """
+    if len(request.messages) > BATCH_MAX_MESSAGES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_MESSAGES} messages per batch")
+
+    async def lines():
+        with metrics.stage("chat_batch"):
+            async for item in answer_batch(request.messages):
+                yield json.dumps(item) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/stats")
+async def stats():
+    """Counters for tuning the request path."""
+    # Only CachedEmbeddings keeps counters; a stand-in embedder (benchmarks) has none
+    embeddings = resources.peek("embeddings")
+    return {
+        "router": query_router.stats(),
+        "response_cache": response_cache.stats(),
+        "context_packing": packing_stats,
+        "answers": answer_stats,
+        "coalescing": {"chat": chat_flights.stats(), "chat_stream": stream_flights.stats()},
+        "upstreams": {limiter.name: limiter.stats() for limiter in admission.LIMITERS},
+        "embedding_cache": embeddings.stats() if hasattr(embeddings, "stats") else None,
+    }
+
+
+def cache_samples():
+    """Hit/miss counters of the response and embedding caches, read at scrape time."""
+    embeddings = resources.peek("embeddings")
+    # Only CachedEmbeddings keeps counters; a stand-in embedder (benchmarks) has none
+    caches = {"response": response_cache.stats(), "embedding": embeddings.stats() if hasattr(embeddings, "stats") else {}}
+    for cache, counters in caches.items():
+        for event, value in counters.items():
+            if event in ("exact_hits", "semantic_hits", "memory_hits", "disk_hits", "misses"):
+                yield "buzzlink_cache_lookups_total", {"cache": cache, "result": event}, value
+
+
+def coalescing_samples():
+    for path, flights in (("chat", chat_flights), ("chat_stream", stream_flights)):
+        yield "buzzlink_coalesced_requests_total", {"path": path}, flights.counters["coalesced"]
+
+
+def router_samples():
+    router = query_router.stats()
+    yield "buzzlink_router_decisions_total", {"route": "fast_path"}, router["routed"]
+    yield "buzzlink_router_decisions_total", {"route": "llm"}, router["fallback"]
+
+
+def answer_samples():
+    for source, value in answer_stats.items():
+        yield "buzzlink_answers_total", {"source": source}, value
+
+
+metrics.REGISTRY.register_collector("buzzlink_cache_lookups_total", "counter", "Cache lookups by cache and result.", cache_samples)
+metrics.REGISTRY.register_collector("buzzlink_coalesced_requests_total", "counter", "Requests that shared an identical in-flight request's answer.", coalescing_samples)
+metrics.REGISTRY.register_collector("buzzlink_router_decisions_total", "counter", "Queries the fast-path router answered vs. sent to the LLM.", router_samples)
+metrics.REGISTRY.register_collector("buzzlink_answers_total", "counter", "Answers assembled from summaries vs. generated by the LLM.", answer_samples)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Stage latencies, LLM tokens and cost, errors and cache hits in the Prometheus text format."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(authorization: Optional[str] = Header(default=None)):
+    """
+    Drop this worker's cached chat responses at once. Needs `Authorization: Bearer <CACHE_INVALIDATE_TOKEN>`
+    and is off without that setting; workers drop their caches on their own when ingestion changes the collection.
+    """
+    token = os.getenv("CACHE_INVALIDATE_TOKEN")
+    if not token or not secrets.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=403, detail="cache invalidation needs CACHE_INVALIDATE_TOKEN")
+    response_cache.invalidate()
+    return {"generation": response_cache.generation}
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the clients are built and Qdrant has answered, 503 until then."""
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
 
 if __name__ == "__main__":
     import uvicorn
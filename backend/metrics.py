@@ -0,0 +1,181 @@
+"""
+Request-path instrumentation, exported in the Prometheus text format at /metrics.
+
+Histograms record the wall time of each stage (query_or_respond, extract_search_parameters,
+retrieve and its embed/search steps, generate, chat, ...) and the prompt/completion tokens of
+every LLM call; counters record LLM cost and errors per stage. Counters that already live on
+other objects (response and embedding cache hits, router decisions) are read at scrape time
+through collectors instead of being counted twice.
+
+`log_event` is the structured replacement for debug prints: the level check comes first, so a
+disabled event costs nothing, and enabled events are sampled at LOG_SAMPLE_RATE.
+"""
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from cache hits to slow LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+# USD per million tokens of resources.LLM_MODEL (gpt-4o-mini list prices by default)
+PROMPT_COST_PER_MTOK = float(os.getenv("LLM_PROMPT_COST_PER_MTOK", "0.15"))
+COMPLETION_COST_PER_MTOK = float(os.getenv("LLM_COMPLETION_COST_PER_MTOK", "0.60"))
+# Fraction of enabled log_event calls that are written
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+LabelValues = Tuple[str, ...]
+# (metric name, label dict, value) samples produced by collectors at scrape time
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, as Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (not cumulative), sum]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """The metrics and scrape-time collectors rendered by /metrics."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name: str, kind: str, help: str, collect: Callable[[], Iterable[Sample]]):
+        """`collect()` returns the current (name, labels, value) samples of one metric family."""
+        self._collectors.append((name, kind, help, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}", *metric.render()]
+        for name, kind, help, collect in self._collectors:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for sample_name, labels, value in collect():
+                lines.append(f"{sample_name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "buzzlink_stage_seconds", "Wall time of each request-path stage.", ["stage"]))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "buzzlink_stage_errors_total", "Exceptions raised out of each request-path stage.", ["stage"]))
+LLM_TOKENS = REGISTRY.register(Histogram(
+    "buzzlink_llm_tokens", "Tokens per LLM call, by stage and kind (prompt or completion).", ["stage", "kind"], TOKEN_BUCKETS))
+LLM_COST = REGISTRY.register(Counter(
+    "buzzlink_llm_cost_usd_total", "Estimated LLM spend in USD, by stage.", ["stage"]))
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as `name` and count it as an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+
+def record_llm_usage(stage: str, message):
+    """Record the token usage and cost of one LLM response, when the provider reported it."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    LLM_TOKENS.observe(prompt_tokens, stage=stage, kind="prompt")
+    LLM_TOKENS.observe(completion_tokens, stage=stage, kind="completion")
+    LLM_COST.inc((prompt_tokens * PROMPT_COST_PER_MTOK + completion_tokens * COMPLETION_COST_PER_MTOK) / 1e6, stage=stage)
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields: Any):
+    """Log `event` with `fields` as one JSON line, if `level` is enabled and the event is sampled."""
+    if not logger.isEnabledFor(level) or random.random() >= LOG_SAMPLE_RATE:
+        return
+    logger.log(level, json.dumps({"event": event, **fields}, default=str))
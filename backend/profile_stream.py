@@ -0,0 +1,131 @@
+"""
+Streaming reads and writes of profile data files.
+
+Profiles come either as one JSON array (profile_data.json, old_profile_data_no_ai.json) or as
+NDJSON, one profile per line (what data/preprocess_data.py writes now). `iter_profiles`
+yields them one at a time from either format. It parses incrementally with
+`JSONDecoder.raw_decode` over a fixed-size read buffer, so memory is bounded by the largest
+single profile rather than the file. `iter_latest_profiles` drops all but the last copy of
+a profile that appears more than once.
+
+backend/ and data/ each keep an identical copy of this module, so the data scripts run without
+the backend on their import path; backend/tests/test_shared_modules.py checks the copies match.
+"""
+import json
+import os
+import shutil
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, TextIO
+
+READ_CHUNK_CHARS = 1 << 16
+
+_decoder = json.JSONDecoder()
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+def iter_json_values(f: TextIO, chunk_chars: int = READ_CHUNK_CHARS) -> Iterator[Any]:
+    """
+    Yield the top-level JSON values of a text stream. A stream that starts with `[` yields the
+    elements of that array; otherwise every value in it is yielded in turn (NDJSON, or values
+    separated by any whitespace).
+    """
+    buffer, position, eof = "", 0, False
+
+    def fill() -> bool:
+        """Read more input, dropping what has been consumed; False at end of file."""
+        nonlocal buffer, position, eof
+        chunk = f.read(chunk_chars)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+        return not eof
+
+    def skip_whitespace() -> bool:
+        """Advance to the next non-whitespace character; False if the input ends first."""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or not fill():
+                return position < len(buffer)
+
+    def decode() -> Any:
+        nonlocal position
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Most likely a value cut off by the read buffer; give up only at end of file
+                if eof or not fill():
+                    raise
+                continue
+            # A number cut by the read buffer decodes as its prefix ("1.5" as "1"); read on to see the rest
+            if not eof and not isinstance(value, (dict, list, str)) and (end == len(buffer) or buffer[end] in _NUMBER_CHARS):
+                fill()
+                continue
+            position = end
+            return value
+
+    if not skip_whitespace():
+        return
+    if buffer[position] != "[":
+        while skip_whitespace():
+            yield decode()
+        return
+
+    position += 1
+    if skip_whitespace() and buffer[position] == "]":
+        return
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Unterminated JSON array")
+        yield decode()
+        if not skip_whitespace():
+            raise ValueError("Unterminated JSON array")
+        separator = buffer[position]
+        position += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {separator!r}")
+
+
+def iter_profiles(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the profiles of a JSON array or NDJSON file one at a time."""
+    with open(path, encoding="utf-8") as f:
+        for value in iter_json_values(f):
+            if isinstance(value, dict):
+                yield value
+
+
+def iter_latest_profiles(path: str, key: Callable[[Dict[str, Any]], Optional[Hashable]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the profiles of `path` in file order, keeping only the last copy of each `key(profile)`;
+    profiles whose key is None are all kept. Reads the file twice and holds only the keys.
+    """
+    last = {}
+    for position, profile in enumerate(iter_profiles(path)):
+        last[key(profile)] = position
+    for position, profile in enumerate(iter_profiles(path)):
+        profile_key = key(profile)
+        if profile_key is None or last[profile_key] == position:
+            yield profile
+
+
+def write_ndjson(records: Iterable[Dict[str, Any]], path: str, append: bool = False) -> int:
+    """
+    Write `records` as NDJSON in one pass and return how many there were; with `append`, after
+    the records already in `path`. The file is written under a temporary name and moved into
+    place, so readers never see half of it.
+    """
+    count = 0
+    partial = f"{path}.partial"
+    with open(partial, "w", encoding="utf-8") as f:
+        if append and os.path.exists(path):
+            with open(path, encoding="utf-8") as existing:
+                shutil.copyfileobj(existing, f)
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    os.replace(partial, path)
+    return count
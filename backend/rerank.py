@@ -0,0 +1,71 @@
+"""
+Cross-encoder reranking of retrieved alumni.
+
+Retrieval over-fetches candidates, and a small cross-encoder scores every (query, alumnus text)
+pair on the CPU so only the best few alumni reach the generate prompt. sentence-transformers
+is optional: without it, or without RERANK_MODEL, the stage is skipped.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+import context_packing
+
+logger = logging.getLogger(__name__)
+
+# Cross-encoders read at most 512 tokens per pair; compacted, truncated text keeps the best chunks in view
+RERANK_TEXT_CHARS = 1200
+
+
+class Reranker:
+    """
+    Scores (query, document) pairs with a cross-encoder, in batches spread over a small thread
+    pool so inference never blocks the event loop. `model` is anything with a sentence-transformers
+    style `predict(pairs, batch_size=...)`.
+    """
+
+    def __init__(self, model, batch_size: int = 16, threads: int = 2):
+        self.model = model
+        self.batch_size = batch_size
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="rerank")
+
+    @classmethod
+    def load(cls, model_name: str, batch_size: int = 16, threads: int = 2) -> Optional["Reranker"]:
+        """Load a sentence-transformers CrossEncoder on the CPU; None if the library is not installed."""
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            logger.warning("sentence-transformers is not installed; reranking is disabled")
+            return None
+        return cls(CrossEncoder(model_name, device="cpu"), batch_size, threads)
+
+    async def score(self, query: str, texts: List[str]) -> List[float]:
+        loop = asyncio.get_running_loop()
+        batches = [
+            [(query, text) for text in texts[i:i + self.batch_size]]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._pool, lambda pairs=pairs: self.model.predict(pairs, batch_size=self.batch_size))
+            for pairs in batches
+        ))
+        return [float(score) for batch in results for score in batch]
+
+    async def rerank(self, query: str, docs: List[Document], top_n: int) -> List[Document]:
+        """
+        Return the `top_n` best alumni for `query`. Alumni matching more extracted search
+        parameters still come first; the cross-encoder score orders them within that.
+        """
+        if not docs:
+            return []
+        texts = [
+            f"{doc.metadata.get('name')}\n{context_packing.compact_chunk_text(doc.page_content, RERANK_TEXT_CHARS)}"[:RERANK_TEXT_CHARS]
+            for doc in docs
+        ]
+        for doc, score in zip(docs, await self.score(query, texts)):
+            doc.metadata["rerank_score"] = score
+        ranked = sorted(docs, key=lambda doc: (doc.metadata.get("parameter_matches", 0), doc.metadata["rerank_score"]), reverse=True)
+        return ranked[:top_n]
@@ -0,0 +1,314 @@
+"""
+Lazily constructed clients shared by the request path.
+
+Nothing here touches the network or imports the heavy client libraries until a getter is
+first called, so importing the app is cheap and a Qdrant outage at startup cannot crash the
+process. The FastAPI lifespan warms these up in the background; `override()` lets scripts
+swap in their own instances.
+"""
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_MODEL = "gpt-4o-mini-2024-07-18"
+EMBEDDING_MODEL = "nomic-embed-text-v1.5"
+FULL_EMBEDDING_DIM = 768
+# nomic-embed-text-v1.5 is a Matryoshka model: its embeddings can be cut to 512, 256, 128 or 64 dimensions.
+# Read at import, so entry points load backend/.env before importing this module
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", str(FULL_EMBEDDING_DIM)))
+QUANTIZATION_TYPES = ("none", "scalar", "binary")
+COLLECTION_NAME = "user_profile_collection_with_ollama"
+# Payload keys used by QdrantVectorStore when it stores Documents
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+# Collection metadata key that ingestion changes whenever it changes the points
+DATA_GENERATION_KEY = "data_generation"
+
+_instances: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def lazy(name: str, factory: Callable[[], Any]) -> Any:
+    """Return the instance registered under `name`, building it with `factory` on first use."""
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+
+def peek(name: str) -> Optional[Any]:
+    """Return the instance registered under `name` if it has been built, without building it."""
+    return _instances.get(name)
+
+
+def override(**instances: Any):
+    """Replace (or pre-seed) instances, e.g. with fakes for benchmarks."""
+    with _lock:
+        _instances.update(instances)
+
+
+def get_llm():
+    def build():
+        from langchain_openai import ChatOpenAI
+        from admission import REQUEST_DEADLINE_SECONDS
+
+        # OpenAI model, requires API key. Ensure the response is in JSON format. Retries are left to the
+        # admission limiter, which knows the request's deadline, so the SDK makes one attempt per call
+        return ChatOpenAI(model=LLM_MODEL, temperature=0, max_retries=0, timeout=REQUEST_DEADLINE_SECONDS).bind(
+            response_format={"type": "json_object"})
+    return lazy("llm", build)
+
+
+def get_embeddings():
+    def build():
+        from langchain_nomic import NomicEmbeddings
+
+        truncated = EMBEDDING_DIM != FULL_EMBEDDING_DIM
+        return wrap_embeddings(
+            NomicEmbeddings(model=EMBEDDING_MODEL, dimensionality=EMBEDDING_DIM if truncated else None),
+            namespace=f"{EMBEDDING_MODEL}@{EMBEDDING_DIM}" if truncated else EMBEDDING_MODEL,
+        )
+    return lazy("embeddings", build)
+
+
+def wrap_embeddings(underlying, namespace: str):
+    """
+    The caching and admission layers every embedder is used through; benchmarks wrap their fake
+    embedder the same way. `namespace` keeps its cached vectors apart from other models'.
+    """
+    from admission import NOMIC, AdmittedEmbeddings
+    from embedding_cache import CachedEmbeddings
+
+    # Repeated and canonicalized queries, and unchanged chunks on re-ingestion, skip the Nomic API.
+    # Set EMBEDDING_CACHE_PATH to also persist vectors in SQLite across restarts. Calls that do
+    # reach Nomic go through its admission limiter, which bounds their concurrency and the time
+    # a request waits for them.
+    return CachedEmbeddings(
+        AdmittedEmbeddings(underlying, NOMIC),
+        namespace=namespace,
+        max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096")),
+        path=os.getenv("EMBEDDING_CACHE_PATH"),
+    )
+
+
+def qdrant_location() -> Dict[str, Any]:
+    """
+    Connection arguments for the Qdrant clients. Setting QDRANT_PATH to a directory or ":memory:"
+    runs Qdrant in-process in local mode (e.g. for tests) instead of connecting to QDRANT_URL.
+    """
+    path = os.getenv("QDRANT_PATH")
+    if path == ":memory:":
+        return {"location": ":memory:"}
+    if path:
+        return {"path": path}
+    return {"url": os.getenv("QDRANT_URL"), "api_key": os.getenv("QDRANT_API_KEY")}
+
+
+def get_qdrant_client():
+    def build():
+        from qdrant_client import QdrantClient
+
+        return QdrantClient(**qdrant_location())
+    return lazy("qdrant_client", build)
+
+
+def get_async_qdrant_client():
+    def build():
+        from qdrant_client import AsyncQdrantClient
+
+        # Async client used on the request path so searches never block the event loop
+        return AsyncQdrantClient(**qdrant_location())
+    return lazy("async_qdrant_client", build)
+
+
+def get_search_client():
+    """
+    Where retrieval queries go. RETRIEVAL_BACKEND=local answers them in-process from the LocalIndex
+    at LOCAL_INDEX_PATH, which implements the same grouped query API; the default is Qdrant.
+    """
+    if os.getenv("RETRIEVAL_BACKEND", "qdrant") != "local":
+        return get_async_qdrant_client()
+
+    def build():
+        from local_index import LocalIndex
+
+        return LocalIndex.load(os.getenv("LOCAL_INDEX_PATH", "local_index"), hnsw=os.getenv("LOCAL_INDEX_HNSW") == "1")
+    return lazy("local_index", build)
+
+
+def get_reranker():
+    """The cross-encoder reranker, or None when RERANK_MODEL is unset or sentence-transformers is missing."""
+    model_name = os.getenv("RERANK_MODEL")
+    if not model_name and peek("reranker") is None:
+        return None
+
+    def build():
+        from rerank import Reranker
+
+        # False remembers a reranker that could not be loaded, so loading is not retried per request
+        return Reranker.load(
+            model_name,
+            batch_size=int(os.getenv("RERANK_BATCH_SIZE", "16")),
+            threads=int(os.getenv("RERANK_THREADS", "2")),
+        ) or False
+    return lazy("reranker", build) or None
+
+
+def get_summary_store():
+    def build():
+        from summaries import SummaryStore
+
+        # Written by ingest.py; an empty store just means every answer comes from the LLM
+        return SummaryStore(os.getenv("SUMMARY_STORE_PATH", "profile_summaries.sqlite3"))
+    return lazy("summary_store", build)
+
+
+def get_vector_store():
+    def build():
+        from langchain_qdrant import QdrantVectorStore
+
+        return QdrantVectorStore(client=get_qdrant_client(), collection_name=COLLECTION_NAME, embedding=get_embeddings())
+    return lazy("vector_store", build)
+
+
+class CollectionOptions(NamedTuple):
+    """
+    How the profile collection stores, indexes and searches its dense vectors.
+
+    `quantization` "scalar" (int8, 4x smaller) or "binary" (1 bit per dimension, 32x smaller)
+    keeps a compressed copy of the vectors in RAM that the search runs on; with `rescore`, the
+    best `oversampling` x limit candidates are then re-scored with the original vectors, which
+    `on_disk_vectors` moves to disk. `hnsw_m` and `hnsw_ef_construct` shape the HNSW graph,
+    `hnsw_ef` is the search-time beam width (None: Qdrant's default).
+    """
+    dim: int = FULL_EMBEDDING_DIM
+    quantization: str = "none"
+    on_disk_vectors: bool = False
+    on_disk_payload: bool = False
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_ef: Optional[int] = None
+    rescore: bool = True
+    oversampling: float = 2.0
+
+    def create_arguments(self) -> Dict[str, Any]:
+        """Dense-vector arguments of `create_collection` for these options."""
+        from qdrant_client.models import (BinaryQuantization, BinaryQuantizationConfig, Distance, HnswConfigDiff,
+                                          ScalarQuantization, ScalarQuantizationConfig, ScalarType, VectorParams)
+
+        quantization_config = None
+        if self.quantization == "scalar":
+            quantization_config = ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+        elif self.quantization == "binary":
+            quantization_config = BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return dict(
+            vectors_config=VectorParams(size=self.dim, distance=Distance.COSINE, on_disk=self.on_disk_vectors),
+            hnsw_config=HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct),
+            quantization_config=quantization_config,
+            on_disk_payload=self.on_disk_payload,
+        )
+
+    def search_params(self):
+        """`SearchParams` for dense queries, or None where Qdrant's defaults already apply."""
+        from qdrant_client.models import QuantizationSearchParams, SearchParams
+
+        if self.quantization == "none" and self.hnsw_ef is None:
+            return None
+        quantization = None
+        if self.quantization != "none":
+            quantization = QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        return SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+
+def get_collection_options() -> CollectionOptions:
+    """Collection options from the QDRANT_* settings; they shape new collections and every dense search."""
+    def build():
+        quantization = os.getenv("QDRANT_QUANTIZATION", "none")
+        if quantization not in QUANTIZATION_TYPES:
+            raise ValueError(f"QDRANT_QUANTIZATION must be one of {', '.join(QUANTIZATION_TYPES)}, not {quantization!r}")
+        return CollectionOptions(
+            dim=EMBEDDING_DIM,
+            quantization=quantization,
+            on_disk_vectors=os.getenv("QDRANT_ON_DISK_VECTORS") == "1",
+            on_disk_payload=os.getenv("QDRANT_ON_DISK_PAYLOAD") == "1",
+            hnsw_m=int(os.getenv("QDRANT_HNSW_M", "16")),
+            hnsw_ef_construct=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100")),
+            hnsw_ef=int(os.getenv("QDRANT_HNSW_EF", "0")) or None,
+            rescore=os.getenv("QDRANT_QUANTIZATION_RESCORE", "1") == "1",
+            oversampling=float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", "2.0")),
+        )
+    return lazy("collection_options", build)
+
+
+async def ensure_collection():
+    """Create the profile collection and its payload indexes if they do not exist yet."""
+    from qdrant_client.models import Modifier, PayloadSchemaType, SparseVectorParams
+    from sparse import SPARSE_VECTOR_NAME
+
+    # The async client is the only one used, so Qdrant local mode never sees two clients on one path
+    client = get_async_qdrant_client()
+    options = get_collection_options()
+    if not await client.collection_exists(COLLECTION_NAME):
+        await client.create_collection(
+            collection_name=COLLECTION_NAME,
+            # Keyword vectors for hybrid search; Qdrant applies the IDF part of BM25 at query time
+            sparse_vectors_config={SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)},
+            **options.create_arguments(),
+        )
+        logger.info(f"Collection '{COLLECTION_NAME}' created successfully ({options.dim}-d, quantization {options.quantization})!")
+    else:
+        info = await client.get_collection(COLLECTION_NAME)
+        size = getattr(info.config.params.vectors, "size", None)
+        if size is not None and size != options.dim:
+            logger.error(f"Collection '{COLLECTION_NAME}' holds {size}-d vectors but EMBEDDING_DIM is "
+                         f"{options.dim}; recreate it and re-ingest after changing the dimension")
+        if SPARSE_VECTOR_NAME not in (info.config.params.sparse_vectors or {}):
+            logger.warning(f"Collection '{COLLECTION_NAME}' has no '{SPARSE_VECTOR_NAME}' sparse vectors; "
+                           "searching dense vectors only until it is recreated and re-ingested")
+    # Retrieval groups chunks by alumnus and filters them by time period; the entity fields allow exact
+    # payload filters. Creating an index that already exists is a no-op
+    await client.create_payload_index(COLLECTION_NAME, field_name=f"{METADATA_KEY}.id", field_schema=PayloadSchemaType.KEYWORD)
+    for field in ("name", "company", "role", "location"):
+        await client.create_payload_index(COLLECTION_NAME, field_name=f"{METADATA_KEY}.{field}", field_schema=PayloadSchemaType.KEYWORD)
+    for field in ("start_month", "end_month"):
+        await client.create_payload_index(COLLECTION_NAME, field_name=f"{METADATA_KEY}.{field}", field_schema=PayloadSchemaType.INTEGER)
+
+
+async def collection_generation() -> Optional[str]:
+    """The data generation stamped on the collection by the last ingestion that changed it, or None."""
+    info = await get_async_qdrant_client().get_collection(COLLECTION_NAME)
+    return (info.config.metadata or {}).get(DATA_GENERATION_KEY)
+
+
+async def bump_collection_generation() -> str:
+    """Stamp the collection with a new data generation, which tells every backend worker its cached answers are stale."""
+    generation = uuid.uuid4().hex
+    await get_async_qdrant_client().update_collection(COLLECTION_NAME, metadata={DATA_GENERATION_KEY: generation})
+    return generation
+
+
+async def collection_has_sparse_vectors() -> bool:
+    """Whether the Qdrant collection stores sparse keyword vectors (collections created before hybrid search do not)."""
+    from sparse import SPARSE_VECTOR_NAME
+
+    info = await get_async_qdrant_client().get_collection(COLLECTION_NAME)
+    return SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+
+
+async def has_sparse_vectors() -> bool:
+    """Whether searches can use sparse keyword vectors. Asks the search backend once and remembers the answer."""
+    cached = peek("has_sparse_vectors")
+    if cached is None:
+        if os.getenv("RETRIEVAL_BACKEND", "qdrant") == "local":
+            cached = get_search_client().has_sparse_vectors
+        else:
+            cached = await collection_has_sparse_vectors()
+        override(has_sparse_vectors=cached)
+    return cached
@@ -0,0 +1,144 @@
+import re
+import threading
+from typing import Dict, Optional
+
+# Queries must open like a search to be routed ("Who works at ...", "GT alumni at ...", "Find people in ...")
+SEARCH_LEAD = re.compile(
+    r"^\s*(?:who|which\s+(?:alumni|people|students|graduates)|find|show(?:\s+me)?|list|search(?:\s+for)?|any|"
+    r"(?:gt\s+|georgia\s+tech\s+)?(?:alumni|graduates|grads|people|students))\b",
+    re.IGNORECASE,
+)
+
+# Anything the canonical templates below cannot express goes to the query_or_respond LLM instead
+NEEDS_LLM = re.compile(
+    r"\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|"
+    r"nov(?:ember)?|dec(?:ember)?|\d{4}|during|since|until|before|after|from|between|as\s+of|with|skills?|"
+    r"experiences?|how|what|why|tell|hi|hello|hey|thanks?)\b|'s\b",
+    re.IGNORECASE,
+)
+
+FUTURE_TENSE = re.compile(r"\b(?:will|incoming|plans?\s+to|going\s+to|upcoming)\b", re.IGNORECASE)
+PAST_TENSE = re.compile(r"\b(?:worked|previously|formerly|used\s+to|was|were|interned|past)\b", re.IGNORECASE)
+
+# Words allowed before the first slot; anything else there (e.g. "incoming intern") would be lost by the template
+LEAD_FILLER = {
+    "who", "which", "find", "show", "me", "list", "search", "for", "any", "all", "the", "gt", "georgia", "tech",
+    "alumni", "graduates", "grads", "people", "students", "is", "are", "was", "were", "will", "be", "work", "works",
+    "worked", "working", "currently", "presently", "now", "previously", "formerly", "incoming", "upcoming",
+}
+
+# Tense and time words, which say when rather than who; they are cut off the end of slot values ("at Google now")
+TIME_WORDS = {"currently", "presently", "now", "today", "previously", "formerly", "incoming", "upcoming", "present", "past"}
+
+# Slot keywords; a slot value runs until the next keyword or the end of the message
+SLOT_KEYWORDS = re.compile(r"\s(at|in|as(?:\s+an?)?)\s", re.IGNORECASE)
+
+
+PRESENT_TENSE = re.compile(r"\b(?:currently|presently|now|present|current|today)\b", re.IGNORECASE)
+
+# The verb of each tense in a canonical query; a message without a tense word gets the plain "works",
+# which no time window reads as "currently"
+TENSE_VERBS = {"future": "will work", "past": "worked", "present": "presently works", None: "works"}
+
+# The queries FastPathRouter produces, read back into their slots
+CANONICAL_QUERY = re.compile(
+    r"^Who (?:presently works|works|worked|will work)(?: as (?P<as>.+?))?(?: at (?P<at>.+?))?(?: in (?P<in>.+?))?\?$"
+)
+
+
+def tense(message: str) -> Optional[str]:
+    """"future", "past" or "present": which jobs a search message asks about; None if it does not say."""
+    if FUTURE_TENSE.search(message):
+        return "future"
+    if PAST_TENSE.search(message):
+        return "past"
+    if PRESENT_TENSE.search(message):
+        return "present"
+    return None
+
+
+def canonical_slots(query: str) -> Dict[str, str]:
+    """Return the role ("as"), company ("at") and location ("in") of a canonical query; {} for other queries."""
+    match = CANONICAL_QUERY.match(query or "")
+    if not match:
+        return {}
+    return {slot: value for slot, value in match.groupdict().items() if value}
+
+
+class FastPathRouter:
+    """
+    Cheap local router in front of the graph. Plain searches ("who works at Amazon",
+    "GT alumni at Google in Atlanta") are rewritten into a canonical query with a template,
+    so the graph can call the retrieve tool without the query_or_respond LLM hop.
+    Everything else returns None and keeps going through the LLM.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.fallback = 0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    def route(self, message: str) -> Optional[str]:
+        """Return a canonical search query for `message`, or None if the LLM should handle it."""
+        canonical = self.canonicalize(message)
+        with self._lock:
+            if canonical is None:
+                self.fallback += 1
+            else:
+                self.routed += 1
+        return canonical
+
+    def record_llm_latency(self, seconds: float):
+        """Record how long a query_or_respond LLM call took, to estimate what each routed query saves."""
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.routed + self.fallback
+            avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+            return {
+                "routed": self.routed,
+                "fallback": self.fallback,
+                "hit_rate": self.routed / total if total else 0.0,
+                "avg_llm_latency_ms": avg_llm * 1000,
+                "estimated_latency_saved_ms": self.routed * avg_llm * 1000,
+            }
+
+    def canonicalize(self, message: str) -> Optional[str]:
+        """The canonical query for `message`, or None; unlike route(), not counted in the stats."""
+        text = " ".join(str(message).split()).rstrip("?.! ")
+        if not text or not SEARCH_LEAD.match(text) or NEEDS_LLM.search(text) or "\n" in str(message):
+            return None
+
+        slots = {}
+        parts = SLOT_KEYWORDS.split(f" {text} ")
+        # parts = [lead, keyword, value, keyword, value, ...]
+        for keyword, value in zip(parts[1::2], parts[2::2]):
+            slot = keyword.split()[0].lower()
+            words = value.strip(" ,").split()
+            while words and words[-1].lower().strip(",") in TIME_WORDS:
+                words.pop()
+            value = " ".join(words).strip(" ,")
+            if not value or slot in slots:
+                return None
+            slots[slot] = value
+
+        if not slots or any(word.lower() not in LEAD_FILLER for word in parts[0].split()):
+            return None
+        # "in software engineering" is a field, not a location; only accept place names written as such
+        location = slots.get("in")
+        if location and not all(word[0].isupper() for word in location.replace(",", " ").split()):
+            return None
+
+        query = f"Who {TENSE_VERBS[tense(text)]}"
+        if "as" in slots:
+            query += f" as {slots['as']}"
+        if "at" in slots:
+            query += f" at {slots['at']}"
+        if "in" in slots:
+            query += f" in {slots['in']}"
+        return query + "?"
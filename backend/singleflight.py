@@ -0,0 +1,97 @@
+"""
+Request coalescing ("single-flight") for identical concurrent requests.
+
+While a call for a key is in flight, further calls with the same key wait for it and share its
+result instead of starting their own. The shared work runs as its own task, so a caller that
+disconnects does not cancel it for the others. Once it finishes, the key is free again; the
+response cache serves repeats from then on.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+class SingleFlight:
+    """Coalesces concurrent `do` calls and `stream` subscriptions by key, on one event loop."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, "_Broadcast"] = {}
+        self.counters = {"executions": 0, "coalesced": 0}
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "in_flight": len(self._calls) + len(self._streams)}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of `fn()`, shared with every concurrent call for `key`."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.counters["executions"] += 1
+        else:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def stream(self, key: str, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Iterate over the items of `fn()`, shared with every concurrent subscriber for `key`.
+        A subscriber that joins late first receives the items produced so far.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = self._streams[key] = _Broadcast()
+            broadcast.task = asyncio.ensure_future(self._pump(key, broadcast, fn))
+            self.counters["executions"] += 1
+        else:
+            self.counters["coalesced"] += 1
+        return broadcast.subscribe()
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def _pump(self, key: str, broadcast: "_Broadcast", fn: Callable[[], AsyncIterator[Any]]):
+        try:
+            async for item in fn():
+                broadcast.items.append(item)
+                await broadcast.notify()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            # New requests from here on start a fresh call
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            broadcast.done = True
+            await broadcast.notify()
+
+
+class _Broadcast:
+    """Items of one shared stream, replayed to every subscriber."""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    async def notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        sent = 0
+        while True:
+            while sent < len(self.items):
+                yield self.items[sent]
+                sent += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.done or sent < len(self.items))
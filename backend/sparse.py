@@ -0,0 +1,64 @@
+"""
+Locally computed BM25-style sparse vectors for keyword matching.
+
+Tokens are hashed into sparse vector indices with CRC32, so no vocabulary has to be stored or
+kept in sync between ingestion and queries. Document vectors hold the BM25 term-frequency part
+(saturated and length-normalized); the collection's sparse vector config uses Qdrant's IDF
+modifier, which supplies the inverse document frequency at query time. Query vectors weight
+each distinct term 1.
+"""
+import re
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+SPARSE_VECTOR_NAME = "bm25"
+
+# BM25 parameters; chunks are short and fairly uniform, so a fixed average length is good enough
+K1 = 1.2
+B = 0.75
+AVG_DOC_TOKENS = 60
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Field labels repeat in every chunk and the rest carry no meaning on their own
+STOPWORDS = {
+    "a", "s", "an", "and", "as", "at", "by", "for", "from", "in", "is", "of", "on", "or", "the", "to", "with",
+    "who", "what", "which", "work", "works", "worked", "working", "name", "role", "company", "location",
+    "duration", "description", "type", "school", "degree", "unknown", "none", "present",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def token_index(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def _to_sparse(weights: Counter) -> Tuple[List[int], List[float]]:
+    # Distinct tokens can collide on the same index; their weights add up
+    merged: Counter = Counter()
+    for token, weight in weights.items():
+        merged[token_index(token)] += weight
+    indices = sorted(merged)
+    return indices, [float(merged[index]) for index in indices]
+
+
+def document_vector(text: str):
+    """Sparse BM25 term-frequency vector for a chunk, as a Qdrant SparseVector."""
+    from qdrant_client.models import SparseVector
+
+    tokens = tokenize(text)
+    counts = Counter(tokens)
+    norm = K1 * (1 - B + B * len(tokens) / AVG_DOC_TOKENS)
+    indices, values = _to_sparse(Counter({token: tf * (K1 + 1) / (tf + norm) for token, tf in counts.items()}))
+    return SparseVector(indices=indices, values=values)
+
+
+def query_vector(text: str):
+    """Sparse vector for a query: weight 1 for every distinct term."""
+    from qdrant_client.models import SparseVector
+
+    indices, values = _to_sparse(Counter(dict.fromkeys(tokenize(text), 1.0)))
+    return SparseVector(indices=indices, values=values)
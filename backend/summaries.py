@@ -0,0 +1,167 @@
+"""
+Precomputed per-alumnus summaries.
+
+Ingestion turns every profile into a compact structured record (current role and company,
+other companies, school and major, a one-line bio) and keeps it in a SQLite key-value store,
+keyed by profile id and tagged with the profile's content hash so unchanged profiles are
+skipped on the next run. For plain lookups ("who works at Amazon") the request path assembles
+the `alumni` answer from these records instead of asking the LLM to summarize the chunks.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+# How many earlier companies the one-line bio mentions
+BIO_PREVIOUS_COMPANIES = 3
+
+
+def _known(value: Any) -> Optional[str]:
+    value = str(value or "").strip()
+    return value if value and value.lower() not in ("unknown", "none") else None
+
+
+def profile_content_hash(profile: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_summary(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Structured summary of one raw profile, as scraped into profile_data.json."""
+    name = _known(profile.get("name")) or "This alumnus"
+    experiences = profile.get("experiences") or []
+    educations = profile.get("educations") or []
+
+    current = next((exp for exp in experiences if str(exp.get("end_date") or "").strip().lower() == "present"), None)
+    companies: List[str] = []
+    for exp in experiences:
+        company = _known(exp.get("company"))
+        if company and company not in companies:
+            companies.append(company)
+    # Georgia Tech is what students search by; fall back to the most recent school
+    education = next((edu for edu in educations if "georgia" in str(edu.get("school") or "").lower()),
+                     educations[0] if educations else {})
+
+    record = {
+        "id": profile.get("id"),
+        "name": name,
+        "headline": _known(profile.get("headline")),
+        "current_role": _known(current.get("title")) if current else None,
+        "current_company": _known(current.get("company")) if current else None,
+        "companies": companies,
+        "school": _known(education.get("school")),
+        "major": _known(education.get("major")),
+        "degree": _known(education.get("degree")),
+    }
+
+    if record["current_role"] and record["current_company"]:
+        bio = f"{name} is {record['current_role']} at {record['current_company']}."
+    elif record["headline"]:
+        bio = f"{name}: {record['headline'].rstrip('.')}."
+    else:
+        bio = f"{name}."
+    if record["school"]:
+        studied = " ".join(filter(None, [record["degree"], record["major"] and f"in {record['major']}"]))
+        bio += f" Studied {studied} at {record['school']}." if studied else f" Studied at {record['school']}."
+    previous = [company for company in companies if company != record["current_company"]][:BIO_PREVIOUS_COMPANIES]
+    if previous:
+        bio += f" Experience at {', '.join(previous).rstrip('.')}."
+    record["bio"] = bio
+    return record
+
+
+class SummaryStore:
+    """SQLite key-value store of summary records, keyed by profile id."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries (profile_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, record TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def get_many(self, profile_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        profile_ids = list(dict.fromkeys(profile_ids))
+        if not profile_ids:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT profile_id, record FROM summaries WHERE profile_id IN ({','.join('?' * len(profile_ids))})", profile_ids
+            ).fetchall()
+        return {profile_id: json.loads(record) for profile_id, record in rows}
+
+    def refresh(self, profiles: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Rebuild the records of new and changed profiles and drop those of removed profiles.
+        `profiles` is read once, as it streams in; only ids and hashes are kept in memory.
+        """
+        with self._lock:
+            existing = dict(self._db.execute("SELECT profile_id, content_hash FROM summaries").fetchall())
+            current: Dict[str, str] = {}
+
+            def changed_rows():
+                for profile in profiles:
+                    profile_id = profile.get("id")
+                    if not profile_id:
+                        continue
+                    digest = profile_content_hash(profile)
+                    # A profile that appears twice in the data keeps its last copy
+                    if current.get(profile_id, existing.get(profile_id)) != digest:
+                        yield profile_id, digest, json.dumps(build_summary(profile))
+                    current[profile_id] = digest
+
+            self._db.executemany("INSERT OR REPLACE INTO summaries (profile_id, content_hash, record) VALUES (?, ?, ?)", changed_rows())
+            updated = sum(existing.get(profile_id) != digest for profile_id, digest in current.items())
+            removed = [(profile_id,) for profile_id in existing if profile_id not in current]
+            self._db.executemany("DELETE FROM summaries WHERE profile_id = ?", removed)
+            self._db.commit()
+        return {"updated": updated, "removed": len(removed)}
+
+    def update(self, profiles: Iterable[Dict[str, Any]], removed_ids: Iterable[str]) -> Dict[str, int]:
+        """Rebuild the records of `profiles` that changed and drop those of `removed_ids`; other records are left alone."""
+        with self._lock:
+            updated = 0
+            for profile in profiles:
+                profile_id = profile.get("id")
+                if not profile_id:
+                    continue
+                digest = profile_content_hash(profile)
+                row = self._db.execute("SELECT content_hash FROM summaries WHERE profile_id = ?", (profile_id,)).fetchone()
+                if row is None or row[0] != digest:
+                    self._db.execute("INSERT OR REPLACE INTO summaries (profile_id, content_hash, record) VALUES (?, ?, ?)",
+                                     (profile_id, digest, json.dumps(build_summary(profile))))
+                    updated += 1
+            removed = self._db.executemany("DELETE FROM summaries WHERE profile_id = ?", [(profile_id,) for profile_id in removed_ids]).rowcount
+            self._db.commit()
+        return {"updated": updated, "removed": removed}
+
+
+def assemble_answer(docs: List[Document], slots: Dict[str, str], store: SummaryStore) -> Optional[str]:
+    """
+    Build the generate answer for a plain lookup from precomputed summaries: every retrieved
+    alumnus whose chunks mention each requested slot value (role, company, location) is listed
+    with their bio and the matching experience. Returns None when the answer should come from
+    the LLM instead: no slots, no matching alumni, or summaries missing for any of them.
+    """
+    if not slots:
+        return None
+    wanted = [value.lower() for value in slots.values()]
+    matching = [doc for doc in docs if all(value in doc.page_content.lower() for value in wanted)]
+    records = store.get_many(doc.metadata.get("id") for doc in matching)
+    if not matching or any(doc.metadata.get("id") not in records for doc in matching):
+        return None
+
+    alumni = []
+    for doc in matching:
+        metadata = doc.metadata
+        summary = records[metadata["id"]]["bio"]
+        role, company = _known(metadata.get("role")), _known(metadata.get("company"))
+        # The best chunk is only worth quoting if it is the experience the question asked about
+        if role and company and slots.get("at", company).lower() in company.lower():
+            duration = _known(metadata.get("work_duration"))
+            summary += f" Matching experience: {role} at {company}" + (f" ({duration})." if duration else ".")
+        alumni.append({"name": metadata.get("name"), "summary": summary, "id": metadata.get("id"), "pic": metadata.get("profile_pic")})
+    return json.dumps({"alumni": alumni})
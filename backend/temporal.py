@@ -0,0 +1,125 @@
+"""
+Month-ordinal time intervals for experience and education chunks.
+
+Durations such as "Aug 2024 to Present" are stored at ingestion as integer payload fields
+`start_month`/`end_month` (year * 12 + month index), with unknown starts mapped to 0 and
+"Present"/"Unknown" ends mapped to OPEN_END. At query time the time period in the user
+query becomes a window, and the vector search only returns chunks whose interval overlaps it.
+"""
+import re
+from datetime import date
+from typing import Optional, Tuple
+
+OPEN_START = 0
+OPEN_END = 9999 * 12
+
+MONTHS = {
+    "jan": 0, "feb": 1, "mar": 2, "apr": 3, "may": 4, "jun": 5,
+    "jul": 6, "aug": 7, "sep": 8, "oct": 9, "nov": 10, "dec": 11,
+}
+OPEN_ENDED = {"present", "now", "current", "currently", "today", "unknown"}
+
+# Years an alumnus' experience can plausibly start or end in; other four-digit numbers are not dates
+MIN_YEAR = 1950
+MAX_YEAR_AHEAD = 10
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_YEAR = r"\b(?:19|20)\d{2}\b"
+MONTH_DATE_PATTERN = rf"(?:{_MONTH}\s+{_YEAR})"
+DATE_PATTERN = rf"(?:{_MONTH}\s+{_YEAR}|{_YEAR})"
+
+CURRENT_PATTERN = re.compile(r"\b(?:currently|presently|present|now|current|today)\b", re.IGNORECASE)
+RANGE_PATTERN = re.compile(rf"\b(?:from|between)\s+({DATE_PATTERN})\s+(?:to|and|until|-)\s+({DATE_PATTERN}|present|now)", re.IGNORECASE)
+AFTER_PATTERN = re.compile(rf"\b(?:after|since|starting)\s+({DATE_PATTERN})", re.IGNORECASE)
+BEFORE_PATTERN = re.compile(rf"\b(?:before|until|prior\s+to)\s+({DATE_PATTERN})", re.IGNORECASE)
+# "at"/"on" mostly introduce companies and places ("at 1800 Contacts"), so they need a month before the year
+POINT_PATTERN = re.compile(rf"\b(?:(?:in|during|as\s+of)\s+({DATE_PATTERN})|(?:on|at)\s+({MONTH_DATE_PATTERN}))", re.IGNORECASE)
+
+
+def month_ordinal(year: int, month_index: int) -> int:
+    return year * 12 + month_index
+
+
+def parse_month(text: Optional[str], end_of_period: bool = False) -> Optional[int]:
+    """
+    Parse "Aug 2024", "August 2024" or "2024" into a month ordinal. A bare year means January,
+    or December with `end_of_period`. Returns None for anything else, including years outside
+    MIN_YEAR to MAX_YEAR_AHEAD years from now.
+    """
+    if not text:
+        return None
+    match = re.fullmatch(rf"\s*(?:({_MONTH})\s+)?({_YEAR})\s*", text, re.IGNORECASE)
+    if not match:
+        return None
+    year = int(match.group(2))
+    if not MIN_YEAR <= year <= date.today().year + MAX_YEAR_AHEAD:
+        return None
+    if match.group(1):
+        return month_ordinal(year, MONTHS[match.group(1)[:3].lower()])
+    return month_ordinal(year, 11 if end_of_period else 0)
+
+
+def duration_bounds(duration: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Turn a stored "<start> to <end>" duration into (start_month, end_month). Open ends become
+    OPEN_START/OPEN_END; returns None when neither end is known.
+    """
+    if not duration or " to " not in duration:
+        return None
+    start_text, end_text = duration.split(" to ", 1)
+    start = parse_month(start_text)
+    end_text = end_text.strip().lower()
+    end = OPEN_END if end_text in OPEN_ENDED else parse_month(end_text, end_of_period=True)
+    if start is None and (end is None or end_text == "unknown"):
+        return None
+    return (OPEN_START if start is None else start, OPEN_END if end is None else end)
+
+
+def time_window(query: str, today: Optional[date] = None) -> Optional[Tuple[int, int]]:
+    """Extract the time period of a query as an inclusive (first_month, last_month) window, or None."""
+    today = today or date.today()
+    now = month_ordinal(today.year, today.month - 1)
+
+    # A pattern whose dates do not parse (an implausible year) falls through to the next one
+    match = RANGE_PATTERN.search(query)
+    if match:
+        start = parse_month(match.group(1))
+        end = now if match.group(2).lower() in OPEN_ENDED else parse_month(match.group(2), end_of_period=True)
+        if start is not None and end is not None:
+            return (start, end)
+    match = AFTER_PATTERN.search(query)
+    if match and parse_month(match.group(1)) is not None:
+        return (parse_month(match.group(1)), OPEN_END)
+    match = BEFORE_PATTERN.search(query)
+    if match and parse_month(match.group(1)) is not None:
+        return (OPEN_START, parse_month(match.group(1)))
+    match = POINT_PATTERN.search(query)
+    point = match and (match.group(1) or match.group(2))
+    if point and parse_month(point) is not None:
+        return (parse_month(point), parse_month(point, end_of_period=True))
+    if CURRENT_PATTERN.search(query):
+        return (now, now)
+    return None
+
+
+def describe_window(window: Tuple[int, int]) -> str:
+    def label(ordinal: int) -> str:
+        if ordinal >= OPEN_END:
+            return "Present"
+        return date(ordinal // 12, ordinal % 12 + 1, 1).strftime("%B %Y")
+
+    start, end = window
+    if start == OPEN_START:
+        return f"before {label(end)}"
+    return label(start) if start == end else f"{label(start)} to {label(end)}"
+
+
+def build_time_filter(window: Tuple[int, int], metadata_key: str = "metadata"):
+    """Qdrant filter keeping chunks whose [start_month, end_month] interval overlaps `window`."""
+    from qdrant_client import models
+
+    first, last = window
+    return models.Filter(must=[
+        models.FieldCondition(key=f"{metadata_key}.start_month", range=models.Range(lte=last)),
+        models.FieldCondition(key=f"{metadata_key}.end_month", range=models.Range(gte=first)),
+    ])
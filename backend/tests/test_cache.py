@@ -0,0 +1,60 @@
+import pytest
+
+from cache import ResponseCache, normalize_message
+
+SCOPE = (None, None, (("at", "Google"),))
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(max_entries=8, ttl_seconds=60, similarity_threshold=0.9)
+
+
+def test_normalize_message():
+    assert normalize_message("  Who works   at Google?! ") == "who works at google"
+
+
+def test_exact_tier(cache):
+    cache.put("who works at google", None, "answer", cache.generation)
+    assert cache.get("who works at google") == "answer"
+    assert cache.get("who works at amazon") is None
+    # Without a vector the entry never reaches the semantic tier
+    assert cache.get_similar([1.0, 0.0], None) is None
+
+
+def test_semantic_hit_needs_the_same_scope(cache):
+    cache.put("who works at google", [1.0, 0.0], "answer", cache.generation, SCOPE)
+    assert cache.get_similar([0.99, 0.05], SCOPE) == "answer"
+    # "worked" embeds almost like "works" but asks about other jobs
+    assert cache.get_similar([0.99, 0.05], ("past", None, (("at", "Google"),))) is None
+    assert cache.get_similar([0.0, 1.0], SCOPE) is None
+
+
+def test_lookup_without_a_vector_counts_a_miss(cache):
+    cache.put("who works at google", [1.0, 0.0], "answer", cache.generation, SCOPE)
+    assert cache.get_similar(None, SCOPE) is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (0, 1)
+
+
+def test_invalidate_drops_entries_and_rejects_stale_puts(cache):
+    generation = cache.generation
+    cache.put("who works at google", [1.0, 0.0], "old answer", generation, SCOPE)
+    cache.invalidate()
+    assert cache.generation == generation + 1
+    assert cache.get("who works at google") is None
+    assert cache.get_similar([1.0, 0.0], SCOPE) is None
+
+    # An answer computed before the invalidation must not come back
+    cache.put("who works at google", [1.0, 0.0], "old answer", generation, SCOPE)
+    assert cache.get("who works at google") is None
+    cache.put("who works at google", [1.0, 0.0], "new answer", cache.generation, SCOPE)
+    assert cache.get("who works at google") == "new answer"
+
+
+def test_entries_are_lru_bounded(cache):
+    for i in range(10):
+        cache.put(f"message {i}", [1.0, float(i)], i, cache.generation)
+    assert cache.get("message 0") is None
+    assert cache.get("message 9") == 9
+    assert cache.stats()["exact_entries"] == 8
@@ -0,0 +1,60 @@
+import pytest
+
+from router import FastPathRouter, canonical_slots, tense
+
+
+@pytest.fixture
+def router():
+    return FastPathRouter()
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("Who works at Google?", "Who works at Google?"),
+    ("GT alumni at Amazon", "Who works at Amazon?"),
+    ("Who worked at Microsoft", "Who worked at Microsoft?"),
+    ("who will work at Meta in Atlanta", "Who will work at Meta in Atlanta?"),
+    ("Find alumni at Capital One in Atlanta", "Who works at Capital One in Atlanta?"),
+    ("Who presently works as a Software Engineer at Google", "Who presently works as Software Engineer at Google?"),
+])
+def test_canonicalize_plain_searches(router, message, expected):
+    assert router.canonicalize(message) == expected
+
+
+def test_no_tense_word_means_no_tense(router):
+    assert tense("GT alumni at Google") is None
+    # "presently" would make temporal.time_window narrow the search to current jobs
+    assert "presently" not in router.canonicalize("GT alumni at Google")
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("Who works at Google now", "Who presently works at Google?"),
+    ("alumni at Meta, currently", "Who presently works at Meta?"),
+    ("Who worked at Amazon previously", "Who worked at Amazon?"),
+])
+def test_trailing_tense_words_stay_out_of_slots(router, message, expected):
+    assert router.canonicalize(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "Who worked at Google during May 2024 with skills in Google Ads?",
+    "Find alumni in software engineering",
+    "Yihao Mai's experience at IBM",
+    "hello",
+    "Who are the incoming interns",
+])
+def test_falls_back_to_the_llm(router, message):
+    assert router.canonicalize(message) is None
+
+
+def test_canonical_slots_round_trip(router):
+    query = router.canonicalize("Who worked as a Data Analyst at Google in New York")
+    assert canonical_slots(query) == {"as": "Data Analyst", "at": "Google", "in": "New York"}
+    assert canonical_slots("Who is hiring?") == {}
+
+
+def test_canonicalize_is_not_counted(router):
+    router.canonicalize("Who works at Google?")
+    router.route("Who works at Google?")
+    router.route("hello")
+    stats = router.stats()
+    assert (stats["routed"], stats["fallback"]) == (1, 1)
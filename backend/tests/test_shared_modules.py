@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+@pytest.mark.parametrize("module", ["linkedin_urls.py", "profile_stream.py"])
+def test_data_copy_matches_backend(module):
+    # The scripts in data/ import their own copy; profiles must be keyed and read the same on both sides
+    with open(os.path.join(ROOT, "backend", module), encoding="utf-8") as backend, open(os.path.join(ROOT, "data", module), encoding="utf-8") as data:
+        assert data.read() == backend.read(), f"data/{module} differs from backend/{module}"
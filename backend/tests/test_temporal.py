@@ -0,0 +1,50 @@
+from datetime import date
+
+import pytest
+
+from temporal import OPEN_END, OPEN_START, duration_bounds, month_ordinal, time_window
+
+TODAY = date(2025, 3, 15)
+NOW = month_ordinal(2025, 2)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Who worked at Google in 2020", (month_ordinal(2020, 0), month_ordinal(2020, 11))),
+    ("Who worked at Google during May 2024", (month_ordinal(2024, 4), month_ordinal(2024, 4))),
+    ("Who was at Amazon on May 2021", (month_ordinal(2021, 4), month_ordinal(2021, 4))),
+    ("as of 2023", (month_ordinal(2023, 0), month_ordinal(2023, 11))),
+    ("from Jan 2018 to Dec 2020", (month_ordinal(2018, 0), month_ordinal(2020, 11))),
+    ("from January 2020 to present", (month_ordinal(2020, 0), NOW)),
+    ("since 2019", (month_ordinal(2019, 0), OPEN_END)),
+    ("before March 2022", (OPEN_START, month_ordinal(2022, 2))),
+    ("Who works at Google now", (NOW, NOW)),
+])
+def test_time_windows(query, expected):
+    assert time_window(query, today=TODAY) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "Who works at 1800 Contacts?",
+    "Alumni in 30332 area",
+    "Who works at 2020 Companies?",
+    "Who worked there in 1700",
+    "in 2099",
+    "Who works at Google?",
+])
+def test_no_window_without_a_plausible_date(query):
+    assert time_window(query, today=TODAY) is None
+
+
+def test_an_implausible_date_falls_through_to_the_next_pattern():
+    assert time_window("Who currently works at 1800 Contacts", today=TODAY) == (NOW, NOW)
+
+
+@pytest.mark.parametrize("duration, expected", [
+    ("Aug 2024 to Present", (month_ordinal(2024, 7), OPEN_END)),
+    ("2019 to 2021", (month_ordinal(2019, 0), month_ordinal(2021, 11))),
+    ("Unknown to Dec 2020", (OPEN_START, month_ordinal(2020, 11))),
+    ("Unknown to Unknown", None),
+    (None, None),
+])
+def test_duration_bounds(duration, expected):
+    assert duration_bounds(duration) == expected
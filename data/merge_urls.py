@@ -1,26 +1,110 @@
+'''
+Merge scraped profile URL lists into one CSV of profiles that still need scraping.
+
+URLs are canonicalized first (linkedin_urls.py), so variants of one profile (trailing slash,
+query string, locale subdomain, case) count as one. Every URL ever merged is remembered in a
+SQLite seen-set together with whether it has been scraped, so a new batch is deduplicated
+against all earlier batches without loading them into memory. A URL only counts as scraped
+once it is in a scraper output file passed with --scraped (the NDJSON checkpoint of
+profile_data_scrapping.py), so URLs whose scrape failed or never ran stay in the output of
+every merge until a scrape succeeds. The input CSVs are streamed row by row.
+
+Usage (from data/):
+	python merge_urls.py urls-1.csv urls-2.csv [--scraped profile_data_6.ndjson ...] [--out merged_urls.csv] [--seen seen_urls.sqlite3]
+'''
+import argparse
 import csv
+import json
+import os
+import sqlite3
+import time
+
+# A copy of backend/linkedin_urls.py, so URLs are keyed the same way as in backend/ingest.py
+from linkedin_urls import normalize_profile_url
+
+SEEN_PATH = 'seen_urls.sqlite3'
+
 
+def open_seen(seen_path):
+	'''The seen-set; `scraped` is when a URL was first found in a scraper output file, NULL until then'''
+	db = sqlite3.connect(seen_path)
+	db.execute('CREATE TABLE IF NOT EXISTS seen (url TEXT PRIMARY KEY, first_seen REAL NOT NULL, source TEXT NOT NULL, scraped REAL) WITHOUT ROWID')
+	if 'scraped' not in [column[1] for column in db.execute('PRAGMA table_info(seen)')]:
+		# Seen-sets written before scrapes were tracked: nothing is known to be scraped yet
+		db.execute('ALTER TABLE seen ADD COLUMN scraped REAL')
+	return db
 
-def merge_urls(*csv_paths):
+
+def scraped_urls(ndjson_path):
+	'''Canonical URLs of the profiles in a scraper output file; a line cut off by a crash is ignored'''
+	with open(ndjson_path, encoding='utf-8') as f:
+		for line in f:
+			try:
+				url = normalize_profile_url(json.loads(line)['id'])
+			except (ValueError, KeyError, TypeError):
+				continue
+			if url is not None:
+				yield url
+
+
+def merge_urls(*csv_paths, output_csv='merged_urls.csv', seen_path=SEEN_PATH, scraped_paths=()):
 	'''
 	Merge URLs from multiple CSV files into a single CSV file.
 	Args:
 		csv_paths: A list of paths to CSV files.
+		output_csv: Where to write every canonical URL merged so far that has not been scraped.
+		seen_path: SQLite file of every URL merged so far.
+		scraped_paths: Scraper NDJSON output files whose profiles count as scraped.
+	Returns:
+		Counts of new, duplicate, invalid, newly scraped and still unscraped URLs.
 	'''
-	output_csv = 'merged_urls.csv'
-	urls = set()
-	with open(output_csv, 'w', newline='', encoding='utf-8') as f:
-		writer = csv.writer(f)
-		writer.writerow(['url'])
+	counts = {'new': 0, 'duplicate': 0, 'invalid': 0, 'scraped': 0, 'pending': 0}
+	db = open_seen(seen_path)
+	now = time.time()
+	partial = f'{output_csv}.partial'
+	try:
+		for scraped_path in scraped_paths:
+			for url in scraped_urls(scraped_path):
+				cursor = db.execute(
+					'INSERT INTO seen (url, first_seen, source, scraped) VALUES (?, ?, ?, ?) '
+					'ON CONFLICT (url) DO UPDATE SET scraped = excluded.scraped WHERE scraped IS NULL',
+					(url, now, os.path.basename(scraped_path), now),
+				)
+				counts['scraped'] += cursor.rowcount
 		for csv_path in csv_paths:
-			with open(csv_path, 'r', newline='', encoding='utf-8') as f2:
-				reader = csv.reader(f2)
-				next(reader)
+			with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+				reader = csv.reader(f)
+				next(reader, None)
 				for row in reader:
-					url = row[0]
-					if url not in urls:
-						urls.add(url)
-						writer.writerow([url])
-					else:
-						print(f"Duplicate URL: {url}")
-	print(f"Final CSV file length: {len(urls)}")
\ No newline at end of file
+					url = normalize_profile_url(row[0]) if row else None
+					if url is None:
+						counts['invalid'] += 1
+						continue
+					cursor = db.execute('INSERT OR IGNORE INTO seen (url, first_seen, source) VALUES (?, ?, ?)', (url, now, os.path.basename(csv_path)))
+					counts['new' if cursor.rowcount else 'duplicate'] += 1
+		with open(partial, 'w', newline='', encoding='utf-8') as f:
+			writer = csv.writer(f)
+			writer.writerow(['url'])
+			for (url,) in db.execute('SELECT url FROM seen WHERE scraped IS NULL ORDER BY first_seen, url'):
+				writer.writerow([url])
+				counts['pending'] += 1
+		# Publish the output before committing, so a crash in between repeats URLs rather than losing them
+		os.replace(partial, output_csv)
+		db.commit()
+	finally:
+		db.close()
+		if os.path.exists(partial):
+			os.remove(partial)
+	print(f"Final CSV file length: {counts['pending']} URLs to scrape ({counts['new']} new, {counts['duplicate']} duplicates, "
+	      f"{counts['invalid']} not profile URLs, {counts['scraped']} newly marked scraped)")
+	return counts
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('csv_paths', nargs='+', help='CSV files with a header row and the URL in the first column')
+	parser.add_argument('--out', default='merged_urls.csv')
+	parser.add_argument('--seen', default=SEEN_PATH, help='SQLite seen-set kept across runs')
+	parser.add_argument('--scraped', nargs='*', default=[], help='scraper NDJSON output files; their profiles are not listed again')
+	args = parser.parse_args()
+	merge_urls(*args.csv_paths, output_csv=args.out, seen_path=args.seen, scraped_paths=args.scraped)
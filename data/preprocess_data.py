@@ -2,32 +2,37 @@ import os
 import csv
 import json
 
+# A copy of backend/profile_stream.py, the streaming JSON reader ingest.py uses
+from profile_stream import iter_json_values, write_ndjson
+
 class Preprocessor:
     def __init__(self, raw_data_path: str, processed_data_path: str):
         self.raw_data_path = raw_data_path
         self.processed_data_path = processed_data_path
 
     def convert_to_json(self):
-        """Convert all raw user profile data CSV files to one raw JSON file"""
-        profile_data = []
-        for file in os.listdir(self.raw_data_path):
+        """Convert all raw user profile data CSV files to one NDJSON file, one profile per line, in a single pass"""
+        profiles = self.concate_data(self.iter_csv_profiles(), 'old_profile_data_no_ai.json')
+        count = write_ndjson(profiles, os.path.join(self.raw_data_path, 'profile_data.ndjson'))
+        print(f"Converted {count} profiles to NDJSON")
+
+    def iter_csv_profiles(self):
+        """Yield the profile of every row of the raw CSV files, one row at a time"""
+        # A profile with long descriptions can exceed the default CSV field size
+        csv.field_size_limit(1 << 24)
+        for file in sorted(os.listdir(self.raw_data_path)):
             if file.endswith('.csv'):
-                with open(os.path.join(self.raw_data_path, file), 'r') as f:
+                with open(os.path.join(self.raw_data_path, file), 'r', newline='', encoding='utf-8') as f:
                     reader = csv.reader(f)
                     next(reader)
                     for row in reader:
-                        data = json.loads(row[1])
-                        profile_data.append(data)
-        profile_data = self.concate_data(profile_data, 'old_profile_data_no_ai.json')
-        with open(os.path.join(self.raw_data_path, 'profile_data.json'), 'w') as f:
-            json.dump(profile_data, f)
-        print(f"Converted {len(profile_data)} profiles to JSON")
+                        yield json.loads(row[1])
 
-    def concate_data(self, profile_data: list[dict], old_profile_data_file_name: str):
-        """Concatenate profile data scraped withour AI with profile data scraped with AI into one JSON file"""
-        old_profile_data = json.load(open(os.path.join(self.raw_data_path, old_profile_data_file_name), 'r'))
-        profile_data += old_profile_data
-        return profile_data
+    def concate_data(self, profile_data, old_profile_data_file_name: str):
+        """Follow the profile data scraped with AI by the profile data scraped without AI, streaming both"""
+        yield from profile_data
+        with open(os.path.join(self.raw_data_path, old_profile_data_file_name), 'r', encoding='utf-8') as f:
+            yield from iter_json_values(f)
 
 if __name__ == '__main__':
     preprocessor = Preprocessor('data/raw-profile-data', 'data/clean-profile-data')
@@ -1,17 +1,34 @@
-import agentql
-from playwright.sync_api import sync_playwright, Geolocation
-import asyncio
-import time
-import csv
-import json
-import random
-
 '''
+Scrape LinkedIn profiles with Playwright and AgentQL.
+
+One browser context is logged in per account in accounts.json (at most --max-contexts), and
+the contexts take URLs from a shared queue concurrently. Every finished profile is appended to
+the NDJSON output file right away, so a crash loses at most the profiles in progress, and a
+rerun skips the URLs already in the file. Pages are read as soon as they are ready instead of
+after fixed sleeps, and progress is reported in pages/minute.
+
 Preqrequisites
 Run:
     1) pip install agentql
     2) agentql init - provide your API key
+
+Usage (from data/):
+    python profile_data_scrapping.py --urls merged_urls.csv --out profile_data_6.ndjson [--start 111 --stop 154]
+
+To try it without LinkedIn, serve fixture profiles locally (AgentQL still extracts the data):
+    python scrape_fixture_server.py --profiles 20 --write-urls fixture_urls.csv
+    python profile_data_scrapping.py --urls fixture_urls.csv --base-url http://localhost:8765 --out fixture_profiles.ndjson
 '''
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import time
+
+import agentql
+from playwright.async_api import async_playwright, Geolocation
 
 BROWSER_IGNORED_ARGS = [
     "--enable-automation",
@@ -106,25 +123,87 @@ CERT_QUERY = """
 """
 
 URL_CSV_PATH = "merged_urls.csv"
-OUTPUT_JSON_PATH = "profile_data_6.json"
+OUTPUT_PATH = "profile_data_6.ndjson"
+ACCOUNTS_PATH = "accounts.json"
+BASE_URL = "https://www.linkedin.com"
+
+NAVIGATION_TIMEOUT_MS = 60000
+# Logging in can stop at a verification step that someone has to clear by hand
+LOGIN_TIMEOUT_MS = 120000
+# How long a profile may take to show its name after the page loads
+PROFILE_READY_TIMEOUT_MS = 30000
+
+
+def read_urls(path, start=None, stop=None):
+    """Profile URLs from the first column of a CSV file with a header row, sliced to [start:stop]"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        urls = [row[0] for row in reader if row]
+    return urls[start:stop]
+
+
+def load_checkpoint(path):
+    """URLs of the profiles already in the NDJSON output file; a line cut off by a crash is ignored"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['id'])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
 
-urls = []
-with open(URL_CSV_PATH, newline='') as f:
-    reader = csv.reader(f)
-    next(reader)
-    for row in reader:
-        urls.append(row[0])
+class Checkpoint:
+    """Appends every finished profile to the NDJSON output file as one flushed line"""
 
-testing_urls = urls[111: 154]
+    def __init__(self, path):
+        # Start on a fresh line if the last run died halfway through writing one
+        partial_line = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                partial_line = f.read(1) != b'\n'
+        self.file = open(path, 'a', encoding='utf-8')
+        if partial_line:
+            self.file.write('\n')
 
-def create_context(browser):
+    def record(self, profile_data):
+        self.file.write(json.dumps(profile_data) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Progress:
+    """Counts finished and failed pages and reports pages/minute"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.start = time.perf_counter()
+
+    def pages_per_minute(self):
+        elapsed = time.perf_counter() - self.start
+        return self.done / elapsed * 60 if elapsed else 0.0
+
+    def report(self, message):
+        print(f"{message} ({self.done + self.failed}/{self.total}, {self.pages_per_minute():.1f} pages/min)")
+
+
+async def create_context(browser):
     user_agent = random.choice(USER_AGENTS)
     header_dnt = random.choice(["0", "1"])
     location = random.choice(LOCATIONS)
     referer = random.choice(REFERERS)
     accept_language = random.choice(ACCEPT_LANGUAGES)
     proxy = random.choice(PROXIES) if PROXIES else None
-    context = browser.new_context(
+    context = await browser.new_context(
         locale="en-US, en, ru",
         timezone_id=location[0],
         extra_http_headers={
@@ -144,135 +223,164 @@ def create_context(browser):
     )
     return context
 
-def random_mouse_movement(page):
+async def random_mouse_movement(page):
     for _ in range(10):
-        page.mouse.move(random.randint(0, 1000), random.randint(0, 1000))
-        time.sleep(random.uniform(0.1, 0.5))
+        await page.mouse.move(random.randint(0, 1000), random.randint(0, 1000))
+        await asyncio.sleep(random.uniform(0.1, 0.5))
         
-def random_scroll(page):
-    page.mouse.wheel(0, 1000)
-    time.sleep(random.uniform(0.1, 0.5))
-
-def query_show_all_data(page, show_all_button, query, profile_data_dict, url):
-    show_all_button.click()
-    random_scroll(page)
-    random_mouse_movement(page)
-    random_mouse_movement(page)
-    random_scroll(page)
-    page.wait_for_page_ready_state()
+async def random_scroll(page):
+    await page.mouse.wheel(0, 1000)
+    await asyncio.sleep(random.uniform(0.1, 0.5))
+
+async def goto_ready(page, url):
+    """Open `url` and wait until the page has loaded and settled"""
+    await page.goto(url, timeout=NAVIGATION_TIMEOUT_MS, wait_until="domcontentloaded")
+    await page.wait_for_page_ready_state()
+
+async def open_profile(page, url):
+    """Open a profile and wait for its name heading to render"""
+    await goto_ready(page, url)
+    await page.locator("main h1").first.wait_for(timeout=PROFILE_READY_TIMEOUT_MS)
+
+async def query_show_all_data(page, show_all_button, query, profile_data_dict, url):
+    await show_all_button.click()
+    await page.wait_for_url(lambda current: "/details/" in current, timeout=NAVIGATION_TIMEOUT_MS)
+    await random_scroll(page)
+    await random_mouse_movement(page)
+    await random_mouse_movement(page)
+    await random_scroll(page)
+    await page.wait_for_page_ready_state()
     query = f"""{{
         {query}
     }}"""
-    data = page.query_data(query)
+    data = await page.query_data(query)
     profile_data_dict.update(data)
     
-    page.goto(url)
-    page.wait_for_timeout(3000)
+    await open_profile(page, url)
 
     return True
 
-# def load_login_state(username, password):
-#     with sync_playwright() as playwright, playwright.chromium.launch(headless=False, args=BROWSER_ARGS,
-#     ignore_default_args=BROWSER_IGNORED_ARGS,) as browser:
-        
-#         page = agentql.wrap(browser.new_page())
-        
-#         # Login first
-#         page.goto("https://www.linkedin.com/login")
-#         username_input = page.get_by_prompt("Email or Phone Input")
-#         username_input.type(username)
-#         password_input = page.get_by_prompt("Password Input")
-#         password_input.type(password)
-#         page.get_by_prompt("Sign In Button").click()
-#         page.wait_for_page_ready_state()
-#         page.wait_for_timeout(5000)
-#         browser.contexts[0].storage_state(path="login.json")
-#         browser.close()
-
-# load_login_state(username, password)
-
-def login (browser, username, password):
-    context = create_context(browser)
-    page = agentql.wrap(context.new_page())
+async def login(context, username, password, base_url=BASE_URL):
+    page = await agentql.wrap_async(await context.new_page())
     # page.enable_stealth_mode()
-    page.goto("https://www.linkedin.com/login")
-    username_input = page.get_by_prompt("Email or Phone Input")
-    username_input.type(username)
-    password_input = page.get_by_prompt("Password Input")
-    password_input.type(password)
-    page.get_by_prompt("Sign In Button").click()
-    page.wait_for_timeout(10000)
+    await goto_ready(page, f"{base_url}/login")
+    username_input = await page.get_by_prompt("Email or Phone Input")
+    await username_input.type(username)
+    password_input = await page.get_by_prompt("Password Input")
+    await password_input.type(password)
+    await (await page.get_by_prompt("Sign In Button")).click()
+    await page.wait_for_url(lambda current: "/feed" in current, timeout=LOGIN_TIMEOUT_MS)
     return page
 
-try: 
-    all_profile_data = []
+async def scrape_profile(page, url):
+    await open_profile(page, url)
+    await random_mouse_movement(page)
+    await random_scroll(page)
+    show_more_exp, show_more_edu, show_more_proj, show_more_cert = False, False, False, False
+    profile_data = {}
+    # Canonical URLs (linkedin_urls.py) end in a slash; the "show all" links continue the path without one
+    profile_url = url.rstrip('/')
     
-    with sync_playwright() as playwright, playwright.chromium.launch(headless=False, args=BROWSER_ARGS,
-    ignore_default_args=BROWSER_IGNORED_ARGS,) as browser, open("accounts.json", "r") as f:
-        accounts = json.load(f)
-        total = 0
-        for account in accounts:
-            page = login(browser, account["username"], account["password"])
-            print(f"Logged in as {account['username']}")
-            for i in range(10):
-                url = testing_urls[i + total]
-                # context = create_context(browser)
-                # page = agentql.wrap(context.new_page())
-                # page.enable_stealth_mode()
-            
-                page.goto(url, timeout=60000)
-                page.wait_for_timeout(5000)
-                random_mouse_movement(page)
-                random_scroll(page)
-                show_more_exp, show_more_edu, show_more_proj, show_more_cert = False, False, False, False
-                profile_data = {}
-                
-                # parse work history info
-                show_all_exp_button = page.locator(f"//a[starts-with(@href, '{url}/details/experience')]")
-                if show_all_exp_button.count() == 1:
-                    show_more_exp = query_show_all_data(page, show_all_exp_button, EXP_QUERY, profile_data, url)
-                    
-                # parse education info
-                show_all_edu_button = page.locator(f"//a[starts-with(@href, '{url}/details/education')]")
-                if show_all_edu_button.count() == 1:
-                    show_more_edu = query_show_all_data(page, show_all_edu_button, EDU_QUERY, profile_data, url)
-
-                # parse project info
-                show_all_proj_button = page.locator(f"//a[starts-with(@href, '{url}/details/projects')]")
-                if show_all_proj_button.count() == 1:
-                    show_more_proj = query_show_all_data(page, show_all_proj_button, PROJ_QUERY, profile_data, url)
-
-                # parse certification info
-                show_all_cert_button = page.locator(f"//a[starts-with(@href, '{url}/details/certifications')]")
-                if show_all_cert_button.count() == 1:
-                    show_more_cert = query_show_all_data(page, show_all_cert_button, CERT_QUERY, profile_data, url)
-        
-                final_query = f"""{BASIC_QUERY}"""
-                if not show_more_exp: final_query += EXP_QUERY
-                if not show_more_edu: final_query += EDU_QUERY
-                if not show_more_proj: final_query += PROJ_QUERY
-                if not show_more_cert: final_query += CERT_QUERY
-                final_query = f"""{{
-                    {final_query}
-                }}"""
-                final_data = page.query_data(final_query)
-                profile_data.update(final_data)
-                profile_data['id'] = url
+    # parse work history info
+    show_all_exp_button = page.locator(f"//a[starts-with(@href, '{profile_url}/details/experience')]")
+    if await show_all_exp_button.count() == 1:
+        show_more_exp = await query_show_all_data(page, show_all_exp_button, EXP_QUERY, profile_data, url)
         
-                all_profile_data.append(profile_data)
-                
-                print(f"Processed {url}")
-            page.close()
-            total += 10
-            # Take a break after each batch
-            time.sleep(5)
-        browser.close()
-    with open(OUTPUT_JSON_PATH, 'w') as f:
-        json.dump(all_profile_data, f, indent=4)
-    print(f"Finished. Processed {len(all_profile_data)} profiles")
-except Exception as e:
-    print(e)
-    with open(OUTPUT_JSON_PATH, 'w') as f:
-        json.dump(all_profile_data, f, indent=4)
+    # parse education info
+    show_all_edu_button = page.locator(f"//a[starts-with(@href, '{profile_url}/details/education')]")
+    if await show_all_edu_button.count() == 1:
+        show_more_edu = await query_show_all_data(page, show_all_edu_button, EDU_QUERY, profile_data, url)
+
+    # parse project info
+    show_all_proj_button = page.locator(f"//a[starts-with(@href, '{profile_url}/details/projects')]")
+    if await show_all_proj_button.count() == 1:
+        show_more_proj = await query_show_all_data(page, show_all_proj_button, PROJ_QUERY, profile_data, url)
+
+    # parse certification info
+    show_all_cert_button = page.locator(f"//a[starts-with(@href, '{profile_url}/details/certifications')]")
+    if await show_all_cert_button.count() == 1:
+        show_more_cert = await query_show_all_data(page, show_all_cert_button, CERT_QUERY, profile_data, url)
+
+    final_query = f"""{BASIC_QUERY}"""
+    if not show_more_exp: final_query += EXP_QUERY
+    if not show_more_edu: final_query += EDU_QUERY
+    if not show_more_proj: final_query += PROJ_QUERY
+    if not show_more_cert: final_query += CERT_QUERY
+    final_query = f"""{{
+        {final_query}
+    }}"""
+    final_data = await page.query_data(final_query)
+    profile_data.update(final_data)
+    profile_data['id'] = url
+    return profile_data
+
+async def account_worker(browser, account, queue, checkpoint, progress, base_url):
+    """Log in as `account` in its own context and scrape URLs from `queue` until it is empty"""
+    context = await create_context(browser)
+    try:
+        page = await login(context, account["username"], account["password"], base_url)
+        print(f"Logged in as {account['username']}")
+        while not queue.empty():
+            url = queue.get_nowait()
+            try:
+                profile_data = await scrape_profile(page, url)
+            except Exception as e:
+                # Not checkpointed, so the next run tries it again
+                progress.failed += 1
+                progress.report(f"Failed {url}: {e}")
+                if page.is_closed():
+                    return
+                continue
+            checkpoint.record(profile_data)
+            progress.done += 1
+            progress.report(f"Processed {url}")
+    except Exception as e:
+        print(f"Stopped working as {account['username']}: {e}")
+    finally:
+        await context.close()
+
+async def scrape(urls, accounts, out_path, max_contexts, base_url=BASE_URL, headless=False):
+    """Scrape the URLs not in `out_path` yet, with one logged-in context per account; returns the Progress"""
+    done = load_checkpoint(out_path)
+    pending = [url for url in dict.fromkeys(urls) if url not in done]
+    print(f"{len(pending)} profiles to scrape, {len(urls) - len(pending)} already in {out_path}")
+    queue = asyncio.Queue()
+    for url in pending:
+        queue.put_nowait(url)
 
+    progress = Progress(len(pending))
+    checkpoint = Checkpoint(out_path)
+    try:
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=headless, args=BROWSER_ARGS, ignore_default_args=BROWSER_IGNORED_ARGS)
+            try:
+                await asyncio.gather(*(
+                    account_worker(browser, account, queue, checkpoint, progress, base_url)
+                    for account in accounts[:max_contexts]
+                ))
+            finally:
+                await browser.close()
+    finally:
+        checkpoint.close()
+    return progress
 
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", default=URL_CSV_PATH, help="CSV of profile URLs, with a header row")
+    parser.add_argument("--start", type=int, help="first row of the URL CSV to scrape")
+    parser.add_argument("--stop", type=int, help="row of the URL CSV to stop before")
+    parser.add_argument("--out", default=OUTPUT_PATH, help="NDJSON output file, also the checkpoint for reruns")
+    parser.add_argument("--accounts", default=ACCOUNTS_PATH, help='JSON list of {"username", "password"}')
+    parser.add_argument("--max-contexts", type=int, help="logged-in contexts scraping at once (default: one per account)")
+    parser.add_argument("--base-url", default=BASE_URL, help="site to log in to, e.g. a local fixture server")
+    parser.add_argument("--headless", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.accounts, "r") as f:
+        accounts = json.load(f)
+    urls = read_urls(args.urls, args.start, args.stop)
+    progress = asyncio.run(scrape(urls, accounts, args.out, args.max_contexts or len(accounts), args.base_url, args.headless))
+    elapsed = time.perf_counter() - progress.start
+    print(f"Finished. Processed {progress.done} profiles ({progress.failed} failed) in {elapsed / 60:.1f} min, "
+          f"{progress.pages_per_minute():.1f} pages/min")
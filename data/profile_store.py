@@ -0,0 +1,154 @@
+'''
+Change detection for scraped profiles.
+
+A SQLite store keeps the latest copy of every profile, keyed by its normalized LinkedIn URL
+(linkedin_urls.py), with a content hash per section (basic, experiences, educations,
+projects, certifications) and when it was first seen, last seen and last changed. Syncing a
+batch of scraped profiles into it appends to a delta feed, one NDJSON line per profile that was
+added, changed or removed:
+
+    {"op": "changed", "id": "https://www.linkedin.com/in/<slug>/", "sections": ["experiences"], "profile": {...}}
+
+`python ingest.py --delta <feed>` (in backend/) embeds and upserts only those profiles, so a
+refresh costs time in proportion to what changed rather than to the whole data set. The store
+records a change as soon as it is synced, so the feed keeps every sync's entries until ingest.py
+has applied them and deleted it; syncing twice before an ingest loses nothing. Profile
+ids in the feed and in `export` are normalized URLs, the same keys ingest.py derives from raw ids.
+
+Usage (from data/):
+    python profile_store.py sync raw-profile-data/profile_data.ndjson --complete --delta profile_delta.ndjson
+    python profile_store.py sync profile_data_6.ndjson --delta profile_delta.ndjson   # a partial scrape
+    python profile_store.py export --out raw-profile-data/profile_data.ndjson
+'''
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+
+# Copies of the backend modules, so profiles are keyed and read the same way as in backend/ingest.py
+from linkedin_urls import normalize_profile_url
+from profile_stream import iter_latest_profiles, write_ndjson
+
+STORE_PATH = "profile_store.sqlite3"
+# Every field that is not one of the list sections belongs to "basic"
+LIST_SECTIONS = ("experiences", "educations", "projects", "certifications")
+SECTIONS = ("basic",) + LIST_SECTIONS
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def section_hashes(profile):
+    """Content hash of each section of a profile; a missing section hashes like an empty one"""
+    basic = {key: value for key, value in profile.items() if key != "id" and key not in LIST_SECTIONS}
+    hashes = {"basic": _digest(basic)}
+    for section in LIST_SECTIONS:
+        hashes[section] = _digest(profile.get(section) or [])
+    return hashes
+
+
+class ProfileStore:
+    """Latest copy and per-section hashes of every profile, keyed by normalized URL"""
+
+    def __init__(self, path=STORE_PATH):
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS profiles (url TEXT PRIMARY KEY, section_hashes TEXT NOT NULL, record TEXT NOT NULL, "
+            "first_seen REAL NOT NULL, last_seen REAL NOT NULL, last_changed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS profiles_last_seen ON profiles (last_seen)")
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def sync(self, profiles, complete=False, counts=None):
+        """
+        Store `profiles` and yield a delta entry for each one that is new or has changed
+        sections. With `complete`, `profiles` is the whole data set, and stored profiles it
+        does not contain are removed and yielded as removed afterwards. `counts`, if given, is
+        filled in with how many profiles were added, changed, unchanged, removed, skipped for
+        lacking a profile URL, and repeated. A profile given twice keeps its first copy, so
+        duplicates do not flip it between copies on every sync; the CLI passes only the last
+        copy of each profile, the one ingest.py keeps too. The changes are committed once the
+        generator is exhausted.
+        """
+        counts = counts if counts is not None else {}
+        counts.update(added=0, changed=0, unchanged=0, removed=0, skipped=0, repeated=0)
+        now = time.time()
+        for profile in profiles:
+            url = normalize_profile_url(profile.get("id"))
+            if url is None:
+                counts["skipped"] += 1
+                continue
+            profile = {**profile, "id": url}
+            hashes = section_hashes(profile)
+            row = self._db.execute("SELECT section_hashes, last_seen FROM profiles WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                self._db.execute(
+                    "INSERT INTO profiles (url, section_hashes, record, first_seen, last_seen, last_changed) VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, json.dumps(hashes), json.dumps(profile), now, now, now),
+                )
+                counts["added"] += 1
+                yield {"op": "added", "id": url, "sections": list(SECTIONS), "profile": profile}
+                continue
+            if row[1] == now:
+                counts["repeated"] += 1
+                continue
+            stored = json.loads(row[0])
+            changed = [section for section in SECTIONS if stored.get(section) != hashes[section]]
+            if not changed:
+                self._db.execute("UPDATE profiles SET last_seen = ? WHERE url = ?", (now, url))
+                counts["unchanged"] += 1
+                continue
+            self._db.execute(
+                "UPDATE profiles SET section_hashes = ?, record = ?, last_seen = ?, last_changed = ? WHERE url = ?",
+                (json.dumps(hashes), json.dumps(profile), now, now, url),
+            )
+            counts["changed"] += 1
+            yield {"op": "changed", "id": url, "sections": changed, "profile": profile}
+
+        if complete:
+            # Everything this sync saw has last_seen == now
+            for (url,) in self._db.execute("SELECT url FROM profiles WHERE last_seen < ?", (now,)).fetchall():
+                counts["removed"] += 1
+                yield {"op": "removed", "id": url, "sections": list(SECTIONS)}
+            self._db.execute("DELETE FROM profiles WHERE last_seen < ?", (now,))
+        self._db.commit()
+
+    def export(self):
+        """Yield the stored copy of every profile"""
+        for (record,) in self._db.execute("SELECT record FROM profiles ORDER BY url"):
+            yield json.loads(record)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=STORE_PATH, help="SQLite file of the profile store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync_parser = commands.add_parser("sync", help="store scraped profiles and write the delta feed")
+    sync_parser.add_argument("profiles", help="profile NDJSON (or JSON array) file")
+    sync_parser.add_argument("--delta", default="profile_delta.ndjson", help="NDJSON delta feed to append to")
+    sync_parser.add_argument("--complete", action="store_true", help="the file holds every profile; remove stored profiles missing from it")
+    export_parser = commands.add_parser("export", help="write every stored profile as NDJSON")
+    export_parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    store = ProfileStore(args.store)
+    try:
+        if args.command == "sync":
+            counts = {}
+            profiles = iter_latest_profiles(args.profiles, lambda profile: normalize_profile_url(profile.get("id")))
+            write_ndjson(store.sync(profiles, args.complete, counts), args.delta, append=True)
+            print(f"{counts['added']} added, {counts['changed']} changed, {counts['unchanged']} unchanged, "
+                  f"{counts['removed']} removed, {counts['skipped']} skipped without a profile URL, {counts['repeated']} repeated; "
+                  f"delta appended to {args.delta}")
+        else:
+            print(f"Exported {write_ndjson(store.export(), args.out)} profiles to {args.out}")
+    finally:
+        store.close()
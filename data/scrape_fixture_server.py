@@ -0,0 +1,154 @@
+'''
+Static-HTML stand-in for LinkedIn, to exercise profile_data_scrapping.py offline.
+
+Serves a login form that redirects to /feed/, and generated profiles at /in/alumnus-<n> laid
+out like LinkedIn's: a name heading in <main>, a 200x200 profile picture, the first two
+experiences and educations, and "show all" links to /in/alumnus-<n>/details/<section>/ when
+there are more. --delay holds every response back to mimic a slow site.
+
+Usage (from data/):
+    python scrape_fixture_server.py --profiles 20 --write-urls fixture_urls.csv [--port 8765] [--delay 0.5]
+'''
+import argparse
+import csv
+import html
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPANIES = ["Amazon", "Google", "Microsoft", "Stripe", "Epic Systems", "Capital One", "Meta", "Deloitte"]
+TITLES = ["Software Engineer", "Data Scientist", "Product Manager", "Research Intern", "Analyst"]
+SCHOOLS = ["University of Wisconsin-Madison", "Carnegie Mellon University", "Stanford University"]
+MAJORS = ["Computer Science", "Statistics", "Economics", "Mathematics"]
+PREVIEW_ITEMS = 2
+
+LOGIN_PAGE = '''<html><body><main>
+<h1>Sign in</h1>
+<form method="post" action="/login">
+  <label>Email or Phone <input name="session_key" type="text"></label>
+  <label>Password <input name="session_password" type="password"></label>
+  <button type="submit">Sign in</button>
+</form>
+</main></body></html>'''
+
+FEED_PAGE = '<html><body><main><h1>Feed</h1><p>Signed in.</p></main></body></html>'
+
+
+def fixture_profile(number):
+    """Deterministic fake profile number `number`"""
+    rng = random.Random(number)
+    experiences = [
+        {"title": rng.choice(TITLES), "company": rng.choice(COMPANIES), "start_date": f"Jun {2015 + i}", "end_date": f"Aug {2016 + i}"}
+        for i in range(rng.randint(1, 5))
+    ]
+    educations = [
+        {"school": rng.choice(SCHOOLS), "degree": rng.choice(["BS", "MS"]), "major": rng.choice(MAJORS), "start_date": f"{2010 + i}", "end_date": f"{2014 + i}"}
+        for i in range(rng.randint(1, 3))
+    ]
+    return {
+        "name": f"Alumnus {number}",
+        "headline": f"{experiences[-1]['title']} at {experiences[-1]['company']}",
+        "location": "Madison, Wisconsin",
+        "about": f"Fixture profile number {number}.",
+        "experiences": experiences,
+        "educations": educations,
+    }
+
+
+def experience_items(experiences):
+    return "".join(
+        f"<li><h3>{html.escape(exp['title'])}</h3><p>{html.escape(exp['company'])}</p><p>{exp['start_date']} - {exp['end_date']}</p></li>"
+        for exp in experiences
+    )
+
+
+def education_items(educations):
+    return "".join(
+        f"<li><h3>{html.escape(edu['school'])}</h3><p>{edu['degree']}, {html.escape(edu['major'])}</p><p>{edu['start_date']} - {edu['end_date']}</p></li>"
+        for edu in educations
+    )
+
+
+def profile_page(base_url, number):
+    profile = fixture_profile(number)
+    url = f"{base_url}/in/alumnus-{number}"
+    sections = []
+    for section, title, items, render in (("experience", "Experience", profile["experiences"], experience_items),
+                                          ("education", "Education", profile["educations"], education_items)):
+        show_all = f'<a href="{url}/details/{section}/">Show all {len(items)} {section}s</a>' if len(items) > PREVIEW_ITEMS else ""
+        sections.append(f"<section><h2>{title}</h2><ul>{render(items[:PREVIEW_ITEMS])}</ul>{show_all}</section>")
+    return f'''<html><body><main>
+<img src="/static/alumnus-{number}.png" width="200" height="200" alt="{profile['name']}">
+<h1>{profile['name']}</h1>
+<p class="headline">{html.escape(profile['headline'])}</p>
+<p class="location">{profile['location']}</p>
+<section><h2>About</h2><p>{profile['about']}</p></section>
+{"".join(sections)}
+</main></body></html>'''
+
+
+def details_page(number, section):
+    profile = fixture_profile(number)
+    if section == "experience":
+        items = experience_items(profile["experiences"])
+    else:
+        items = education_items(profile["educations"])
+    return f"<html><body><main><h1>{profile['name']}</h1><section><h2>{section.title()}</h2><ul>{items}</ul></section></main></body></html>"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    base_url = ""
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        path = self.path.split("?")[0]
+        if path == "/login":
+            return self.respond(200, LOGIN_PAGE)
+        if path.rstrip("/") == "/feed":
+            return self.respond(200, FEED_PAGE)
+        match = re.fullmatch(r"/in/alumnus-(\d+)(?:/details/(experience|education))?/?", path)
+        if not match:
+            return self.respond(404, "<html><body><main><p>Not found</p></main></body></html>")
+        number, section = int(match.group(1)), match.group(2)
+        self.respond(200, details_page(number, section) if section else profile_page(self.base_url, number))
+
+    def do_POST(self):
+        time.sleep(self.delay)
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.split("?")[0] != "/login":
+            return self.respond(404, "")
+        self.send_response(303)
+        self.send_header("Location", "/feed/")
+        self.end_headers()
+
+    def respond(self, status, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profiles", type=int, default=20, help="number of profiles listed by --write-urls")
+    parser.add_argument("--write-urls", help="write the profile URLs to this CSV, in the format of merged_urls.csv")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to hold back every response")
+    args = parser.parse_args()
+
+    FixtureHandler.base_url = f"http://localhost:{args.port}"
+    FixtureHandler.delay = args.delay
+    if args.write_urls:
+        with open(args.write_urls, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['url'])
+            writer.writerows([f"{FixtureHandler.base_url}/in/alumnus-{number}"] for number in range(args.profiles))
+    print(f"Serving fixture profiles at {FixtureHandler.base_url}")
+    ThreadingHTTPServer(("", args.port), FixtureHandler).serve_forever()
@@ -1,5 +1,6 @@
 import defaultPic from '@/default-pic.png';
 import { validateImageUrl } from '@/lib/utils';
+import type { ProfileData } from '@/components/ProfileCard';
 interface Profile {
   id: string;
   name: string;
@@ -18,52 +19,118 @@ interface ChatbotResponse {
   }>;
 }
 
-interface ApiResponse {
-  response: string;
-  profiles: Profile[];
+const RESULTS_HEADER = [
+  `Here are the results:`,
+  ''
+].join('\n');
+
+async function toProfileData(chatbotResponse: ChatbotResponse) {
+  return Promise.all((chatbotResponse.alumni ?? []).map(async (item) => ({
+    id:      item.id,
+    name:    item.name,
+    pic:     item.pic ? await validateImageUrl(item.pic) : defaultPic,
+    summary: item.summary || '',
+  })));
 }
 
-export async function sendChatMessage(message: string): Promise<{ text: string; profiles: Profile[] }> {
-  try {
-    const response = await fetch(import.meta.env.VITE_LOCAL_BACKEND_API_URL + '/chat', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-        'Accept': 'application/json',
-      },
-      credentials: 'include',
-      body: JSON.stringify({ message }),
-    });
+interface StreamMessage {
+  text?: string;
+  response?: string;
+  detail?: string;
+}
 
-    if (!response.ok) {
-      throw new Error('Network response was not ok');
-    }
+type StreamEventData = Profile[] | StreamMessage;
 
-    const data: ApiResponse = await response.json();
-    console.log('Raw API Response:', data);
-    const chatbotResponse: ChatbotResponse = JSON.parse(data.response);
-    console.log('Parsed Chatbot Response:', chatbotResponse);
+export interface ChatStreamHandlers {
+  // Retrieved alumni, available before the answer is generated
+  onProfiles: (profiles: ProfileData[]) => void;
+  // Readable answer so far (one "name: summary" line per alumnus) while the model is still generating
+  onToken: (partialText: string) => void;
+  onDone: (result: { text: string; profiles: ProfileData[] }) => void;
+}
 
-    // Format the response text with just a simple header
-    const formattedText = [
-      `Here are the results:`,
-      ''
-    ].join('\n');
+/**
+ * Streams a chat answer from the /chat/stream server-sent events endpoint.
+ * Profiles are handed to the UI as soon as retrieval finishes; the summarized
+ * alumni list replaces them once generation completes.
+ */
+export async function streamChatMessage(message: string, handlers: ChatStreamHandlers): Promise<void> {
+  const response = await fetch(import.meta.env.VITE_LOCAL_BACKEND_API_URL + '/chat/stream', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Accept': 'text/event-stream',
+    },
+    credentials: 'include',
+    body: JSON.stringify({ message }),
+  });
 
-    // Convert the result array into Profile objects
-    const profiles = await Promise.all(chatbotResponse.alumni.map(async (item) => ({
-      id:      item.id,
-      name:    item.name,
-      pic:     item.pic ? await validateImageUrl(item.pic) : defaultPic,
-      summary: item.summary || '',
-    })));
+  if (!response.ok || !response.body) {
+    throw new Error('Network response was not ok');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let partialText = '';
+  let retrievedProfiles: ProfileData[] = [];
+  let finished = false;
 
-    return {
-      text: formattedText,
-      profiles: profiles,
-    };
-  } catch (error) {
-    console.error('Error:', error);
-    throw error;
+  const handleEvent = async (event: string, data: StreamEventData) => {
+    if (event === 'profiles') {
+      // One card per alumnus even when several of their chunks were retrieved
+      const unique = (data as Profile[]).filter((profile, index, all) => all.findIndex((p) => p.id === profile.id) === index);
+      const profiles = await Promise.all(unique.map(async (profile) => ({
+        id:      profile.id,
+        name:    profile.name,
+        pic:     profile.profile_pic ? await validateImageUrl(profile.profile_pic) : defaultPic,
+        summary: profile.headline || '',
+      })));
+      retrievedProfiles = profiles;
+      handlers.onProfiles(profiles);
+    } else if (event === 'token') {
+      partialText += (data as StreamMessage).text;
+      handlers.onToken(partialText);
+    } else if (event === 'done') {
+      const content = (data as StreamMessage).response ?? '';
+      let chatbotResponse: ChatbotResponse;
+      try {
+        chatbotResponse = JSON.parse(content);
+      } catch {
+        // Not the alumni JSON (empty, or a plain-text answer): show it as is next to the retrieved profiles
+        finished = true;
+        handlers.onDone({ text: content.trim() || RESULTS_HEADER, profiles: retrievedProfiles });
+        return;
+      }
+      finished = true;
+      handlers.onDone({ text: RESULTS_HEADER, profiles: await toProfileData(chatbotResponse) });
+    } else if (event === 'error') {
+      throw new Error((data as StreamMessage).detail);
+    }
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      if (data) await handleEvent(event, JSON.parse(data));
+      boundary = buffer.indexOf('\n\n');
+    }
   }
-} 
\ No newline at end of file
+
+  if (!finished) {
+    throw new Error('Stream ended before the answer was complete');
+  }
+}
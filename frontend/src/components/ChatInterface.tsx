@@ -4,7 +4,7 @@ import { Input } from "@/components/ui/input";
 import ResponseList from './ResponseList';
 import { ProfileData } from './ProfileCard';
 import { Send } from 'lucide-react';
-import { sendChatMessage } from '@/api/chat';
+import { streamChatMessage } from '@/api/chat';
 import { useToast } from "@/components/ui/use-toast";
 
 interface Message {
@@ -50,18 +50,30 @@ const ChatInterface: React.FC = () => {
     setMessages(prev => [...prev, newMessage]);
     setIsLoading(true);
     
+    const responseId = `${Date.now()}-response`;
+    // Adds the response message on the first streamed part and merges later parts into it
+    const upsertResponse = (update: Partial<Message>) => {
+      setMessages(prev => prev.some(message => message.id === responseId)
+        ? prev.map(message => message.id === responseId ? { ...message, ...update } : message)
+        : [...prev, { id: responseId, type: 'response', profiles: [], ...update }]);
+    };
+
     try {
-      const response = await sendChatMessage(input);
-      
-      const responseMessage: Message = {
-        id: Date.now().toString(),
-        type: 'response',
-        text: response.text,
-        profiles: response.profiles as ProfileData[]
-      };
-      
-      setMessages(prev => [...prev, responseMessage]);
+      // Render each part as it arrives: retrieved profiles first, then the summaries as they are written
+      await streamChatMessage(input, {
+        onProfiles: (profiles) => {
+          upsertResponse({ text: 'Summarizing matching alumni...', profiles });
+        },
+        onToken: (partialText) => {
+          upsertResponse({ text: partialText });
+        },
+        onDone: (response) => {
+          upsertResponse({ text: response.text, profiles: response.profiles });
+        },
+      });
     } catch (error) {
+      // Don't leave the response stuck on "Summarizing..."; keep any profiles already shown
+      upsertResponse({ text: 'Sorry, something went wrong while answering. Please try again.' });
       toast({
         title: "Error",
         description: "Failed to get response from the chatbot. Please try again.",
@@ -86,7 +98,7 @@ const ChatInterface: React.FC = () => {
               ) : (
                 <div className="space-y-3 animate-message-fade-in opacity-0">
                   {message.text && (
-                    <div>
+                    <div className="whitespace-pre-line">
                       {message.text}
                     </div>
                   )}